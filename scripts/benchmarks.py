@@ -0,0 +1,679 @@
+"""
+Micro-benchmarks for the XML extraction pipeline.
+Usage:
+    python benchmarks.py sentence-ending [--errors 1000 2000 5000]
+    python benchmarks.py splitter [--corpora LEONIDE Kolipsi_2]
+    python benchmarks.py regex [--corpora LEONIDE Kolipsi_2]
+    python benchmarks.py import-time [--repeat 5] [--save-baseline] [--tolerance 0.5]
+    python benchmarks.py load [--csv ../output/extraction/all_corpora.csv]
+    python benchmarks.py memory [--corpora LEONIDE Kolipsi_2]
+    python benchmarks.py extract --against REV [--files 50]
+    python benchmarks.py xml-backends [--corpora LEONIDE Kolipsi_2]
+    python benchmarks.py prefetch [--latency-ms 2] [--depths 0 1 4 16]
+"""
+import os
+import re
+import sys
+import time
+import tempfile
+import platform
+import subprocess
+import argparse
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Callable, List, Tuple
+
+import xml_extraction as xe
+from configs import ExtractionParams, Paths
+from consistency_checks import collect_split_texts, corpus_files
+from corpus_manifest import corpus_manifest
+from xml_backend import get_backend, lxml_available
+
+# =======================
+# HELPERS
+# =======================
+def best_of(fn: Callable, repeat: int = 3) -> float:
+    """Best wall time of several runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def print_table(header: List[str], rows: List[List]):
+    """Print a plain fixed-width table."""
+    widths = [max(len(str(x)) for x in col) for col in zip(header, *rows)]
+    for row in [header] + rows:
+        print("  ".join(str(x).rjust(w) for x, w in zip(row, widths)))
+
+# =======================
+# SENTENCE-ENDING CHECK
+# =======================
+class LegacyTextBuilder(xe.TextBuilder):
+    """TextBuilder answering ends_sentence() the old way, via a full get_text()."""
+    def ends_sentence(self) -> bool:
+        return xe.has_sentence_ending(self.get_text())
+
+def synthetic_kolipsi_exercise(n_errors: int) -> ET.Element:
+    """Kolipsi exercise where every <error> follows a sentence end and fixes capitalisation."""
+    unit = "Das war ein Satz. <error><originalForm>dann</originalForm><targetForm>Dann</targetForm></error> ging es weiter. "
+    return ET.fromstring(f"<exercise>{unit * n_errors}</exercise>")
+
+def bench_sentence_ending(sizes: List[int]):
+    """Time extract_kolipsi with the incremental and the legacy sentence-ending check."""
+    rows = []
+    text_builder = xe.TextBuilder
+    for n_errors in sizes:
+        exercise = synthetic_kolipsi_exercise(n_errors)
+        new = best_of(lambda: xe.extract_kolipsi(exercise))
+
+        # Legacy is quadratic - one run is plenty
+        xe.TextBuilder = LegacyTextBuilder
+        try:
+            legacy = best_of(lambda: xe.extract_kolipsi(exercise), repeat=1)
+        finally:
+            xe.TextBuilder = text_builder
+
+        rows.append([n_errors, f"{legacy * 1000:.1f}", f"{new * 1000:.1f}", f"{legacy / new:.1f}x"])
+
+    print("extract_kolipsi on a synthetic exercise (ms, best of runs)")
+    print_table(["errors", "get_text()", "ends_sentence()", "speedup"], rows)
+
+# =======================
+# SENTENCE SPLITTER
+# =======================
+def bench_splitter(corpora: List[str]):
+    """Time the spaCy and the fast splitter on the chunks of the bundled corpora."""
+    texts = collect_split_texts(corpora)
+    chunks = [chunk for text in texts for chunk in xe.presplit_chunks(text)]
+
+    rows = []
+    saved = ExtractionParams.SENTENCE_SPLITTER
+    try:
+        for splitter in ["spacy", "fast"]:
+            ExtractionParams.SENTENCE_SPLITTER = splitter
+            run = lambda: list(xe.iter_chunk_sentences(chunks))
+            cold = best_of(run, repeat=1)  # First run fills the tokenizer caches
+            rows.append([splitter, f"{cold * 1000:.0f}", f"{best_of(run) * 1000:.0f}"])
+    finally:
+        ExtractionParams.SENTENCE_SPLITTER = saved
+
+    print(f"Sentence splitting of {len(chunks)} chunks (ms)")
+    print_table(["splitter", "first run", "best of 3"], rows)
+
+# =======================
+# REGEX CLEANUP
+# =======================
+# Cleanup code as it was before text_patterns.py: one string pattern per pass
+class StringPatternTextBuilder(xe.TextBuilder):
+    def add_text(self, text: str, merge: bool = False):
+        if not text:
+            return
+        text = re.sub(r'\bunreadable\b', '', text, flags=re.IGNORECASE)
+        text = re.sub(r'unreadable', '', text, flags=re.IGNORECASE)
+        text = text.strip()
+        if not text:
+            return
+        self.last_char = text[-1]
+        if not self.parts:
+            self.parts.append(text)
+            return
+        if merge:
+            self.parts.append(text)
+        else:
+            if self.parts[-1] and not self.parts[-1].endswith(' '):
+                self.parts.append(' ')
+            self.parts.append(text)
+
+    def get_text(self) -> str:
+        text = ''.join(self.parts)
+        text = re.sub(r' +', ' ', text)
+        text = re.sub(r'\s+([.:;!?,])', r'\1', text)
+        return text.strip()
+
+def string_pattern_presplit_chunks(text: str) -> List[str]:
+    if not text or not text.strip():
+        return []
+    text = re.sub(r'\.{2,}', '.<SPLIT>', text)
+    text = re.sub(r':\s*(\d+\s*\))', r': <SPLIT>\1', text)
+    text = re.sub(r'(\d+\s*\))', r'.<SPLIT>\1', text)
+    text = re.sub(r'([""„])([^"""„]+[.!?]\s+[^"""„]+)(["""])', r'\2', text)
+    text = re.sub(r'"([A-ZÄÖÜ][^"]{10,})"', r'<SPLIT>\1<SPLIT>', text)
+    text = re.sub(r'„([A-ZÄÖÜ][^"]{10,})"', r'<SPLIT>\1<SPLIT>', text)
+    text = re.sub(r'([.!?])\s+([A-ZÄÖÜ])', r'\1<SPLIT>\2', text)
+    chunks = text.split('<SPLIT>')
+    xe.logger.debug("presplit chunks: %s", chunks)
+    cleaned_chunks = []
+    for chunk in chunks:
+        if not chunk.strip():
+            continue
+        clean = re.sub(r"<[^>]+>", " ", chunk)
+        clean = re.sub(r"[ ]+", " ", clean)
+        clean = re.sub(r"\n{2,}", "\n<PAR>\n", clean)
+        cleaned_chunks.append(clean.strip())
+    return cleaned_chunks
+
+def string_pattern_clean_sentence_pairs(pairs: List[xe.SentencePair]) -> List[xe.SentencePair]:
+    cleaned = []
+    seen_pairs = set()
+    for pair in pairs:
+        if pair.has_foreign:
+            continue
+        src = re.sub(r"\s*\n\s*", " ", pair.src).strip()
+        tgt = re.sub(r"\s*\n\s*", " ", pair.tgt).strip()
+        interjection_pattern = r'\b(h[aeo]+|e+|o+|y+e+|gahahaha|hahaha+|noo+)(?:[.!?,"\s]|$)'
+        src = re.sub(interjection_pattern, lambda m: m.group(0)[-1] if m.group(0)[-1] in '.!?,"' else '', src, flags=re.IGNORECASE)
+        tgt = re.sub(interjection_pattern, lambda m: m.group(0)[-1] if m.group(0)[-1] in '.!?,"' else '', tgt, flags=re.IGNORECASE)
+        src = re.sub(r'\s+', ' ', src).strip()
+        tgt = re.sub(r'\s+', ' ', tgt).strip()
+        src = re.sub(r'^-\s+(?=[""„A-ZÄÖÜ])', '', src)
+        tgt = re.sub(r'^-\s+(?=[""„A-ZÄÖÜ])', '', tgt)
+        if '*' in src or '*' in tgt:
+            continue
+        src_lower = src.lower()
+        tgt_lower = tgt.lower()
+        if '@' in src or '@' in tgt:
+            continue
+        if 'fortsetzung der aufgabe 2 fehlt' in src_lower or 'fortsetzung der aufgabe 2 fehlt' in tgt_lower:
+            continue
+        if 'text nicht beendet' in src_lower or 'text nicht beendet' in tgt_lower:
+            continue
+        if 'der text abgebrochen' in src_lower or 'der text abgebrochen' in tgt_lower:
+            continue
+        if re.search(r'die aufgabe\s*\d?\s*abgebrochen', src_lower) or re.search(r'die aufgabe\s*\d?\s*abgebrochen', tgt_lower):
+            continue
+        if 'abgebrochen' in src_lower or 'abgebrochen' in tgt_lower:
+            if 'text' in src_lower or 'text' in tgt_lower or 'aufgabe' in src_lower or 'aufgabe' in tgt_lower:
+                continue
+        src = re.sub(r"^\s*\d+\s*[.\)]\s*", "", src).strip()
+        tgt = re.sub(r"^\s*\d+\s*[.\)]\s*", "", tgt).strip()
+        if not src or not tgt:
+            continue
+        if len(re.findall(r'\b\w+\b', src)) <= 2 or len(re.findall(r'\b\w+\b', tgt)) <= 2:
+            continue
+        pair_key = (src.lower(), tgt.lower())
+        if pair_key in seen_pairs:
+            continue
+        seen_pairs.add(pair_key)
+        cleaned.append(xe.SentencePair(src, tgt, pair.has_correction, pair.has_foreign))
+    return cleaned
+
+class RecordingTextBuilder(xe.TextBuilder):
+    """TextBuilder that keeps the add_text calls it receives."""
+    sessions: List[List] = []
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+        RecordingTextBuilder.sessions.append(self.calls)
+
+    def add_text(self, text: str, merge: bool = False):
+        self.calls.append((text, merge))
+        super().add_text(text, merge)
+
+def collect_regex_inputs(corpora: List[str]):
+    """add_text calls per builder, split texts and raw pairs per file of a full extraction."""
+    RecordingTextBuilder.sessions = []
+    raw_pairs = []
+    text_builder = xe.TextBuilder
+    xe.TextBuilder = RecordingTextBuilder
+    try:
+        plans = []
+        for corpus_name, path in corpus_files(corpora):
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                plans.append(xe.plan_xml_source(f.read(), corpus_name))
+    finally:
+        xe.TextBuilder = text_builder
+
+    saved = ExtractionParams.SENTENCE_SPLITTER
+    ExtractionParams.SENTENCE_SPLITTER = "fast"
+    try:
+        raw_pairs = xe.resolve_plans(plans)
+    finally:
+        ExtractionParams.SENTENCE_SPLITTER = saved
+
+    return RecordingTextBuilder.sessions, collect_split_texts(corpora), raw_pairs
+
+def replay_add_text(builder_cls, sessions) -> List:
+    builders = []
+    for calls in sessions:
+        builder = builder_cls()
+        for text, merge in calls:
+            builder.add_text(text, merge)
+        builders.append(builder)
+    return builders
+
+def bench_regex(corpora: List[str]):
+    """Time each cleanup function with string patterns and with text_patterns.py."""
+    sessions, texts, raw_pairs = collect_regex_inputs(corpora)
+    n_calls = sum(len(calls) for calls in sessions)
+    n_pairs = sum(len(pairs) for pairs in raw_pairs)
+
+    old_builders = replay_add_text(StringPatternTextBuilder, sessions)
+    new_builders = replay_add_text(xe.TextBuilder, sessions)
+
+    def run_presplit(fn):
+        return [fn(text) for text in texts]
+
+    cases = [
+        (f"add_text ({n_calls} calls)",
+         lambda: replay_add_text(StringPatternTextBuilder, sessions),
+         lambda: replay_add_text(xe.TextBuilder, sessions),
+         lambda out: [b.parts for b in out]),
+        (f"get_text ({len(sessions)} builders)",
+         lambda: [b.get_text() for b in old_builders],
+         lambda: [b.get_text() for b in new_builders],
+         None),
+        (f"presplit_chunks ({len(texts)} texts)",
+         lambda: run_presplit(string_pattern_presplit_chunks),
+         lambda: run_presplit(xe.presplit_chunks),
+         None),
+        (f"clean_sentence_pairs ({n_pairs} pairs)",
+         lambda: [string_pattern_clean_sentence_pairs(p) for p in raw_pairs],
+         lambda: [xe.clean_sentence_pairs(p) for p in raw_pairs],
+         None),
+    ]
+
+    rows = []
+    for name, old_fn, new_fn, key in cases:
+        key = key or (lambda out: out)
+        same = key(old_fn()) == key(new_fn())
+        old, new = best_of(old_fn), best_of(new_fn)
+        rows.append([name, f"{old * 1000:.1f}", f"{new * 1000:.1f}", f"{old / new:.2f}x", "yes" if same else "NO"])
+
+    print("Text cleanup on the inputs of a full extraction (ms, best of 3)")
+    print_table(["function", "string patterns", "text_patterns", "speedup", "same output"], rows)
+
+# =======================
+# IMPORT TIME
+# =======================
+# Startup times are compared with the "import-time" entry of the stage benchmark
+# baseline (Paths.BENCH_BASELINE, see stage_benchmarks.py), stored with --save-baseline
+# on the same machine; import-time exits with status 1 if a best-of run is more than
+# (1 + tolerance) x its baseline. "import" cases are the cumulative
+# `python -X importtime` time of the module, "run" cases the wall time of the
+# whole command (interpreter startup included).
+IMPORT_TIME_KEY = "import-time"
+IMPORT_TIME_TOLERANCE = 0.5
+
+def import_time_ms(module: str) -> float:
+    """Cumulative import time of module in a fresh interpreter (python -X importtime)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, check=True)
+    for line in proc.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1000
+    raise RuntimeError(f"no importtime line for {module}")
+
+def run_time_ms(args: List[str]) -> float:
+    """Wall time of a python command in a fresh interpreter."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+def bench_import_time(repeat: int, baseline_path: str, tolerance: float, save: bool) -> int:
+    """Startup cost of the scripts against the stored baseline; returns the number over tolerance."""
+    from stage_benchmarks import git_commit, load_baseline, write_baseline
+    cases = {
+        "import xml_extraction": lambda: import_time_ms("xml_extraction"),
+        "import corpus_stats": lambda: import_time_ms("corpus_stats"),
+        "run xml_extraction.py --help": lambda: run_time_ms(["xml_extraction.py", "--help"]),
+    }
+
+    baseline = load_baseline(baseline_path)
+    base = baseline.get(IMPORT_TIME_KEY, {}).get("ms", {})
+    rows = []
+    measured = {}
+    slower = 0
+    for name, measure in cases.items():
+        best = min(measure() for _ in range(repeat))
+        measured[name] = round(best, 1)
+        row = [name, f"{best:.1f}"]
+        if base.get(name):
+            ratio = best / base[name]
+            status = "SLOWER" if ratio > 1 + tolerance else "ok"
+            slower += status == "SLOWER"
+            row += [f"{base[name]:.1f}", f"{ratio:.2f}x", status]
+        else:
+            row += ["-", "-", "no baseline"]
+        rows.append(row)
+
+    # One-off cost now paid on first use instead of at import
+    start = time.perf_counter()
+    xe.get_nlp()
+    nlp_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Startup cost (ms, best of {repeat})")
+    print_table(["command", "time", "baseline", "ratio", "status"], rows)
+    print(f"First get_nlp() call (German() + sentencizer): {nlp_ms:.1f} ms")
+    if save:
+        baseline[IMPORT_TIME_KEY] = {"commit": git_commit(), "python": platform.python_version(), "ms": measured}
+        write_baseline(baseline_path, baseline)
+        print(f"Saved baseline to {baseline_path}")
+        return 0
+    return slower
+
+# =======================
+# PAIR TABLE LOADING
+# =======================
+def bench_load(csv_path: str):
+    """Time pd.read_csv against load_pairs on Parquet, for the column sets of corpus_stats."""
+    import pandas as pd
+    from pair_table import PAIR_COLUMNS, ParquetPairWriter, load_pairs
+    from corpus_stats import STATS_COLUMNS, TOKEN_STATS_COLUMNS
+
+    df = pd.read_csv(csv_path, encoding="utf-8", keep_default_na=False)
+    with tempfile.TemporaryDirectory() as tmp:
+        parquet_path = os.path.join(tmp, "all_corpora.parquet")
+        writer = ParquetPairWriter(parquet_path)
+        writer.write_rows(list(df[PAIR_COLUMNS].itertuples(index=False, name=None)))
+        writer.close()
+
+        rows = [
+            ["read_csv (all columns)", f"{best_of(lambda: pd.read_csv(csv_path, encoding='utf-8')) * 1000:.1f}"],
+            ["load_pairs csv STATS_COLUMNS", f"{best_of(lambda: load_pairs(STATS_COLUMNS, csv_path)) * 1000:.1f}"],
+        ]
+        for name, columns in [("all columns", None), ("STATS_COLUMNS", STATS_COLUMNS),
+                              ("TOKEN_STATS_COLUMNS", TOKEN_STATS_COLUMNS)]:
+            seconds = best_of(lambda: load_pairs(columns, parquet_path))
+            rows.append([f"load_pairs parquet {name}", f"{seconds * 1000:.1f}"])
+        sizes = f"{os.path.getsize(csv_path) / 1e6:.1f} MB csv, {os.path.getsize(parquet_path) / 1e6:.1f} MB parquet"
+
+    print(f"Loading {len(df)} extracted pairs ({sizes}; ms, best of 3)")
+    print_table(["loader", "time"], rows)
+
+# =======================
+# PAIR MEMORY
+# =======================
+@dataclass
+class DictSentencePair:
+    """SentencePair before __slots__ and src/tgt sharing."""
+    src: str
+    tgt: str
+    has_correction: bool
+    has_foreign: bool
+
+    def to_tuple(self):
+        return (self.src, self.tgt, self.has_correction, self.has_foreign)
+
+def retained_bytes(pairs: List) -> int:
+    """Bytes held by the pair objects, their __dict__ and their strings (shared objects counted once)."""
+    seen = set()
+    total = 0
+    for pair in pairs:
+        objs = [pair, pair.src, pair.tgt]
+        if hasattr(pair, "__dict__"):
+            objs.append(pair.__dict__)
+        for obj in objs:
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                total += sys.getsizeof(obj)
+    return total + 8 * len(pairs)  # Plus one list slot per pair
+
+def extract_pairs(corpora: List[str]) -> List:
+    """Cleaned pairs of every file, extracted with whatever xe.SentencePair currently is."""
+    pairs = []
+    for corpus_name, path in corpus_files(corpora):
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            plan = xe.plan_xml_source(f.read(), corpus_name)
+        pairs.extend(xe.clean_sentence_pairs(xe.resolve_plans([plan])[0]))
+    return pairs
+
+def bench_memory(corpora: List[str]):
+    """Memory per 100k extracted pairs with the old dataclass and the slotted, src-sharing SentencePair."""
+    sentence_pair = xe.SentencePair
+    saved = ExtractionParams.SENTENCE_SPLITTER
+    ExtractionParams.SENTENCE_SPLITTER = "fast"
+    rows = []
+    try:
+        for name, cls in [("dataclass (before)", DictSentencePair), ("slotted + shared tgt", sentence_pair)]:
+            xe.SentencePair = cls
+            pairs = extract_pairs(corpora)
+            per_pair = retained_bytes(pairs) / len(pairs)
+            shared = sum(pair.tgt is pair.src for pair in pairs)
+            rows.append([name, len(pairs), shared, f"{per_pair:.0f}", f"{per_pair * 100_000 / 2**20:.1f}"])
+    finally:
+        xe.SentencePair = sentence_pair
+        ExtractionParams.SENTENCE_SPLITTER = saved
+
+    print("Memory held by the cleaned pairs of the corpora")
+    print_table(["SentencePair", "pairs", "tgt is src", "bytes/pair", "MiB per 100k pairs"], rows)
+
+# =======================
+# EXTRACTOR DISPATCH
+# =======================
+def load_revision_module(rev: str, module: str = "xml_extraction"):
+    """Import scripts/<module>.py as of a git revision (it shares the current helper modules)."""
+    import importlib.util
+    source = subprocess.run(["git", "show", f"{rev}:scripts/{module}.py"], capture_output=True,
+                            check=True).stdout
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, f"{module}_{rev}.py")
+        with open(path, "wb") as f:
+            f.write(source)
+        spec = importlib.util.spec_from_file_location(f"{module}_{rev}", path)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+    return mod
+
+def largest_units(corpus_name: str, n_files: int, module=xe) -> List[Tuple]:
+    """
+    Extraction units (LEONIDE paragraphs / Kolipsi exercises) of the n largest
+    files of a corpus, parsed the way `module` (xml_extraction at some revision)
+    parses them: (unit, SpaceTable of its document), or (unit,) for revisions
+    that still injected SPACEWRAPPER elements into the text.
+    """
+    entries = sorted(corpus_manifest(corpus_name), key=lambda e: -e.size)[:n_files]
+    injects = hasattr(module, "inject_spaces_between_tags")
+    units = []
+    for entry in entries:
+        with open(entry.path, "rb") as f:
+            xml_content = xe.decode_xml(f.read())
+        if injects:
+            root = ET.fromstring(module.inject_spaces_between_tags(xml_content))
+            extra = ()
+        else:
+            root = ET.fromstring(xml_content)
+            extra = (module.record_spaces(root),)
+        unit_tag = "paragraph" if corpus_name == "LEONIDE" else "exercise"
+        units.extend((el, *extra) for el in root.iter() if xe.local_name(el.tag) == unit_tag)
+    return units
+
+def bench_extract(rev: str, n_files: int, repeat: int):
+    """extract_leonide / extract_kolipsi now vs. at rev, on the units of the largest files."""
+    old = load_revision_module(rev)
+    rows = []
+    for corpus_name in ["LEONIDE", "Kolipsi_2"]:
+        name = "extract_leonide" if corpus_name == "LEONIDE" else "extract_kolipsi"
+        old_units = largest_units(corpus_name, n_files, old)
+        new_units = largest_units(corpus_name, n_files)
+        new_fn, old_fn = getattr(xe, name), getattr(old, name)
+        if [new_fn(*u) for u in new_units] != [old_fn(*u) for u in old_units]:
+            print(f"  [MISMATCH] {name} differs from {rev}")
+        # Interleaved, so that load changes on the machine hit both sides
+        t_old = t_new = float("inf")
+        for _ in range(repeat):
+            t_old = min(t_old, best_of(lambda: [old_fn(*u) for u in old_units], 1))
+            t_new = min(t_new, best_of(lambda: [new_fn(*u) for u in new_units], 1))
+        n_old = sum(1 for unit, *_ in old_units for _ in unit.iter())
+        n_new = sum(1 for unit, *_ in new_units for _ in unit.iter())
+        rows.append([name, len(new_units), n_old, n_new, f"{t_old * 1000:.1f}", f"{t_new * 1000:.1f}",
+                     f"{t_old / t_new:.2f}x"])
+
+    print(f"Extractors on the {n_files} largest files per corpus (ms, best of {repeat})")
+    print_table(["function", "units", f"elements {rev}", "elements now", rev, "now", "speedup"], rows)
+
+# =======================
+# XML BACKENDS
+# =======================
+def unit_lookups(backend, root, corpus_type: str) -> List:
+    """The paragraph/body/exercise lookups of plan_from_root, without the extraction."""
+    if corpus_type == "LEONIDE":
+        return (backend.findall(root, './/{http://www.eurac.edu/transcanno}paragraph')
+                or backend.findall(root, './/paragraph'))
+    ns = "kolipsi" if "Kolipsi_1" in corpus_type else "kolipsi_II"
+    body = backend.find(root, f'.//{{http://www.eurac.edu/{ns}}}body')
+    if body is None:
+        body = backend.find(root, './/body')
+    return [] if body is None else backend.findall(body, './/exercise')
+
+def bench_xml_backends(corpora: List[str], repeat: int):
+    """Parse, unit lookup and full plan_from_root per backend; the plans must be identical."""
+    if not lxml_available():
+        print("lxml is not installed, only the etree backend can run")
+        return
+    docs = []
+    for corpus_name, path in corpus_files(corpora):
+        with open(path, "rb") as f:
+            docs.append((corpus_name, xe.decode_xml(f.read())))
+
+    rows = []
+    plans = {}
+    for name in ["etree", "lxml"]:
+        backend = get_backend(name)
+
+        def parse_all():
+            roots = []
+            for corpus_type, xml_content in docs:
+                try:
+                    roots.append((corpus_type, backend.fromstring(xml_content)))
+                except backend.ParseError:
+                    pass
+            return roots
+        roots = [(ct, root, xe.record_spaces(root)) for ct, root in parse_all()]
+        t_parse = best_of(parse_all, repeat)
+        t_lookup = best_of(lambda: [unit_lookups(backend, root, ct) for ct, root, _ in roots], repeat)
+        t_plan = best_of(lambda: [xe.plan_from_root(root, ct, spaces, backend) for ct, root, spaces in roots],
+                         repeat)
+        plans[name] = [xe.plan_from_root(root, ct, spaces, backend) for ct, root, spaces in roots]
+        rows.append([name, len(roots), f"{t_parse * 1000:.1f}", f"{t_lookup * 1000:.2f}", f"{t_plan * 1000:.1f}",
+                     f"{(t_parse + t_plan) * 1000:.1f}"])
+
+    if plans["etree"] != plans["lxml"]:
+        print("  [MISMATCH] the lxml plans differ from the etree plans")
+    print(f"{len(docs)} documents (ms, best of {repeat}; plan_from_root includes the lookups)")
+    print_table(["backend", "parsed", "parse", "lookup", "plan_from_root", "parse + plan"], rows)
+
+# =======================
+# PREFETCH
+# =======================
+def bench_prefetch(corpora: List[str], latency_ms: float, depths: List[int], files: int):
+    """
+    Serial extraction (fast splitter, no cache) per prefetch depth, with
+    latency_ms added to every file read to stand in for a network filesystem.
+    """
+    by_corpus = {}
+    for corpus_name, path in corpus_files(corpora):
+        paths = by_corpus.setdefault(corpus_name, [])
+        if len(paths) < files:
+            paths.append(path)
+    n_files = sum(map(len, by_corpus.values()))
+
+    read_xml_bytes = xe.read_xml_bytes
+    def slow_read(path):
+        time.sleep(latency_ms / 1000)
+        return read_xml_bytes(path)
+
+    saved = (ExtractionParams.SENTENCE_SPLITTER, ExtractionParams.PREFETCH_DEPTH)
+    ExtractionParams.SENTENCE_SPLITTER = "fast"
+    xe.read_xml_bytes = slow_read
+    rows = []
+    outputs = {}
+    try:
+        for depth in depths:
+            ExtractionParams.PREFETCH_DEPTH = depth
+            xe.METRICS.reset()
+            start = time.perf_counter()
+            outputs[depth] = [[r.pairs for r in xe.iter_file_results(paths, corpus_name)]
+                              for corpus_name, paths in by_corpus.items()]
+            wall = time.perf_counter() - start
+            stall = xe.METRICS.stages.get("prefetch.stall", [0, 0.0])
+            full = xe.METRICS.stages.get("prefetch.full", [0, 0.0])
+            rows.append([depth, f"{wall:.2f}", f"{xe.METRICS.stages['read'][1]:.2f}",
+                         stall[0], f"{stall[1]:.2f}", full[0], f"{full[1]:.2f}"])
+    finally:
+        xe.read_xml_bytes = read_xml_bytes
+        ExtractionParams.SENTENCE_SPLITTER, ExtractionParams.PREFETCH_DEPTH = saved
+
+    if any(out != outputs[depths[0]] for out in outputs.values()):
+        print("  [MISMATCH] the pairs differ between prefetch depths")
+    print(f"{n_files} files, +{latency_ms} ms per read (seconds; depth 0 = read in line)")
+    print_table(["depth", "wall", "read", "stalls", "stall s", "reader full", "full s"], rows)
+
+# =======================
+# MAIN
+# =======================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extraction micro-benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p_end = sub.add_parser("sentence-ending", help="TextBuilder sentence-ending check")
+    p_end.add_argument("--errors", type=int, nargs="+", default=[1000, 2000, 5000],
+                       help="Number of <error> nodes in the synthetic document")
+
+    p_split = sub.add_parser("splitter", help="spaCy vs. fast sentence splitter")
+    p_split.add_argument("--corpora", nargs="+", default=list(ExtractionParams.CORPORA),
+                         choices=list(ExtractionParams.CORPORA),
+                         help="Corpora whose chunks are split (default: all bundled corpora)")
+
+    p_regex = sub.add_parser("regex", help="String patterns vs. precompiled/fused text_patterns")
+    p_regex.add_argument("--corpora", nargs="+", default=list(ExtractionParams.CORPORA),
+                         choices=list(ExtractionParams.CORPORA),
+                         help="Corpora whose extraction inputs are replayed (default: all bundled corpora)")
+
+    p_import = sub.add_parser("import-time", help="Import/startup time against the stored baseline")
+    p_import.add_argument("--repeat", type=int, default=5, help="Runs per command (best is kept)")
+    p_import.add_argument("--baseline", default=Paths.BENCH_BASELINE, help="Baseline file to compare against")
+    p_import.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    p_import.add_argument("--tolerance", type=float, default=IMPORT_TIME_TOLERANCE,
+                          help="Allowed slowdown against the baseline before a command counts as SLOWER")
+
+    p_load = sub.add_parser("load", help="CSV vs. Parquet loading of the extracted pairs")
+    p_load.add_argument("--csv", default=Paths.EXTRACT_CSV, help="Extraction CSV to convert and load")
+
+    p_mem = sub.add_parser("memory", help="Memory per 100k pairs, old vs. slotted SentencePair")
+    p_mem.add_argument("--corpora", nargs="+", default=list(ExtractionParams.CORPORA),
+                       choices=list(ExtractionParams.CORPORA),
+                       help="Corpora whose pairs are measured (default: all bundled corpora)")
+
+    p_extract = sub.add_parser("extract", help="Per-element cost of the extractors vs. an older revision")
+    p_extract.add_argument("--against", required=True,
+                           help="git revision to compare with (e.g. the last one with the recursive extractors)")
+    p_extract.add_argument("--files", type=int, default=50, help="Largest files per corpus to extract")
+    p_extract.add_argument("--repeat", type=int, default=25, help="Interleaved runs per side (best is kept)")
+
+    p_backends = sub.add_parser("xml-backends", help="ElementTree vs. lxml parsing and unit lookup")
+    p_backends.add_argument("--corpora", nargs="+", default=list(ExtractionParams.CORPORA),
+                            choices=list(ExtractionParams.CORPORA),
+                            help="Corpora whose documents are parsed (default: all bundled corpora)")
+    p_backends.add_argument("--repeat", type=int, default=5, help="Runs per backend (best is kept)")
+
+    p_prefetch = sub.add_parser("prefetch", help="Serial extraction per prefetch depth, with simulated read latency")
+    p_prefetch.add_argument("--corpora", nargs="+", default=list(ExtractionParams.CORPORA),
+                            choices=list(ExtractionParams.CORPORA),
+                            help="Corpora whose files are extracted (default: all bundled corpora)")
+    p_prefetch.add_argument("--latency-ms", type=float, default=2.0, help="Delay added to every file read")
+    p_prefetch.add_argument("--depths", type=int, nargs="+", default=[0, 1, 4, 16], help="Prefetch depths to run")
+    p_prefetch.add_argument("--files", type=int, default=300, help="Files per corpus")
+
+    args = parser.parse_args()
+    if args.bench == "sentence-ending":
+        bench_sentence_ending(args.errors)
+    elif args.bench == "splitter":
+        bench_splitter(args.corpora)
+    elif args.bench == "regex":
+        bench_regex(args.corpora)
+    elif args.bench == "import-time":
+        sys.exit(1 if bench_import_time(args.repeat, args.baseline, args.tolerance, args.save_baseline) else 0)
+    elif args.bench == "load":
+        bench_load(args.csv)
+    elif args.bench == "memory":
+        bench_memory(args.corpora)
+    elif args.bench == "extract":
+        bench_extract(args.against, args.files, args.repeat)
+    elif args.bench == "xml-backends":
+        bench_xml_backends(args.corpora, args.repeat)
+    elif args.bench == "prefetch":
+        bench_prefetch(args.corpora, args.latency_ms, args.depths, args.files)
@@ -7,6 +7,11 @@ Contains:
 class Paths: 
     EXTRACT_OUT = '../output/extraction'  
     EXTRACT_CSV = "../output/extraction/all_corpora.csv"
+    EXTRACT_PARQUET = "../output/extraction/all_corpora.parquet"
+    EXTRACT_CACHE = "../output/cache/extraction"
+    MANIFESTS = "../output/cache/manifests"  # One file manifest per corpus (corpus_manifest.py)
+    BENCH_HISTORY = "../output/benchmarks/history.jsonl"
+    BENCH_BASELINE = "../output/benchmarks/baseline.json"
     SET_SPLITS = "../output/data_split"
     MODELS = "../output/results"
     LLM_BASE = "../output/results/llm_prompting/LLaMA3_2_base.tgt"
@@ -36,10 +41,44 @@ class ExtractionParams:
         }
     }
     ACTIVE_CORPORA = ['LEONIDE']  # Corpora to process (empty list = process none)
-    OUTPUT_FORMAT = 'norm'         # Output settings - Options: "csv", "norm", or "both"
-    EXCLUDE = ["DE_pic_2_57Y25A14_59.xml"," DE_pic_2_57Y25A03_59.xml", "DE_pic_3_67Y25A21_112.xml"]
+    OUTPUT_FORMAT = 'norm'         # Output settings - Options: "csv", "norm", "both" (csv + norm) or "parquet"
+    EXCLUDE = ["DE_pic_2_57Y25A14_59.xml","DE_pic_2_57Y25A03_59.xml", "DE_pic_3_67Y25A21_112.xml"]
     MAX_FILES_PER_CORPUS = None    # Processing limits - None = process all files, or set to integer to limit
-    SENTENCIZER_KWARGS = None      # Sentencizer settings (if needed in future)
+    SENTENCIZER_KWARGS = {"batch_size": 1000}  # Passed to nlp.pipe when sentencizing
+    SENTENCE_SPLITTER = "spacy"    # "spacy" = German() + sentencizer, "fast" = pure-Python equivalent (sentence_splitter.py)
+    ALIGN_BAND = 3                 # Sentences off the diagonal searched when src/tgt split into different counts (sentence_aligner.py)
+    FILES_PER_BATCH = 16           # Files whose chunks share one sentencization pass (and one worker task)
+    WORKERS = 1                    # Worker processes for extraction (1 = serial, output is identical either way)
+    XML_ENGINE = "tree"            # "tree" = read + parse whole file, "stream" = incremental parse per unit
+    XML_BACKEND = "auto"           # Parser of the tree engine: "lxml", "etree" (ElementTree) or "auto" = lxml when installed (xml_backend.py)
+    XML_LOADER = "bytes"           # Tree engine input: "bytes" = the parser decodes the raw file, "text" = decoded to str first (errors dropped)
+    MMAP_MIN_BYTES = 16 * 2**20    # "bytes" loader: files at least this big are memory-mapped instead of read into memory
+    PREFETCH_DEPTH = 4             # Files a background thread reads ahead of extraction (file_prefetch.py, 0 = off)
+    USE_CACHE = False              # Load unchanged files from Paths.EXTRACT_CACHE (--cache / --rebuild-cache on the CLI)
+    LOG_LEVEL = "INFO"             # "DEBUG" also logs the presplit chunks of every text
+    # clean_sentence_pairs drop rules: (name, regexes) matched on the lowercased sentences.
+    # A pair is dropped when every regex of a rule matches its src or its tgt; rules are
+    # tried in order and the first one that applies is counted. All regexes are scanned
+    # in one pass per sentence (text_patterns.DropRuleMatcher).
+    DROP_RULES = (
+        ("asterisk", (r"\*",)),    # Censored content
+        ("at_sign", (r"@",)),
+        # Annotator notes: "Fortsetzung der Aufgabe 2 fehlt", "Text nicht beendet", ...
+        ("abort_phrase", (r"fortsetzung der aufgabe 2 fehlt|text nicht beendet"
+                          r"|der text abgebrochen|die aufgabe\s*\d?\s*abgebrochen",)),
+        # Any other "abgebrochen" together with "Text" or "Aufgabe" (in either sentence)
+        ("abgebrochen", (r"abgebrochen", r"text|aufgabe")),
+    )
+    MIN_WORDS = 3                  # Pairs whose src or tgt has fewer words are dropped ("too_few_words")
+    GLOBAL_DEDUP = False           # Drop pairs repeated across files/corpora of a run (dedup_index.py), not only within a file
+    PARQUET_ROW_GROUP = 50_000     # Rows buffered per Parquet row group (bounds the writer's memory)
+    SHARDS = False                 # Each batch of files is written to its own shard by its worker, then merged (shard_output.py)
+    SHARD_DIR = "shards"           # Shard directory inside the output dir
+    REPORT_FILE = "extraction_report.json"  # Stage timings, drop counts and per-file timings, written to the output dir (None = off)
+    PROFILE = False                # --profile: cProfile the run and time sentencization per file (one pass per file)
+    PROFILE_FILE = "extraction.prof"        # cProfile dump (all processes), written to the output dir with --profile
+    PROFILE_TABLE = "file_profile.csv"      # Per-file cost table, ranked by total time, written with --profile
+    PROFILE_TOP = 20               # Slowest files printed at the end of a --profile run
 
 
 # =======================
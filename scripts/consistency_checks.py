@@ -0,0 +1,87 @@
+"""
+Differential checks between interchangeable implementations of the extraction pipeline.
+Each check runs both implementations on the bundled corpora, reports every
+disagreement and exits with status 1 if there is any.
+Usage:
+    python consistency_checks.py splitter [--corpora LEONIDE Kolipsi_2]
+"""
+import sys
+import argparse
+from typing import List
+
+import xml_extraction as xe
+from configs import ExtractionParams
+from corpus_manifest import corpus_manifest
+
+MAX_REPORTED = 20  # Mismatches printed per check
+
+# =======================
+# HELPERS
+# =======================
+def corpus_files(corpora: List[str]) -> List[tuple]:
+    """(corpus_name, xml_path) of every XML file of the given corpora."""
+    files = []
+    for corpus_name in corpora:
+        files.extend((corpus_name, entry.path) for entry in corpus_manifest(corpus_name))
+    return files
+
+def collect_split_texts(corpora: List[str]) -> List[str]:
+    """Every src/tgt text the extractors hand to sentence splitting."""
+    texts = []
+    for corpus_name, path in corpus_files(corpora):
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            xml_content = f.read()
+        try:
+            plan = xe.plan_xml_source(xml_content, corpus_name)
+        except Exception as e:
+            print(f"  [SKIP] {path}: {e}")
+            continue
+        for item in plan:
+            if isinstance(item, xe.SplitJob):
+                texts.extend([item.src, item.tgt])
+    return texts
+
+# =======================
+# SENTENCE SPLITTER
+# =======================
+def split_with(splitter: str, texts: List[str]) -> List[List[str]]:
+    """spacy_sent_batch(texts) with the given ExtractionParams.SENTENCE_SPLITTER."""
+    saved = ExtractionParams.SENTENCE_SPLITTER
+    ExtractionParams.SENTENCE_SPLITTER = splitter
+    try:
+        return xe.spacy_sent_batch(texts)
+    finally:
+        ExtractionParams.SENTENCE_SPLITTER = saved
+
+def check_splitter(corpora: List[str]) -> int:
+    """Compare the spaCy and the fast splitter on every text of the corpora."""
+    texts = collect_split_texts(corpora)
+    expected = split_with("spacy", texts)
+    actual = split_with("fast", texts)
+
+    mismatches = 0
+    for text, exp, act in zip(texts, expected, actual):
+        if exp != act:
+            mismatches += 1
+            if mismatches <= MAX_REPORTED:
+                print(f"  [MISMATCH] {text!r}\n    spacy: {exp}\n    fast:  {act}")
+
+    n_sentences = sum(len(sents) for sents in expected)
+    print(f"splitter: {len(texts)} texts, {n_sentences} sentences, {mismatches} mismatches")
+    return mismatches
+
+# =======================
+# MAIN
+# =======================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Differential checks for the extraction pipeline")
+    parser.add_argument("check", choices=["splitter"], help="Check to run")
+    parser.add_argument("--corpora", nargs="+", default=list(ExtractionParams.CORPORA),
+                        choices=list(ExtractionParams.CORPORA),
+                        help="Corpora to check (default: all bundled corpora)")
+
+    args = parser.parse_args()
+    if args.check == "splitter":
+        failures = check_splitter(args.corpora)
+
+    sys.exit(1 if failures else 0)
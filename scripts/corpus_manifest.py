@@ -0,0 +1,139 @@
+"""
+Persistent per-corpus file manifest.
+Records, for every XML file of a corpus: path, size, mtime, text type and
+whether it is in ExtractionParams.EXCLUDE. Extraction and the checks read
+their file lists from here instead of walking the corpus tree themselves.
+A refresh re-scans the tree with os.scandir and only rebuilds entries whose
+stat (size, mtime) changed; the manifest is rewritten only when something did.
+Usage:
+    python corpus_manifest.py [--corpora LEONIDE Kolipsi_2]
+"""
+import os
+import json
+import argparse
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+from configs import Paths, ExtractionParams
+
+MANIFEST_VERSION = 1  # Bump when the entry layout changes (old manifests are then rebuilt)
+
+@dataclass
+class ManifestEntry:
+    """One XML file of a corpus."""
+    path: str          # As built from base_dir, e.g. ../corpora/LEONIDE/.../DE_op_1_55X31A01_100.xml
+    size: int
+    mtime_ns: int
+    text_type: str     # "picture story", "opinion" or "unknown"
+    excluded: bool     # Name listed in ExtractionParams.EXCLUDE
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path)
+
+def detect_text_type(corpus_name: str, xml_filename: str) -> str:
+    """Text type from the file name (Kolipsi: _1/_2 suffix, LEONIDE: _pic_/_op_)."""
+    if corpus_name in ["Kolipsi_1_L1", "Kolipsi_1_L2", "Kolipsi_2"]:
+        # Kolipsi: _1.xml = picture story, _2.xml = opinion
+        if xml_filename.endswith("_1.xml"):
+            return "picture story"
+        if xml_filename.endswith("_2.xml"):
+            return "opinion"
+        return "unknown"
+    # LEONIDE: "pic" = picture story, "op" = opinion
+    if "_pic_" in xml_filename:
+        return "picture story"
+    if "_op_" in xml_filename:
+        return "opinion"
+    return "unknown"
+
+def scan_xml_files(base_dir: str) -> Dict[str, os.stat_result]:
+    """
+    path -> stat of every XML file below base_dir (hidden and checkpoint
+    dirs skipped, .xml.pretty files ignored, symlinked dirs not followed).
+    """
+    found = {}
+    stack = [base_dir]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != '.ipynb_checkpoints' and not entry.name.startswith('.'):
+                        stack.append(entry.path)
+                elif entry.name.lower().endswith(".xml") and entry.is_file():
+                    found[entry.path] = entry.stat()
+    return found
+
+def manifest_path(corpus_name: str) -> str:
+    return os.path.join(Paths.MANIFESTS, f"{corpus_name}.json")
+
+def _load(path: str, base_dir: str) -> Dict[str, ManifestEntry]:
+    """Entries of a stored manifest by path ({} if missing, stale or unreadable)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION or data.get("base_dir") != base_dir:
+        return {}
+    return {e["path"]: ManifestEntry(**e) for e in data["files"]}
+
+def _save(path: str, base_dir: str, entries: List[ManifestEntry]):
+    """Write the manifest atomically (temp file + rename)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "base_dir": base_dir,
+                   "files": [asdict(e) for e in entries]}, f, ensure_ascii=False, indent=0)
+    os.replace(tmp_path, path)
+
+def corpus_manifest(corpus_name: str, base_dir: Optional[str] = None) -> List[ManifestEntry]:
+    """
+    Refreshed manifest of a corpus, sorted by path.
+    base_dir defaults to the corpus's ExtractionParams.CORPORA entry and must exist.
+    """
+    if base_dir is None:
+        base_dir = ExtractionParams.CORPORA[corpus_name]["base_dir"]
+    path = manifest_path(corpus_name)
+    stored = _load(path, base_dir)
+    exclude = set(ExtractionParams.EXCLUDE)
+
+    entries = []
+    changed = False
+    for file_path, st in scan_xml_files(base_dir).items():
+        entry = stored.get(file_path)
+        if entry is None or entry.size != st.st_size or entry.mtime_ns != st.st_mtime_ns:
+            name = os.path.basename(file_path)
+            entry = ManifestEntry(file_path, st.st_size, st.st_mtime_ns,
+                                  detect_text_type(corpus_name, name), name in exclude)
+            changed = True
+        elif entry.excluded != (entry.name in exclude):
+            entry.excluded = not entry.excluded  # EXCLUDE was edited
+            changed = True
+        entries.append(entry)
+
+    changed = changed or len(entries) != len(stored)
+    entries.sort(key=lambda e: e.path)  # Sorted full paths, for a consistent order
+    if changed:
+        _save(path, base_dir, entries)
+    return entries
+
+# =======================
+# MAIN
+# =======================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh and summarize the corpus manifests")
+    parser.add_argument("--corpora", nargs="+", default=list(ExtractionParams.CORPORA),
+                        choices=list(ExtractionParams.CORPORA),
+                        help="Corpora to refresh (default: all configured corpora)")
+    args = parser.parse_args()
+
+    for corpus_name in args.corpora:
+        entries = corpus_manifest(corpus_name)
+        n_excluded = sum(e.excluded for e in entries)
+        size_mb = sum(e.size for e in entries) / 1e6
+        print(f"{corpus_name:<14} {len(entries):>5} files  {size_mb:>6.1f} MB  {n_excluded} excluded  "
+              f"-> {manifest_path(corpus_name)}")
+        for e in entries:
+            if e.excluded:
+                print(f"    excluded: {e.path}")
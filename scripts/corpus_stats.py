@@ -1,10 +1,15 @@
-import spacy
 import pandas as pd
 from configs import Paths, StatsDisplay
-from IPython.display import display
+from pair_table import load_pairs
+
+# Columns of the extracted pairs used by the overview tables in MAIN EXECUTION
+STATS_COLUMNS = ['corpus', 'xml_file', 'corrected', 'text_type']
+# Columns used by the token statistics
+TOKEN_STATS_COLUMNS = ['corpus', 'src', 'tgt', 'corrected']
 
 # Load spaCy with sentencizer
 def load_spacy(model="de_core_news_sm"):
+    import spacy
     try:
         nlp = spacy.load(model, disable=["tagger", "parser", "ner", "lemmatizer"])
     except:
@@ -13,8 +18,20 @@ def load_spacy(model="de_core_news_sm"):
         nlp.add_pipe("sentencizer")
     return nlp
 
-nlp = load_spacy()
-nlp.max_length = 2_000_000
+# Built on the first get_nlp() call, once per process
+_nlp = None
+
+def get_nlp():
+    global _nlp
+    if _nlp is None:
+        _nlp = load_spacy()
+        _nlp.max_length = 2_000_000
+    return _nlp
+
+def display(obj):
+    """IPython display (rich tables in notebooks), imported on first use."""
+    from IPython.display import display as ipython_display
+    ipython_display(obj)
 
 # Process one corpus file (TXT)
 def process_corpus_spacy(path: str):
@@ -23,6 +40,7 @@ def process_corpus_spacy(path: str):
     if not text:
         return {"n_sentences": 0, "words": 0, "unique_tokens": 0, "avg_words_per_sentence": 0}
     
+    nlp = get_nlp()
     doc = nlp(text)
     sentences = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
     tokens = [tok.text for tok in doc if tok.is_alpha]
@@ -53,6 +71,7 @@ def process_csv_stats_spacy_optimized(df_subset):
     corrected_sentences = corrected_pairs * 2
     uncorrected_sentences = left_as_is * 2
     
+    nlp = get_nlp()
     all_tokens = []
     
     # Process src column row-by-row
@@ -97,12 +116,12 @@ def process_csv_stats_spacy_optimized(df_subset):
         "corrected_sentences_pct": round(corrected_sentences / total_sentences * 100, 2) if total_sentences else 0
     }
 
-def compute_corpus_stats(csv_path=Paths.EXTRACT_CSV):
+def compute_corpus_stats(path=None):
     """
     Compute statistics on corpus data.
     
     Args:
-        csv_path: Path to CSV file
+        path: Parquet or CSV file (default: see pair_table.load_pairs)
     
     Returns:
         DataFrame with statistics
@@ -110,7 +129,7 @@ def compute_corpus_stats(csv_path=Paths.EXTRACT_CSV):
 
     results = []
     try:
-        df_csv = pd.read_csv(csv_path, encoding="utf-8")
+        df_csv = load_pairs(TOKEN_STATS_COLUMNS, path)
         
         # Individual corpora from CSV
         corpus_names = sorted(df_csv['corpus'].unique())
@@ -127,7 +146,7 @@ def compute_corpus_stats(csv_path=Paths.EXTRACT_CSV):
         results.append(all_csv_stats)
 
     except FileNotFoundError:
-        print(f"✗ CSV file not found: {csv_path}")
+        print(f"✗ Extracted pairs not found: {path or Paths.EXTRACT_CSV}")
     
     # Convert to DataFrame
     df_results = pd.DataFrame(results)
@@ -147,21 +166,25 @@ def compute_corpus_stats(csv_path=Paths.EXTRACT_CSV):
     
     return df_results
 
-def compute_corrected_only_stats(csv_path=Paths.EXTRACT_CSV):
+def compute_corrected_only_stats(path=None):
     """
     Compute statistics for corrected pairs only.
     
+    Args:
+        path: Parquet or CSV file (default: see pair_table.load_pairs)
+    
     Returns:
         DataFrame with corrected-only statistics
     """
     try:
-        df_csv_full = pd.read_csv(csv_path, encoding="utf-8")
+        df_csv_full = load_pairs(TOKEN_STATS_COLUMNS, path)
         df_corrected_only = df_csv_full[df_csv_full['corrected'] == True]
         
         if len(df_corrected_only) == 0:
             print("No corrected pairs found in the dataset.")
             return pd.DataFrame()
         
+        nlp = get_nlp()
         corrected_stats = []
         corpus_names = sorted(df_corrected_only['corpus'].unique())
         
@@ -242,7 +265,7 @@ def compute_corrected_only_stats(csv_path=Paths.EXTRACT_CSV):
         return pd.DataFrame(corrected_stats)
         
     except FileNotFoundError:
-        print(f"✗ CSV file not found: {csv_path}")
+        print(f"✗ Extracted pairs not found: {path or Paths.EXTRACT_CSV}")
         return pd.DataFrame()
 
 # MAIN EXECUTION 
@@ -256,7 +279,7 @@ if __name__ == "__main__":
         print("\n" + "="*80)
         print(f"GENERAL OVERVIEW")
         print("="*80)
-        df_stats = compute_corpus_stats(csv_path=Paths.EXTRACT_CSV)
+        df_stats = compute_corpus_stats()
         display(df_stats)
 
     # 2. Sentence Count by Subcorpus
@@ -267,11 +290,11 @@ if __name__ == "__main__":
 
         try:
             if 'df_csv_full' not in locals():
-                df_csv_full = pd.read_csv(Paths.EXTRACT_CSV, encoding="utf-8")
+                df_csv_full = load_pairs(STATS_COLUMNS)
             
             total_sentences = len(df_csv_full)
             
-            sentence_count_by_corpus = df_csv_full.groupby('corpus').size().reset_index(name='sentence_count')
+            sentence_count_by_corpus = df_csv_full.groupby('corpus', observed=True).size().reset_index(name='sentence_count')
             sentence_count_by_corpus['percentage'] = (sentence_count_by_corpus['sentence_count'] / total_sentences * 100).round(2).astype(str) + '%'
             
             # Add total row
@@ -285,7 +308,7 @@ if __name__ == "__main__":
             display(sentence_count_by_corpus)
             
         except FileNotFoundError:
-            print("✗ CSV file not found for sentence count analysis")
+            print("✗ Extracted pairs not found for sentence count analysis")
 
 
     # 3. Correction Breakdown by Subcorpus
@@ -295,10 +318,10 @@ if __name__ == "__main__":
         print("="*80)
         
         try:
-            df_csv_full = pd.read_csv(Paths.EXTRACT_CSV, encoding="utf-8")
+            df_csv_full = load_pairs(STATS_COLUMNS)
             
             print("\n--- By Subcorpus ---")
-            correction_by_corpus = df_csv_full.groupby('corpus')['corrected'].agg([
+            correction_by_corpus = df_csv_full.groupby('corpus', observed=True)['corrected'].agg([
                 ('total_pairs', 'count'),
                 ('corrected_pairs', 'sum'),
                 ('left_as_is', lambda x: (~x).sum()),
@@ -308,13 +331,13 @@ if __name__ == "__main__":
             display(correction_by_corpus)
             
         except FileNotFoundError:
-            print("✗ CSV file not found for correction analysis")
+            print("✗ Extracted pairs not found for correction analysis")
     
     # 4. Overall Correction Summary
     if StatsDisplay.CORRECTION_SUMMARY:
         try:
             if 'df_csv_full' not in locals():
-                df_csv_full = pd.read_csv(Paths.EXTRACT_CSV, encoding="utf-8")
+                df_csv_full = load_pairs(STATS_COLUMNS)
             
             print("\n--- Whole Corpus ---")
             total_pairs = len(df_csv_full)
@@ -338,7 +361,7 @@ if __name__ == "__main__":
             display(overall_stats)
             
         except FileNotFoundError:
-            print("✗ CSV file not found for correction analysis")
+            print("✗ Extracted pairs not found for correction analysis")
         
     # 5. Corrected Pairs Only - Detailed Stats
     if StatsDisplay.CORRECTED_ONLY_STATS:
@@ -346,7 +369,7 @@ if __name__ == "__main__":
         print("CORRECTED PAIRS ONLY - DETAILED STATISTICS")
         print("="*80)
         
-        df_corrected_stats = compute_corrected_only_stats(csv_path=Paths.EXTRACT_CSV)
+        df_corrected_stats = compute_corrected_only_stats()
         if not df_corrected_stats.empty:
             display(df_corrected_stats)
 
@@ -358,14 +381,14 @@ if __name__ == "__main__":
         
         try:
             if 'df_csv_full' not in locals():
-                df_csv_full = pd.read_csv(Paths.EXTRACT_CSV, encoding="utf-8")
+                df_csv_full = load_pairs(STATS_COLUMNS)
             
             total_sentences_overall = len(df_csv_full)
             
             # 5A. Sentence-level breakdown
             if StatsDisplay.TEXT_TYPE_SENTENCE_LEV:
                 print("\n--- Sentence-Level Statistics ---")
-                sentence_level = df_csv_full.groupby('text_type').size().reset_index(name='sentence_count')
+                sentence_level = df_csv_full.groupby('text_type', observed=True).size().reset_index(name='sentence_count')
                 sentence_level['percentage'] = (sentence_level['sentence_count'] / total_sentences_overall * 100).round(2).astype(str) + '%'
                 
                 # Add total row
@@ -382,10 +405,10 @@ if __name__ == "__main__":
             if StatsDisplay.TEXT_TYPE_DOCUMENT_LEV:
                 print("\n--- Document-Level Statistics ---")
                 # Get unique xml_file + text_type combinations
-                unique_docs = df_csv_full.groupby(['xml_file', 'text_type']).size().reset_index(name='sentences_in_doc')
+                unique_docs = df_csv_full.groupby(['xml_file', 'text_type'], observed=True).size().reset_index(name='sentences_in_doc')
                 total_docs = len(unique_docs)
                 
-                doc_level = unique_docs.groupby('text_type').agg({
+                doc_level = unique_docs.groupby('text_type', observed=True).agg({
                     'xml_file': 'count',
                     'sentences_in_doc': ['sum', 'mean']
                 }).reset_index()
@@ -407,16 +430,16 @@ if __name__ == "__main__":
             # 5C. Combined breakdown by corpus and text type
             if StatsDisplay.TEXT_TYPE_COMBINED:
                 print("\n--- By Corpus and Text Type ---")
-                corpus_text_breakdown = df_csv_full.groupby(['corpus', 'text_type']).size().reset_index(name='sentence_count')
+                corpus_text_breakdown = df_csv_full.groupby(['corpus', 'text_type'], observed=True).size().reset_index(name='sentence_count')
                 
                 # Calculate percentages within each corpus
-                corpus_totals = df_csv_full.groupby('corpus').size().reset_index(name='corpus_total')
+                corpus_totals = df_csv_full.groupby('corpus', observed=True).size().reset_index(name='corpus_total')
                 corpus_text_breakdown = corpus_text_breakdown.merge(corpus_totals, on='corpus')
                 corpus_text_breakdown['percentage'] = (corpus_text_breakdown['sentence_count'] / corpus_text_breakdown['corpus_total'] * 100).round(2).astype(str) + '%'
                 corpus_text_breakdown = corpus_text_breakdown[['corpus', 'text_type', 'sentence_count', 'percentage']]
                 
                 # Add WHOLE_CORPUS totals
-                whole_corpus_breakdown = df_csv_full.groupby('text_type').size().reset_index(name='sentence_count')
+                whole_corpus_breakdown = df_csv_full.groupby('text_type', observed=True).size().reset_index(name='sentence_count')
                 whole_corpus_breakdown['corpus'] = 'WHOLE_CORPUS'
                 whole_corpus_breakdown['percentage'] = (whole_corpus_breakdown['sentence_count'] / total_sentences_overall * 100).round(2).astype(str) + '%'
                 whole_corpus_breakdown = whole_corpus_breakdown[['corpus', 'text_type', 'sentence_count', 'percentage']]
@@ -425,6 +448,6 @@ if __name__ == "__main__":
                 display(corpus_text_breakdown)
             
         except FileNotFoundError:
-            print("✗ CSV file not found for text type analysis")
+            print("✗ Extracted pairs not found for text type analysis")
         except KeyError as e:
             print(f"✗ Column not found: {e}. Make sure 'text_type' column exists in CSV.")
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Corpus-wide deduplication of sentence pairs.
+Pairs are identified by a 64-bit fingerprint of the same key clean_sentence_pairs
+uses within a file (lowercased src and tgt). Fingerprints live in an
+open-addressing table backed by array('Q'): 8 bytes per slot, instead of
+two full strings (or a boxed int) per pair.
+"""
+import hashlib
+from array import array
+from typing import Dict, List
+
+class FingerprintSet:
+    """Set of non-zero 64-bit integers in a linear-probing array('Q') table (0 = empty slot)."""
+    MAX_LOAD = 0.5
+
+    def __init__(self, capacity: int = 1 << 16):
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self.table = array('Q', bytes(8 * size))
+        self.mask = size - 1
+        self.count = 0
+
+    def add(self, fp: int) -> bool:
+        """Insert fp; return False if it was already present."""
+        table, mask = self.table, self.mask
+        i = fp & mask
+        while True:
+            slot = table[i]
+            if slot == 0:
+                break
+            if slot == fp:
+                return False
+            i = (i + 1) & mask
+        table[i] = fp
+        self.count += 1
+        if self.count > self.MAX_LOAD * len(table):
+            self._grow()
+        return True
+
+    def _grow(self):
+        old = self.table
+        self.table = array('Q', bytes(16 * len(old)))
+        self.mask = len(self.table) - 1
+        self.count = 0
+        for fp in old:
+            if fp:
+                self.add(fp)
+
+    def nbytes(self) -> int:
+        return self.table.itemsize * len(self.table)
+
+def pair_fingerprint(src: str, tgt: str) -> int:
+    """Non-zero 64-bit fingerprint of the (src.lower(), tgt.lower()) key."""
+    key = f"{src.lower()}\0{tgt.lower()}".encode("utf-8")
+    fp = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+    return fp or 1
+
+class GlobalDeduplicator:
+    """
+    Drops pairs already seen earlier in the run, in any file or corpus.
+    Applied in the parent process to the results in output order, so the
+    kept copies do not depend on the number of workers.
+    """
+    def __init__(self):
+        self.index = FingerprintSet()
+        self.removed: Dict[str, int] = {}  # corpus -> duplicates removed
+
+    def filter(self, corpus_name: str, pairs: List) -> List:
+        kept = [pair for pair in pairs if self.index.add(pair_fingerprint(pair.src, pair.tgt))]
+        self.removed[corpus_name] = self.removed.get(corpus_name, 0) + len(pairs) - len(kept)
+        return kept
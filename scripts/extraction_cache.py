@@ -0,0 +1,54 @@
+"""
+Persistent on-disk cache for XML extraction results.
+Stores the cleaned SentencePair list of each file under a key made of:
+1. SHA-256 of the raw file content
+2. Corpus type (the same file is extracted differently per corpus)
+3. Version stamp of the extraction code and ExtractionParams
+"""
+import os
+import pickle
+import hashlib
+from typing import List, Optional, Tuple
+
+class ExtractionCache:
+    """
+    One pickle file per entry, sharded into subdirectories by key prefix.
+    Entries are written atomically, so several worker processes can share
+    the same cache directory.
+    """
+    def __init__(self, cache_dir: str, version: str, rebuild: bool = False):
+        self.cache_dir = cache_dir
+        self.version = version
+        self.rebuild = rebuild  # If True, never read entries but overwrite them
+
+    def key(self, raw: bytes, corpus_type: str) -> str:
+        """Build the cache key for a file's raw bytes."""
+        h = hashlib.sha256(raw)
+        h.update(b"\0" + corpus_type.encode("utf-8"))
+        h.update(b"\0" + self.version.encode("utf-8"))
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pkl")
+
+    def load(self, key: str) -> Optional[List[Tuple]]:
+        """Return the cached pair tuples, or None on a miss (or when rebuilding)."""
+        if self.rebuild:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, ValueError):
+            # Corrupt entry (e.g. interrupted run) - treat as a miss
+            return None
+
+    def store(self, key: str, pair_tuples: List[Tuple]):
+        """Write an entry atomically (temp file + rename)."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(pair_tuples, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
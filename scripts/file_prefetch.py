@@ -0,0 +1,104 @@
+"""
+Background file reading for the extraction pipeline.
+A reader thread stats and reads the next files of a list while the caller
+extracts the current one, so file I/O (slow on network filesystems)
+overlaps with the CPU work instead of preceding it. Files are handed over
+in list order through a queue of ExtractionParams.PREFETCH_DEPTH entries,
+which bounds how many are held in memory.
+Reported in METRICS (by the consumer thread, when the prefetcher is closed):
+1. prefetch.stall: the consumer waited for a file not read yet (I/O bound)
+2. prefetch.full: the reader waited for a free slot (CPU bound, depth is enough)
+3. prefetch.files counter: files handed over
+"""
+import queue
+import threading
+import time
+from typing import Callable, List, Optional
+
+from instrumentation import METRICS
+
+class FilePrefetcher:
+    """Reads paths in order with read(path) in a thread; get(path) returns each result in turn."""
+    POLL_SECONDS = 0.1  # How often a blocked reader checks whether it was closed
+
+    def __init__(self, paths: List[str], read: Callable, depth: int, release: Optional[Callable] = None):
+        self.paths = list(paths)
+        self.read = read
+        self.release = release  # Called on read results never handed over (e.g. to close a mmap)
+        self.queue = queue.Queue(maxsize=max(1, depth))  # (path, read result, exception)
+        self.closed = threading.Event()
+        self.stalls = [0, 0.0]  # [waits, seconds] of the consumer
+        self.full = [0, 0.0]    # [waits, seconds] of the reader
+        self.handed = 0
+        self.thread = threading.Thread(target=self._run, name="file-prefetch", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        for path in self.paths:
+            if self.closed.is_set():
+                return
+            try:
+                item = (path, self.read(path), None)
+            except Exception as e:  # Raised by get() for this file
+                item = (path, None, e)
+            if not self._put(item):
+                if item[1] is not None and self.release is not None:
+                    self.release(item[1])
+                return
+
+    def _put(self, item) -> bool:
+        """Queue item, waiting while the queue is full; False if closed meanwhile."""
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+        start = time.perf_counter()
+        self.full[0] += 1
+        try:
+            while not self.closed.is_set():
+                try:
+                    self.queue.put(item, timeout=self.POLL_SECONDS)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self.full[1] += time.perf_counter() - start
+
+    def get(self, path: str):
+        """Read result of the next path, which must be path (raises what reading it raised)."""
+        try:
+            expected, raw, error = self.queue.get_nowait()
+        except queue.Empty:
+            start = time.perf_counter()
+            expected, raw, error = self.queue.get()
+            self.stalls[0] += 1
+            self.stalls[1] += time.perf_counter() - start
+        if expected != path:
+            raise RuntimeError(f"Prefetched {expected}, but {path} was requested")
+        self.handed += 1
+        if error is not None:
+            raise error
+        return raw
+
+    def close(self):
+        """Stop the reader, release what it read ahead and add the metrics to METRICS."""
+        self.closed.set()
+        while self.thread.is_alive() or not self.queue.empty():
+            try:
+                _, raw, _ = self.queue.get(timeout=self.POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if raw is not None and self.release is not None:
+                self.release(raw)
+        self.thread.join()
+        METRICS.add_time("prefetch.stall", self.stalls[1], self.stalls[0])
+        METRICS.add_time("prefetch.full", self.full[1], self.full[0])
+        METRICS.count("prefetch.files", self.handed)
+
+    def __enter__(self) -> "FilePrefetcher":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
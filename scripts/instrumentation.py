@@ -0,0 +1,100 @@
+"""
+Timing and counter instrumentation for the XML extraction pipeline.
+Collects per process:
+1. Wall time and call count of each pipeline stage
+2. Named event counters (e.g. pairs dropped per clean_sentence_pairs rule)
+3. With --profile, the cProfile stats of worker processes
+Worker processes send a snapshot back with their results; the parent merges
+it, so the totals of a parallel run cover every process.
+"""
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+class Metrics:
+    """Stage timings (seconds, calls) and counters of one process."""
+    def __init__(self):
+        self.stages: Dict[str, list] = {}  # stage -> [calls, seconds]
+        self.counters: Dict[str, int] = {}
+        self.profiles: List[Dict] = []  # Raw cProfile stats merged from other processes
+
+    def reset(self):
+        self.stages = {}
+        self.counters = {}
+        self.profiles = []
+
+    def add_time(self, stage: str, seconds: float, calls: int = 1):
+        entry = self.stages.get(stage)
+        if entry is None:
+            self.stages[stage] = [calls, seconds]
+        else:
+            entry[0] += calls
+            entry[1] += seconds
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def timed(self, stage: str, calls: int = 1, into: Optional[Dict[str, float]] = None) -> Iterator[None]:
+        """Add the wall time of the with-block to stage (and to into[stage], e.g. per-file timings)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.add_time(stage, seconds, calls)
+            if into is not None:
+                into[stage] = into.get(stage, 0.0) + seconds
+
+    def snapshot(self) -> Dict:
+        """Picklable copy of the collected values."""
+        return {"stages": {k: list(v) for k, v in self.stages.items()},
+                "counters": dict(self.counters)}
+
+    def merge(self, snapshot: Dict):
+        """Add the values of another process's snapshot() (and its cProfile stats, if any)."""
+        for stage, (calls, seconds) in snapshot["stages"].items():
+            self.add_time(stage, seconds, calls)
+        for name, n in snapshot["counters"].items():
+            self.count(name, n)
+        if snapshot.get("profile"):
+            self.profiles.append(snapshot["profile"])
+
+    def report(self) -> Dict:
+        """Stages as {calls, seconds} (sorted by total time) plus the counters."""
+        stages = sorted(self.stages.items(), key=lambda kv: -kv[1][1])
+        return {
+            "stages": {k: {"calls": calls, "seconds": round(seconds, 6)} for k, (calls, seconds) in stages},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+# Metrics of the current process
+METRICS = Metrics()
+
+class _RawStats:
+    """Adapter so pstats.Stats accepts an already collected Profile.stats dict."""
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+def profile_stats(profiler) -> Dict:
+    """Picklable stats of a (disabled) cProfile.Profile, to send back in a snapshot."""
+    profiler.create_stats()
+    return profiler.stats
+
+def write_profile(path: str, profiler, others: List[Dict] = ()):
+    """Dump a cProfile.Profile, merged with the profile_stats() of other processes."""
+    import pstats
+    stats = pstats.Stats(profiler)
+    for other in others:
+        stats.add(_RawStats(other))
+    stats.dump_stats(path)
+
+def write_report(path: str, report: Dict):
+    """Write a report dict as indented JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+        f.write("\n")
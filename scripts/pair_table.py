@@ -0,0 +1,120 @@
+"""
+Columnar (Parquet/Arrow) storage of the extracted sentence pairs.
+Contains:
+1. The column layout shared by the CSV and Parquet outputs
+2. A streaming Parquet writer used by xml_extraction.process_corpora
+3. load_pairs(), which reads only the requested columns
+Low-cardinality columns are dictionary-encoded, so they load as pandas
+categoricals without re-inferring types. pyarrow is only needed for the
+Parquet format and is imported on first use.
+"""
+import os
+from typing import List, Optional, Sequence
+
+from configs import Paths, ExtractionParams
+
+# Column order of all_corpora.csv / all_corpora.parquet
+PAIR_COLUMNS = ['corpus', 'lang_prof', 'xml_file', 'sent_num', 'src', 'tgt', 'corrected', 'text_type']
+# Stored as dictionary<int32, string> (pandas category)
+DICTIONARY_COLUMNS = ('corpus', 'lang_prof', 'xml_file', 'text_type')
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("The parquet format needs pyarrow (pip install pyarrow)") from e
+    return pa, pq
+
+def pair_schema():
+    """Arrow schema of the pair table."""
+    pa, _ = _import_pyarrow()
+    dict_type = pa.dictionary(pa.int32(), pa.string())
+    types = {
+        'sent_num': pa.int32(),
+        'src': pa.string(),
+        'tgt': pa.string(),
+        'corrected': pa.bool_(),
+    }
+    return pa.schema([(name, dict_type if name in DICTIONARY_COLUMNS else types[name])
+                      for name in PAIR_COLUMNS])
+
+class ParquetPairWriter:
+    """
+    Appends pair rows (tuples in PAIR_COLUMNS order) to a Parquet file.
+    Rows are buffered and flushed as one row group every row_group_size
+    rows, so memory stays bounded by the row group.
+    """
+    def __init__(self, path: str, row_group_size: int = ExtractionParams.PARQUET_ROW_GROUP):
+        self.pa, pq = _import_pyarrow()
+        self.schema = pair_schema()
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.row_group_size = row_group_size
+        self.buffer = []
+
+    def write_rows(self, rows: List[tuple]):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        pa = self.pa
+        columns = list(zip(*self.buffer))
+        arrays = []
+        for name, values in zip(PAIR_COLUMNS, columns):
+            if name in DICTIONARY_COLUMNS:
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, type=self.schema.field(name).type))
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+_reported_paths = set()  # Default pair files already announced by load_pairs
+
+def default_pairs_path() -> str:
+    """
+    The more recently written of Paths.EXTRACT_PARQUET and Paths.EXTRACT_CSV,
+    so a stale file of the other format is never preferred (CSV if neither exists).
+    """
+    existing = [p for p in (Paths.EXTRACT_PARQUET, Paths.EXTRACT_CSV) if os.path.exists(p)]
+    if not existing:
+        return Paths.EXTRACT_CSV
+    return max(existing, key=os.path.getmtime)
+
+def load_pairs(columns: Optional[Sequence[str]] = None, path: Optional[str] = None):
+    """
+    Load the extracted pairs as a DataFrame, reading only the given columns.
+
+    path defaults to default_pairs_path(), which is printed the first time
+    it is used. Dictionary columns come back as categoricals with sorted
+    categories, from either format. Raises FileNotFoundError if the file
+    does not exist.
+    """
+    import pandas as pd
+
+    if path is None:
+        path = default_pairs_path()
+        if path not in _reported_paths and os.path.exists(path):
+            _reported_paths.add(path)
+            print(f"Loading extracted pairs from {path}")
+    columns = list(columns) if columns is not None else None
+
+    if path.endswith(".parquet"):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        _, pq = _import_pyarrow()
+        df = pq.read_table(path, columns=columns).to_pandas()
+        # Sorted categories, like read_csv(dtype="category"), so groupby orders as on strings
+        for name in DICTIONARY_COLUMNS:
+            if name in df.columns:
+                df[name] = df[name].cat.set_categories(sorted(df[name].cat.categories))
+        return df
+
+    dtypes = {name: "category" for name in DICTIONARY_COLUMNS}
+    return pd.read_csv(path, encoding="utf-8", usecols=columns, dtype=dtypes)
@@ -0,0 +1,94 @@
+"""
+Length-based sentence alignment (Gale & Church, 1993).
+Used by pair_sentences when the splitter returns a different number of
+src and tgt sentences for a text: the sentences are paired by their
+character lengths, with 1-1, 1-2 and 2-1 beads (one sentence of a side
+matching two merged sentences of the other). The dynamic program only
+visits the cells within `band` sentences of the diagonal from (0, 0) to
+(len(src), len(tgt)), so its cost is linear in the number of sentences.
+"""
+import math
+import sys
+from typing import List, Optional, Sequence, Tuple
+
+RATIO = 1.0     # c: expected tgt characters per src character (same language, corrected)
+VARIANCE = 6.8  # s^2: variance of the length difference per character
+
+# (src sentences, tgt sentences, -log prior) of each bead; Gale & Church's
+# priors (0.89 and 0.089) renormalized without the 1-0, 0-1 and 2-2 beads
+BEADS = tuple((di, dj, -math.log(p / (0.89 + 2 * 0.089)))
+              for di, dj, p in ((1, 1, 0.89), (1, 2, 0.089), (2, 1, 0.089)))
+
+def match_cost(src_len: int, tgt_len: int) -> float:
+    """-log of the probability that texts of these lengths are translations (here: corrections) of each other."""
+    mean = (src_len + tgt_len / RATIO) / 2
+    if mean == 0:
+        return 0.0
+    delta = (tgt_len - src_len * RATIO) / math.sqrt(mean * VARIANCE)
+    # Two-tailed probability of |delta| under the standard normal
+    return -math.log(max(math.erfc(abs(delta) / math.sqrt(2)), sys.float_info.min))
+
+def align_lengths(src_lens: Sequence[int], tgt_lens: Sequence[int], band: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Beads (src sentences, tgt sentences) of the cheapest alignment, in order,
+    or None if no alignment of 1-1, 1-2 and 2-1 beads fits within the band.
+    """
+    m, n = len(src_lens), len(tgt_lens)
+    if not m or not n or m > 2 * n or n > 2 * m:
+        return None
+
+    src_ends = [0]
+    for length in src_lens:
+        src_ends.append(src_ends[-1] + length)
+    tgt_ends = [0]
+    for length in tgt_lens:
+        tgt_ends.append(tgt_ends[-1] + length)
+
+    # Cell (i, j) = first i src and j tgt sentences aligned; it is in the band
+    # if |j - i * n / m| <= band
+    costs = {(0, 0): 0.0}
+    back = {}
+    for i in range(m + 1):
+        lo = max(0, -((band * m - i * n) // m))
+        hi = min(n, (i * n + band * m) // m)
+        for j in range(lo, hi + 1):
+            best = None
+            for di, dj, penalty in BEADS:
+                prev = costs.get((i - di, j - dj))
+                if prev is None:
+                    continue
+                cost = prev + penalty + match_cost(src_ends[i] - src_ends[i - di], tgt_ends[j] - tgt_ends[j - dj])
+                if best is None or cost < best:
+                    best = cost
+                    back[i, j] = (di, dj)
+            if best is not None:
+                costs[i, j] = best
+
+    if (m, n) not in costs:
+        return None
+    beads = []
+    i, j = m, n
+    while i or j:
+        di, dj = back[i, j]
+        beads.append((di, dj))
+        i -= di
+        j -= dj
+    beads.reverse()
+    return beads
+
+def align_sentences(src_sents: List[str], tgt_sents: List[str], band: int) -> Optional[Tuple[List[str], List[str]]]:
+    """
+    src_sents and tgt_sents merged along align_lengths (merged sentences are
+    joined with a space), so they can be paired by index; None if it fails.
+    """
+    beads = align_lengths([len(s) for s in src_sents], [len(s) for s in tgt_sents], band)
+    if beads is None:
+        return None
+    src_out, tgt_out = [], []
+    i = j = 0
+    for di, dj in beads:
+        src_out.append(" ".join(src_sents[i:i + di]))
+        tgt_out.append(" ".join(tgt_sents[j:j + dj]))
+        i += di
+        j += dj
+    return src_out, tgt_out
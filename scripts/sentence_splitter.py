@@ -0,0 +1,431 @@
+"""
+spaCy-free sentence splitter for the extraction pipeline.
+Reproduces the sentence boundaries of German() + sentencizer with
+punct_chars [".", "?", "!"] (the `nlp` object of xml_extraction.py):
+1. Tokenization: whitespace split, prefix/suffix/infix rules, URL matching
+   and tokenizer exceptions of spaCy's German tokenizer
+2. Sentencizer: a sentence starts at the first non-punctuation token
+   after a ".", "?" or "!" token
+Character classes cover the Latin, Greek and Cyrillic letters spaCy knows
+about; agreement with spaCy is checked by `consistency_checks.py splitter`.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+PUNCT_CHARS = {".", "?", "!"}
+
+# =======================
+# CHARACTER CLASSES (as in spacy.lang.char_classes)
+# =======================
+_PUNCT = r"… …… , : ; \! \? ¿ ؟ ¡ \( \) \[ \] \{ \} < > _ # \* & 。 ？ ！ ， 、 ； ： ～ · । ، ۔ ؛ ٪"
+_QUOTES = r"""\' " ” “ ` ‘ ´ ’ ‚ , „ » « 「 」 『 』 （ ） 〔 〕 【 】 《 》 〈 〉 〈 〉  ⟦ ⟧"""
+_CURRENCY = r"\$ £ € ¥ ฿ US\$ C\$ A\$ ₽ ﷼ ₴ ₠ ₡ ₢ ₣ ₤ ₥ ₦ ₧ ₨ ₩ ₪ ₫ € ₭ ₮ ₯ ₰ ₱ ₲ ₳ ₴ ₵ ₶ ₷ ₸ ₹ ₺ ₻ ₼ ₽ ₾ ₿"
+_UNITS = (
+    "km km² km³ m m² m³ dm dm² dm³ cm cm² cm³ mm mm² mm³ ha µm nm yd in ft "
+    "kg g mg µg t lb oz m/s km/h kmh mph hPa Pa mbar mb MB kb KB gb GB tb "
+    "TB T G M K % км км² км³ м м² м³ дм дм² дм³ см см² см³ мм мм² мм³ нм "
+    "кг г мг м/с км/ч кПа Па мбар Кб КБ кб Мб МБ мб Гб ГБ гб Тб ТБ тб"
+    "كم كم² كم³ م م² م³ سم سم² سم³ مم مم² مم³ كم غرام جرام جم كغ ملغ كوب اكواب"
+)
+
+# Scripts without letter case count as both lower and upper case
+_UNCASED = (
+    r"\u1200-\u137F\u0980-\u09FF\u0591-\u05F4\uFB1D-\uFB4F\u0620-\u064A\u066E-\u06D5\u06E5-\u06FF"
+    r"\u0750-\u077F\u08A0-\u08BD\uFB50-\uFBB1\uFBD3-\uFD3D\uFD50-\uFDC7\uFDF0-\uFDFB\uFE70-\uFEFC"
+    r"\U0001EE00-\U0001EEBB\u0D80-\u0DFF\u0900-\u097F\u0C80-\u0CFF\u0B80-\u0BFF\u0C00-\u0C7F"
+    r"\uAC00-\uD7AF\u1100-\u11FF\u3040-\u309F\u30A0-\u30FFー\u4E00-\u9FFF\u3400-\u4DBF"
+    r"\U00020000-\U0002EBEF\u2E80-\u2EFF\u2F00-\u2FDF\u2FF0-\u2FFF\u3000-\u303F\u31C0-\u31EF"
+    r"\u3200-\u32FF\u3300-\u33FF\uF900-\uFAFF\uFE30-\uFE4F\U0001F200-\U0001F2FF\U0002F800-\U0002FA1F"
+)
+
+# Unicode blocks of the cased (Latin, Greek, Cyrillic) letters
+_CASED_BLOCKS = (
+    (0x0041, 0x007A), (0x00C0, 0x02AF), (0x0370, 0x04FF), (0x1D00, 0x1DBF),
+    (0x1E00, 0x1EFF), (0x2C60, 0x2C7F), (0xA720, 0xA7FF), (0xAB30, 0xAB6F), (0xFF21, 0xFF5A),
+)
+# Blocks searched for "Symbol, other" characters (dingbats, emoji, ...)
+_SYMBOL_BLOCKS = ((0x00A0, 0xFFFF), (0x1F000, 0x1FAFF))
+
+def _char_class(chars) -> str:
+    """Regex character-class body for a set of characters, with ranges."""
+    codes = sorted(ord(c) for c in chars)
+    parts = []
+    i = 0
+    while i < len(codes):
+        j = i
+        while j + 1 < len(codes) and codes[j + 1] == codes[j] + 1:
+            j += 1
+        parts.append(re.escape(chr(codes[i])))
+        if j > i:
+            parts.append("-" + re.escape(chr(codes[j])))
+        i = j + 1
+    return "".join(parts)
+
+def _cased_letters(predicate) -> str:
+    return _char_class(chr(c) for lo, hi in _CASED_BLOCKS for c in range(lo, hi + 1)
+                       if chr(c).isalpha() and predicate(chr(c)))
+
+ALPHA_LOWER = _cased_letters(str.islower) + _UNCASED
+ALPHA_UPPER = _cased_letters(str.isupper) + _UNCASED
+ALPHA = _cased_letters(lambda c: True) + _UNCASED
+ICONS = _char_class(chr(c) for lo, hi in _SYMBOL_BLOCKS for c in range(lo, hi + 1)
+                    if unicodedata.category(chr(c)) == "So")
+
+CONCAT_QUOTES = _QUOTES.replace(" ", "")
+PUNCT = _PUNCT.replace(" ", "|")
+CURRENCY = _CURRENCY.replace(" ", "|")
+UNITS = _UNITS.replace(" ", "|")
+
+LIST_PUNCT = _PUNCT.split(" ")
+LIST_QUOTES = _QUOTES.split(" ")
+LIST_CURRENCY = _CURRENCY.split(" ")
+LIST_ELLIPSES = [r"\.\.+", "…"]
+LIST_ICONS = [f"[{ICONS}]"]
+
+# =======================
+# AFFIX RULES (as in spacy.lang.de.punctuation)
+# =======================
+PREFIXES = (
+    ["``", "§", "%", "=", "—", "–", r"\+(?![0-9])"]
+    + LIST_PUNCT + LIST_ELLIPSES + LIST_QUOTES + LIST_CURRENCY + LIST_ICONS
+)
+
+SUFFIXES = (
+    ["''", "/"]
+    + LIST_PUNCT + LIST_ELLIPSES + LIST_QUOTES + LIST_ICONS
+    + [
+        r"(?<=[0-9])\+",
+        r"(?<=°[FfCcKk])\.",
+        rf"(?<=[0-9])(?:{CURRENCY})",
+        rf"(?<=[0-9])(?:{UNITS})",
+        rf"(?<=[{ALPHA_LOWER}%²\-\+{PUNCT}(?:{CONCAT_QUOTES})])\.",
+        rf"(?<=[{ALPHA_UPPER}][{ALPHA_UPPER}])\.",
+    ]
+)
+
+_INFIX_QUOTES = CONCAT_QUOTES.replace("'", "")
+INFIXES = (
+    LIST_ELLIPSES + LIST_ICONS
+    + [
+        rf"(?<=[{ALPHA_LOWER}])\.(?=[{ALPHA_UPPER}])",
+        rf"(?<=[{ALPHA}])[,!?](?=[{ALPHA}])",
+        rf"(?<=[{ALPHA}])[:<>=](?=[{ALPHA}])",
+        rf"(?<=[{ALPHA}]),(?=[{ALPHA}])",
+        rf"(?<=[0-9{ALPHA}])\/(?=[0-9{ALPHA}])",
+        rf"(?<=[{ALPHA}])([{_INFIX_QUOTES}\)\]\(\[])(?=[{ALPHA}])",
+        rf"(?<=[{ALPHA}])--(?=[{ALPHA}])",
+        r"(?<=[0-9])-(?=[0-9])",
+    ]
+)
+
+prefix_search = re.compile("|".join("^" + p for p in PREFIXES if p.strip())).search
+suffix_search = re.compile("|".join(p + "$" for p in SUFFIXES if p.strip())).search
+infix_finditer = re.compile("|".join(p for p in INFIXES if p.strip())).finditer
+
+# URL pattern of spacy.lang.tokenizer_exceptions (URL_MATCH)
+url_match = re.compile(
+    r"(?u)^"
+    r"(?:(?:[\w\+\-\.]{2,})://)?"
+    r"(?:\S+(?::\S*)?@)?"
+    r"(?:"
+    r"(?!(?:10|127)(?:\.\d{1,3}){3})"
+    r"(?!(?:169\.254|192\.168)(?:\.\d{1,3}){2})"
+    r"(?!172\.(?:1[6-9]|2\d|3[0-1])(?:\.\d{1,3}){2})"
+    r"(?:[1-9]\d?|1\d\d|2[01]\d|22[0-3])"
+    r"(?:\.(?:1?\d{1,2}|2[0-4]\d|25[0-5])){2}"
+    r"(?:\.(?:[1-9]\d?|1\d\d|2[0-4]\d|25[0-4]))"
+    r"|"
+    r"(?:(?:[A-Za-z0-9\u00a1-\uffff][A-Za-z0-9\u00a1-\uffff_-]{0,62})?[A-Za-z0-9\u00a1-\uffff]\.)+"
+    rf"(?:[{ALPHA_LOWER}]{{2,63}})"
+    r")"
+    r"(?::\d{2,5})?"
+    r"(?:[/?#]\S*)?"
+    r"$"
+).match
+
+# =======================
+# TOKENIZER EXCEPTIONS
+# =======================
+# Tokenizer exceptions of spaCy's German tokenizer (spacy.lang.de.tokenizer_exceptions
+# plus the base exceptions). Whitespace entries are left out: whitespace runs are
+# always single tokens anyway.
+ABBREVIATIONS = """
+A.C. A.D. A.G. Abb. Abk. Abs. Abt. Apr. Aug. B.A. B.Sc. Bd. Betr. Bf. Bhf. Biol. Bsp.
+Chr. Cie. Co. D.C. Dez. Di. Dipl. Dipl.-Ing. Do. Dr. Fa. Fam. Feb. Fr. Frl. G.m.b.H.
+Gebr. Hbf. Hg. Hr. Hrn. Hrsg. I. II. III. IV. Inc. Ing. Jan. Jh. Jhd. Jr. Jul. Jun. K.O.
+L.A. M.A. M.Sc. Mi. Mio. Mo. Mr. Mrd. Mrz. MwSt. Mär. N.Y. N.Y.C. Nov. Nr. O.K. Okt.
+Orig. P.S. Pkt. Prof. R.I.P. Red. Sa. Sep. Sept. So. St. Std. Str. Tel. Tsd. U.S. U.S.A.
+U.S.S. Univ. Vol. a. a.D. a.M. a.Z. abzgl. adv. al. allg. b. betr. biol. bspw. bzgl.
+bzw. c. ca. co. d. d.h. dgl. e. e.V. e.g. ebd. ehem. eigtl. engl. entspr. erm. etc. ev.
+evtl. f. frz. g. geb. gegr. gem. ggf. ggfs. ggü. h. h.c. hrsg. i. i.A. i.G. i.O. i.Tr.
+i.V. i.d.R. i.e. incl. inkl. insb. j. jr. jun. jur. k. kath. l. lat. lt. m. m.E. m.M.
+max. min. mind. mtl. n. n.Chr. nat. o. o.a. o.g. o.k. o.ä. orig. p. p.a. p.s. pers.
+phil. q. q.e.d. r. rer. röm. s. s.o. sen. sog. std. stellv. t. tägl. u. u.U. u.a. u.s.w.
+u.v.m. usf. usw. uvm. v. v.Chr. v.a. v.l.n.r. vgl. vllt. vlt. vs. w. wiss. x. y. z. z.B.
+z.Bsp. z.T. z.Z. z.Zt. z.b. zzgl. ä. ö. österr. ü.
+""".split()
+
+EMOTICONS_AND_OTHERS = (
+    "'", "''", "'S", "'n", "'ne", "'nem", "'nen", "'s", '(*_*)', '(-8', '(-:', '(-;',
+    '(-_-)', '(._.)', '(:', '(;', '(=', '(>_<)', '(^_^)', '(o:', '(¬_¬)', '(ಠ_ಠ)',
+    '(╯°□°）╯︵┻━┻', ')-:', '):', '-_-', '-__-', '._.', '0.0', '0.o', '0_0', '0_o', '8)',
+    '8-)', '8-D', '8D', ":'(", ":')", ":'-(", ":'-)", ':(', ':((', ':(((', ':()', ':)',
+    ':))', ':)))', ':*', ':-(', ':-((', ':-(((', ':-)', ':-))', ':-)))', ':-*', ':-/',
+    ':-0', ':-3', ':->', ':-D', ':-O', ':-P', ':-X', ':-]', ':-o', ':-p', ':-x', ':-|',
+    ':-}', ':/', ':0', ':1', ':3', ':>', ':D', ':O', ':P', ':X', ':]', ':o', ':o)',
+    ':p', ':x', ':|', ':}', ':’(', ':’)', ':’-(', ':’-)', ';)', ';-)', ';-D', ';D',
+    ';_;', '<.<', '</3', '<3', '<33', '<333', '<space>', '=(', '=)', '=/', '=3', '=D',
+    '=[', '=]', '=|', '>.<', '>.>', '>:(', '>:o', '><(((*>', '@_@', 'C++', 'CDU/CSU',
+    "L'", 'L’', 'O.O', 'O.o', 'O_O', 'O_o', "S'", 'S’', 'V.V', 'V_V', 'XD', 'XDD',
+    '[-:', '[:', '[=', '\\")', '\\n', '\\t', ']=', '^_^', '^__^', '^___^', '``', 'c/o',
+    "d'", 'd’', 'o.0', 'o.O', 'o.o', 'o_0', 'o_O', 'o_o', "s'", 's’', 'v.v', 'v_v',
+    'xD', 'xDD', '¯\\(ツ)/¯', 'ಠ_ಠ', 'ಠ︵ಠ', '—', '’', '’S', '’n', '’ne', '’nem', '’nen',
+    '’s', '’’',
+)
+
+# Exceptions that produce more than one token
+MULTI_TOKEN_EXCEPTIONS = {
+    "auf'm": ('auf', "'m"),
+    'auf’m': ('auf', '’m'),
+    "du's": ('du', "'s"),
+    'du’s': ('du', '’s'),
+    "er's": ('er', "'s"),
+    'er’s': ('er', '’s'),
+    "hinter'm": ('hinter', "'m"),
+    'hinter’m': ('hinter', '’m'),
+    "ich's": ('ich', "'s"),
+    'ich’s': ('ich', '’s'),
+    "ihr's": ('ihr', "'s"),
+    'ihr’s': ('ihr', '’s'),
+    "sie's": ('sie', "'s"),
+    'sie’s': ('sie', '’s'),
+    "unter'm": ('unter', "'m"),
+    'unter’m': ('unter', '’m'),
+    "vor'm": ('vor', "'m"),
+    'vor’m': ('vor', '’m'),
+    "wir's": ('wir', "'s"),
+    'wir’s': ('wir', '’s'),
+    '°C.': ('°', 'C', '.'),
+    '°F.': ('°', 'F', '.'),
+    '°K.': ('°', 'K', '.'),
+    '°c.': ('°', 'c', '.'),
+    '°f.': ('°', 'f', '.'),
+    '°k.': ('°', 'k', '.'),
+    "über'm": ('über', "'m"),
+    'über’m': ('über', '’m'),
+}
+
+SPECIAL_CASES: Dict[str, Tuple[str, ...]] = {s: (s,) for s in ABBREVIATIONS + list(EMOTICONS_AND_OTHERS)}
+SPECIAL_CASES.update(MULTI_TOKEN_EXCEPTIONS)
+
+# =======================
+# TOKENIZER
+# =======================
+def _find_prefix(string: str) -> int:
+    match = prefix_search(string)
+    return match.end() - match.start() if match else 0
+
+def _find_suffix(string: str) -> int:
+    match = suffix_search(string)
+    return match.end() - match.start() if match else 0
+
+def _split_affixes(string: str, specials: Dict) -> Tuple[List[str], str, List[str]]:
+    """Strip prefixes and suffixes until the rest is empty, stable or a special case."""
+    prefixes, suffixes = [], []
+    last_size = 0
+    while string and len(string) != last_size:
+        if string in specials:
+            break
+        last_size = len(string)
+        pre_len = _find_prefix(string)
+        if pre_len:
+            prefix, minus_pre = string[:pre_len], string[pre_len:]
+            if minus_pre in specials:
+                prefixes.append(prefix)
+                string = minus_pre
+                break
+        suf_len = _find_suffix(string[pre_len:])
+        if suf_len:
+            suffix, minus_suf = string[-suf_len:], string[:-suf_len]
+            if minus_suf in specials:
+                suffixes.append(suffix)
+                string = minus_suf
+                break
+        if pre_len and suf_len and pre_len + suf_len <= len(string):
+            prefixes.append(prefix)
+            suffixes.append(suffix)
+            string = string[pre_len:-suf_len]
+        elif pre_len:
+            prefixes.append(prefix)
+            string = minus_pre
+        elif suf_len:
+            suffixes.append(suffix)
+            string = minus_suf
+    return prefixes, string, suffixes
+
+def _split_infixes(string: str) -> List[str]:
+    tokens = []
+    start = 0
+    for match in infix_finditer(string):
+        if match.start() == 0:
+            continue
+        if match.start() != start:
+            tokens.append(string[start:match.start()])
+        if match.start() != match.end():
+            tokens.append(match.group())
+        start = match.end()
+    if string[start:]:
+        tokens.append(string[start:])
+    return tokens
+
+def _tokenize_span(span: str, specials: Dict) -> Tuple[str, ...]:
+    """Tokens of one whitespace-free span (the tokens concatenate back to the span)."""
+    prefixes, core, suffixes = _split_affixes(span, specials)
+    tokens = prefixes
+    if core:
+        if core in specials:
+            tokens.extend(specials[core])
+        elif url_match(core):
+            tokens.append(core)
+        else:
+            tokens.extend(_split_infixes(core))
+    tokens.extend(reversed(suffixes))
+    return tuple(tokens)
+
+# Special cases that affix splitting can miss (they contain affixes themselves),
+# matched again on the token sequence like spaCy's special-case matcher. A match
+# must cover exactly the special's text, so it never crosses whitespace and can
+# be applied span by span.
+_SPECIAL_SEQUENCES: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {}
+for _special in SPECIAL_CASES:
+    if _find_prefix(_special) or _find_suffix(_special) or any(infix_finditer(_special)):
+        _sequence = _tokenize_span(_special, {})
+        _SPECIAL_SEQUENCES.setdefault(_sequence[0], []).append((_sequence, _special))
+
+def _apply_special_sequences(span: str, tokens: Tuple[str, ...]) -> Tuple[str, ...]:
+    offsets = [0]
+    for orth in tokens:
+        offsets.append(offsets[-1] + len(orth))
+
+    matches = []
+    for i, orth in enumerate(tokens):
+        for sequence, special in _SPECIAL_SEQUENCES.get(orth, ()):
+            end = i + len(sequence)
+            if tokens[i:end] == sequence:
+                matches.append((i, end, special))
+    if not matches:
+        return tokens
+
+    # Longest first, then leftmost; skip matches overlapping an accepted one
+    matches.sort(key=lambda m: (m[0] - m[1], m[0]))
+    seen = set()
+    accepted = {}
+    for start, end, special in matches:
+        if start not in seen and end - 1 not in seen:
+            accepted[start] = (end, special)
+        seen.update(range(start, end))
+
+    out = []
+    i = 0
+    while i < len(tokens):
+        if i in accepted and span[offsets[i]:offsets[accepted[i][0]]] == accepted[i][1]:
+            end, special = accepted[i]
+            out.extend(SPECIAL_CASES[special])
+            i = end
+        else:
+            out.append(tokens[i])
+            i += 1
+    return tuple(out)
+
+@lru_cache(maxsize=100000)
+def tokenize_span(span: str) -> Tuple[str, ...]:
+    """Tokens of one whitespace-free span (they concatenate back to the span)."""
+    return _apply_special_sequences(span, _tokenize_span(span, SPECIAL_CASES))
+
+_SPAN_RE = re.compile(r"\S+|\s+")
+
+def tokenize(text: str) -> List[Tuple[int, str]]:
+    """(offset, text) of every token, like the tokens of German()(text)."""
+    tokens = []
+    for match in _SPAN_RE.finditer(text):
+        idx, span = match.start(), match.group()
+        if span[0].isspace():
+            # A single space after a token belongs to that token
+            if idx > 0 and span[0] == " ":
+                idx, span = idx + 1, span[1:]
+            if span:
+                tokens.append((idx, span))
+            continue
+        for orth in tokenize_span(span):
+            tokens.append((idx, orth))
+            idx += len(orth)
+    return tokens
+
+# =======================
+# SENTENCIZER
+# =======================
+_NON_SPACE_RE = re.compile(r"\S+")
+_TERMINAL_SPAN_RE = re.compile(r"(?<!\S)\S*[.?!]\S*")
+
+@lru_cache(maxsize=10000)
+def is_punct(token: str) -> bool:
+    """spaCy's is_punct: every character is Unicode punctuation."""
+    return all(unicodedata.category(c).startswith("P") for c in token)
+
+@lru_cache(maxsize=100000)
+def _span_boundaries(span: str, seen_period: bool) -> Tuple[Tuple[int, ...], bool]:
+    """Sentencizer run over one span: sentence-start offsets in it and the final state."""
+    offsets = []
+    idx = 0
+    for orth in tokenize_span(span):
+        is_in_punct_chars = orth in PUNCT_CHARS
+        if seen_period and not is_in_punct_chars and not is_punct(orth):
+            offsets.append(idx)
+            seen_period = False
+        elif is_in_punct_chars:
+            seen_period = True
+        idx += len(orth)
+    return tuple(offsets), seen_period
+
+def sentence_starts(text: str) -> List[int]:
+    """
+    Character offsets where the sentencizer starts a sentence.
+    Only spans containing ".", "?" or "!" and the tokens right after them
+    can move a boundary, so everything else is skipped with a regex search.
+    """
+    starts = [0]
+    seen_period = False
+    pos = 0
+    while True:
+        if not seen_period:
+            match = _TERMINAL_SPAN_RE.search(text, pos)
+            if not match:
+                break
+        else:
+            match = _NON_SPACE_RE.search(text, pos)
+            gap = text[pos:match.start() if match else len(text)]
+            if gap and gap != " ":
+                # Whitespace token (not punctuation) right after the period
+                starts.append(pos + 1 if gap[0] == " " else pos)
+                seen_period = False
+            if not match:
+                break
+        offsets, seen_period = _span_boundaries(match.group(), seen_period)
+        starts.extend(match.start() + offset for offset in offsets)
+        pos = match.end()
+    return starts
+
+def split_sentences(text: str) -> List[str]:
+    """Sentence texts of `text`, as [s.text for s in nlp(text).sents]."""
+    if not text:
+        return []
+    starts = sentence_starts(text) + [len(text)]
+    return [text[start:end].rstrip() for start, end in zip(starts, starts[1:])]
+
+def clear_caches():
+    """Empty the per-span caches, so the next texts are split cold (used by the benchmarks)."""
+    tokenize_span.cache_clear()
+    is_punct.cache_clear()
+    _span_boundaries.cache_clear()
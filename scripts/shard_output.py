@@ -0,0 +1,124 @@
+"""
+Sharded extraction output and its merge.
+With shards, every batch of files is written by the process that extracted
+it to its own shard files, so no file handle or lock is shared:
+    {shard_dir}/{corpus}/{batch:05d}.csv    CSV rows, no header
+    {shard_dir}/{corpus}/{batch:05d}.norm   NORM blocks
+Batches are consecutive slices of the corpus's sorted file list, so
+concatenating the shards in corpus and batch order gives exactly the
+all_corpora.csv / {corpus}_full.norm of an unsharded run. The shard
+manifest ({shard_dir}/manifest.json) records that order; merge_shards
+streams the shards into the final files without loading them.
+Usage:
+    python shard_output.py [--shard-dir ../output/extraction/shards] [--output-dir ../output/extraction]
+"""
+import io
+import os
+import csv
+import json
+import shutil
+import argparse
+from typing import Dict, List, Optional
+
+from configs import Paths, ExtractionParams
+from pair_table import PAIR_COLUMNS
+
+SHARD_MANIFEST = "manifest.json"
+SHARD_FORMATS = ("csv", "norm", "both")  # Output formats that can be sharded
+MANIFEST_VERSION = 1
+
+def shard_names(corpus_name: str, index: int, output_format: str) -> Dict[str, Optional[str]]:
+    """Shard file names (relative to the shard dir) of one batch; None for formats not written."""
+    stem = f"{corpus_name}/{index:05d}"
+    return {
+        "csv": f"{stem}.csv" if output_format in ["csv", "both"] else None,
+        "norm": f"{stem}.norm" if output_format in ["norm", "both"] else None,
+    }
+
+def reset_shard_dir(shard_dir: str):
+    """Remove the shards and manifest of an earlier run."""
+    if os.path.isdir(shard_dir):
+        shutil.rmtree(shard_dir)
+    os.makedirs(shard_dir)
+
+def write_shard_manifest(shard_dir: str, output_format: str, corpora: Dict[str, List[Dict]]):
+    """
+    Record the shards of a run. corpora maps each corpus (in run order) to
+    its shard records ({"index", "files", "rows", "csv", "norm"}).
+    """
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "format": output_format,
+        "corpora": [
+            {"name": corpus_name, "shards": sorted(shards, key=lambda s: s["index"])}
+            for corpus_name, shards in corpora.items()
+        ],
+    }
+    with open(os.path.join(shard_dir, SHARD_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+def load_shard_manifest(shard_dir: str) -> Dict:
+    path = os.path.join(shard_dir, SHARD_MANIFEST)
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"{path}: unsupported shard manifest version {manifest.get('version')}")
+    return manifest
+
+def _concat(shard_dir: str, names: List[str], out_path: str, header: Optional[List[str]] = None):
+    """Stream the shard files into out_path (written atomically: temp file + rename)."""
+    missing = [name for name in names if not os.path.exists(os.path.join(shard_dir, name))]
+    if missing:
+        raise FileNotFoundError(f"{len(missing)} shard(s) missing in {shard_dir}, e.g. {missing[0]}")
+
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as out:
+        if header is not None:
+            # Same header line as StreamingOutput's csv.writer
+            line = io.StringIO()
+            csv.writer(line, lineterminator="\n").writerow(header)
+            out.write(line.getvalue().encode("utf-8"))
+        for name in names:
+            with open(os.path.join(shard_dir, name), "rb") as f:
+                shutil.copyfileobj(f, out)
+    os.replace(tmp_path, out_path)
+
+def merge_shards(shard_dir: str, output_dir: str) -> Dict[str, int]:
+    """
+    Merge the shards listed in the shard manifest into all_corpora.csv and
+    {corpus}_full.norm in output_dir. Returns the rows per corpus.
+    """
+    manifest = load_shard_manifest(shard_dir)
+    output_format = manifest["format"]
+    os.makedirs(output_dir, exist_ok=True)
+
+    rows = {}
+    csv_names = []
+    for corpus in manifest["corpora"]:
+        shards = corpus["shards"]
+        rows[corpus["name"]] = sum(shard["rows"] for shard in shards)
+        csv_names.extend(shard["csv"] for shard in shards)
+        if output_format in ["norm", "both"]:
+            norm_path = os.path.join(output_dir, f"{corpus['name']}_full.norm")
+            _concat(shard_dir, [shard["norm"] for shard in shards], norm_path)
+            print(f"  Wrote {rows[corpus['name']]} pairs to {norm_path}")
+
+    if output_format in ["csv", "both"]:
+        csv_path = os.path.join(output_dir, "all_corpora.csv")
+        _concat(shard_dir, csv_names, csv_path, header=PAIR_COLUMNS)
+        print(f"  Wrote {sum(rows.values())} rows to {csv_path}")
+    return rows
+
+# =======================
+# MAIN
+# =======================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge the shards of a sharded extraction run")
+    parser.add_argument("--shard-dir", default=os.path.join(Paths.EXTRACT_OUT, ExtractionParams.SHARD_DIR),
+                        help="Directory with the shards and their manifest")
+    parser.add_argument("--output-dir", default=Paths.EXTRACT_OUT, help="Where the merged files are written")
+    args = parser.parse_args()
+
+    print(f"=== Merging shards from {args.shard_dir} ===")
+    merge_shards(args.shard_dir, args.output_dir)
@@ -0,0 +1,252 @@
+"""
+Stage-level benchmark suite for extraction and stats.
+Times each stage separately on the bundled corpora and on scaled-up
+synthetic copies of them, appends the results to a JSON-lines history
+file and compares them against a stored baseline.
+Stages:
+    parse           fromstring of the configured XML backend on the documents
+    spaces          record_spaces (meaningful spaces between tags) on the parsed trees
+    extract         plan_from_root (extract_leonide / extract_kolipsi walks)
+    spacy_sent      resolve_plans (presplit + sentencizer + pairing)
+    clean           clean_sentence_pairs per document
+    write_norm      write_norm_pairs
+    write_csv       csv rows of all_corpora.csv
+    stats           corpus_stats.process_csv_stats_spacy_optimized
+A copy at scale N is the document set repeated N times, processed copy by
+copy (memory stays at one copy); the fast splitter's span caches are
+cleared before each copy, so every copy costs what new text would.
+Usage:
+    python stage_benchmarks.py [--scales 1 10 100] [--corpora LEONIDE Kolipsi_2]
+    python stage_benchmarks.py --save-baseline
+"""
+import os
+import io
+import csv
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+import xml_extraction as xe
+import sentence_splitter
+from configs import ExtractionParams, Paths
+from xml_backend import BACKENDS, get_backend
+from consistency_checks import corpus_files
+from benchmarks import print_table
+
+STAGES = ["parse", "spaces", "extract", "spacy_sent", "clean", "write_norm", "write_csv", "stats"]
+DEFAULT_TOLERANCE = 0.25  # A stage is SLOWER when it takes more than (1 + tolerance) x its baseline
+
+# =======================
+# INPUT
+# =======================
+def load_documents(corpora: List[str]) -> List[Tuple[str, str]]:
+    """(corpus_type, xml_content) of every bundled file, decoded as process_file_batch does."""
+    docs = []
+    for corpus_name, path in corpus_files(corpora):
+        with open(path, "rb") as f:
+            docs.append((corpus_name, xe.decode_xml(f.read())))
+    return docs
+
+# =======================
+# STAGES
+# =======================
+class StageTimer:
+    """Sums wall time and item counts per stage."""
+    def __init__(self):
+        self.seconds = {stage: 0.0 for stage in STAGES}
+        self.items = {stage: 0 for stage in STAGES}
+
+    def run(self, stage: str, fn, items: int):
+        start = time.perf_counter()
+        result = fn()
+        self.seconds[stage] += time.perf_counter() - start
+        self.items[stage] += items
+        return result
+
+def run_copy(docs: List[Tuple[str, str]], timer: StageTimer, norm_fh, csv_writer):
+    """Push one copy of the documents through every stage, one stage at a time."""
+    import pandas as pd
+    from corpus_stats import process_csv_stats_spacy_optimized
+
+    sentence_splitter.clear_caches()
+    backend = get_backend()
+    def parse_all():
+        roots = []
+        for corpus_type, xml_content in docs:
+            try:
+                roots.append((corpus_type, backend.fromstring(xml_content)))
+            except backend.ParseError:
+                pass
+        return roots
+    roots = timer.run("parse", parse_all, len(docs))
+    spaces = timer.run("spaces", lambda: [xe.record_spaces(root) for _, root in roots], len(roots))
+
+    plans = timer.run("extract", lambda: [xe.plan_from_root(root, ct, sp, backend)
+                                          for (ct, root), sp in zip(roots, spaces)], len(roots))
+    names = [ct for ct, _ in roots]
+    del roots, spaces
+
+    n_jobs = sum(isinstance(item, xe.SplitJob) for plan in plans for item in plan)
+    resolved = timer.run("spacy_sent", lambda: xe.resolve_plans(plans), n_jobs)
+    del plans
+
+    n_raw = sum(len(pairs) for pairs in resolved)
+    cleaned = timer.run("clean", lambda: [xe.clean_sentence_pairs(pairs) for pairs in resolved], n_raw)
+    del resolved
+
+    n_pairs = sum(len(pairs) for pairs in cleaned)
+    timer.run("write_norm", lambda: [xe.write_norm_pairs(norm_fh, pairs) for pairs in cleaned], n_pairs)
+
+    rows = [
+        (corpus_type, "", "", sent_num, pair.src, pair.tgt, pair.has_correction, "")
+        for corpus_type, pairs in zip(names, cleaned)
+        for sent_num, pair in enumerate(pairs, start=1)
+    ]
+    timer.run("write_csv", lambda: csv_writer.writerows(rows), len(rows))
+
+    df = pd.DataFrame(rows, columns=xe.PAIR_COLUMNS)
+    timer.run("stats", lambda: process_csv_stats_spacy_optimized(df), len(df))
+
+def run_scale(docs: List[Tuple[str, str]], scale: int, repeat: int) -> Dict[str, Dict]:
+    """Best-of-repeat stage totals over `scale` copies of the documents."""
+    best = None
+    for _ in range(repeat):
+        timer = StageTimer()
+        # Writers go to in-memory sinks that are emptied per copy, so only formatting is timed
+        norm_fh = io.StringIO()
+        csv_fh = io.StringIO()
+        csv_writer = csv.writer(csv_fh, lineterminator="\n")
+        for _ in range(scale):
+            run_copy(docs, timer, norm_fh, csv_writer)
+            for fh in (norm_fh, csv_fh):
+                fh.seek(0)
+                fh.truncate()
+        if best is None:
+            best = timer
+        else:
+            for stage in STAGES:
+                best.seconds[stage] = min(best.seconds[stage], timer.seconds[stage])
+    return {stage: {"seconds": round(best.seconds[stage], 6), "items": best.items[stage]} for stage in STAGES}
+
+# =======================
+# HISTORY AND BASELINE
+# =======================
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def baseline_key(record: Dict) -> str:
+    """Results are only compared between runs with the same splitter, XML backend, corpora and scale."""
+    backend = record.get("xml_backend", "etree")  # Records older than the backends were all etree
+    return f"{record['splitter']}|{backend}|{','.join(record['corpora'])}|x{record['scale']}"
+
+def load_baseline(path: str) -> Dict[str, Dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def append_history(path: str, records: List[Dict]):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def save_baseline(path: str, records: List[Dict]):
+    baseline = load_baseline(path)
+    for record in records:
+        baseline[baseline_key(record)] = record
+    write_baseline(path, baseline)
+
+def write_baseline(path: str, baseline: Dict[str, Dict]):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+def compare(records: List[Dict], baseline: Dict[str, Dict], tolerance: float) -> int:
+    """Print every stage against the baseline; return the number of stages over tolerance."""
+    rows = []
+    slower = 0
+    for record in records:
+        base = baseline.get(baseline_key(record), {}).get("stages", {})
+        for stage in STAGES:
+            current = record["stages"][stage]
+            row = [f"x{record['scale']}", stage, current["items"], f"{current['seconds'] * 1000:.1f}"]
+            if stage in base and base[stage]["seconds"] > 0:
+                ratio = current["seconds"] / base[stage]["seconds"]
+                status = "SLOWER" if ratio > 1 + tolerance else "faster" if ratio < 1 - tolerance else "ok"
+                slower += status == "SLOWER"
+                row += [f"{base[stage]['seconds'] * 1000:.1f}", f"{ratio:.2f}x", status]
+            else:
+                row += ["-", "-", "no baseline"]
+            rows.append(row)
+    print_table(["scale", "stage", "items", "ms", "baseline ms", "ratio", "status"], rows)
+    return slower
+
+# =======================
+# MAIN
+# =======================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stage-level benchmarks of extraction and stats")
+    parser.add_argument("--corpora", nargs="+", default=list(ExtractionParams.CORPORA),
+                        choices=list(ExtractionParams.CORPORA),
+                        help="Corpora to benchmark (default: all bundled corpora)")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10],
+                        help="Synthetic copies of the corpora per run (e.g. 1 10 100)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs at x1 (best is kept); scaled runs are timed once")
+    parser.add_argument("--splitter", default=ExtractionParams.SENTENCE_SPLITTER, choices=["spacy", "fast"],
+                        help="Sentence splitter for the spacy_sent stage")
+    parser.add_argument("--xml-backend", default=ExtractionParams.XML_BACKEND, choices=list(BACKENDS),
+                        help="XML backend for the parse and extract stages")
+    parser.add_argument("--history", default=Paths.BENCH_HISTORY, help="JSON-lines file the results are appended to")
+    parser.add_argument("--baseline", default=Paths.BENCH_BASELINE, help="Baseline file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown against the baseline before a stage counts as SLOWER")
+
+    args = parser.parse_args()
+    ExtractionParams.SENTENCE_SPLITTER = args.splitter
+    ExtractionParams.XML_BACKEND = args.xml_backend
+
+    docs = load_documents(args.corpora)
+    print(f"{len(docs)} documents, {sum(len(x) for _, x in docs) / 1e6:.1f} MB of XML")
+
+    # One-off setup (spaCy pipelines) is not part of any stage
+    import corpus_stats
+    corpus_stats.get_nlp()
+    if args.splitter == "spacy":
+        xe.get_nlp()
+
+    records = []
+    for scale in args.scales:
+        print(f"  running x{scale} ...")
+        records.append({
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "splitter": args.splitter,
+            "xml_backend": get_backend().name,
+            "corpora": args.corpora,
+            "scale": scale,
+            "documents": len(docs) * scale,
+            "stages": run_scale(docs, scale, args.repeat if scale == 1 else 1),
+        })
+
+    append_history(args.history, records)
+    print(f"Appended {len(records)} records to {args.history}")
+
+    slower = compare(records, load_baseline(args.baseline), args.tolerance)
+    if args.save_baseline:
+        save_baseline(args.baseline, records)
+        print(f"Saved baseline to {args.baseline}")
+    sys.exit(1 if slower and not args.save_baseline else 0)
@@ -0,0 +1,135 @@
+"""
+Precompiled regular expressions for the text cleanup hot paths of xml_extraction.py.
+Contains:
+1. TextBuilder patterns (add_text / get_text)
+2. Sentence splitting patterns (presplit_chunks, filter/merge of sentences)
+3. Extraction plan patterns (foreign-word markers, whitespace)
+4. clean_sentence_pairs patterns
+Passes that used to run one after the other are fused into a single
+pattern where the result is the same and the fused scan is faster; each
+fused pattern notes the passes it replaces. Patterns that rarely match are
+guarded by a substring test at the call site instead (a fused alternation
+would be tried at every position and is slower there).
+"""
+import re
+from functools import lru_cache
+from typing import Optional, Sequence, Set, Tuple
+
+# =======================
+# TEXT BUILDER
+# =======================
+# Replaces r'\bunreadable\b' then r'unreadable' (both IGNORECASE): the second pass
+# already removes every occurrence, and removing a bounded one cannot create a new one
+UNREADABLE = re.compile(r'unreadable', re.IGNORECASE)
+
+# Replaces r' +' -> ' ' then r'\s+([.:;!?,])' -> r'\1'.
+# Group 1 (whitespace before punctuation) is dropped, other space runs collapse.
+SPACE_CLEANUP = re.compile(r'(\s+)(?=[.:;!?,])| {2,}')
+
+def space_cleanup_repl(match: re.Match) -> str:
+    return '' if match.group(1) else ' '
+
+SENTENCE_ENDING = re.compile(r'[.!?]\s*$')
+
+# =======================
+# SENTENCE SPLITTING
+# =======================
+# Guard: '..' in text
+MULTI_PERIOD = re.compile(r'\.{2,}')
+# Guard: ')' in text
+LIST_AFTER_COLON = re.compile(r':\s*(\d+\s*\))')
+LIST_NUMBER = re.compile(r'(\d+\s*\))')
+
+# Guard: '"' in text (every quote pattern needs a closing '"')
+QUOTED_MULTI_SENTENCE = re.compile(r'(["„])([^"„]+[.!?]\s+[^"„]+)(["])')
+QUOTED_SENTENCE_EN = re.compile(r'"([A-ZÄÖÜ][^"]{10,})"')
+QUOTED_SENTENCE_DE = re.compile(r'„([A-ZÄÖÜ][^"]{10,})"')
+SENTENCE_BOUNDARY = re.compile(r'([.!?])\s+([A-ZÄÖÜ])')
+
+# Guards: '<', '  ' and '\n\n' in text
+TAG = re.compile(r'<[^>]+>')
+SPACE_RUN = re.compile(r' {2,}')
+PARAGRAPH_BREAK = re.compile(r'\n{2,}')
+
+PUNCT_ONLY = re.compile(r'[\.\?!]+')
+NUMBERED_MARKER = re.compile(r'^\s*\d+\s*(?:\.?\s*\))\s*')
+
+# =======================
+# EXTRACTION PLANS
+# =======================
+FOREIGN_WORD = re.compile(r'FOREIGNWORDSTART(.*?)FOREIGNWORDEND')
+
+def collapse_whitespace(text: str) -> str:
+    """Same as re.sub(r'\\s+', ' ', text).strip(), without the regex."""
+    return ' '.join(text.split())
+
+# =======================
+# CLEAN SENTENCE PAIRS
+# =======================
+# Guard: '\n' in text
+NEWLINE_RUN = re.compile(r'\s*\n\s*')
+
+# Standalone interjections and laughs; a trailing punctuation mark (group 1) is kept.
+# Same matches as r'\b(h[aeo]+|e+|o+|y+e+|gahahaha|hahaha+|noo+)(?:[.!?,"\s]|$)'
+# with the lambda keeping group(0)[-1] when it is punctuation. The lookahead
+# rejects words with another first letter before trying the alternatives.
+INTERJECTION = re.compile(
+    r'\b(?=[ehoygn])(?:h[aeo]+|e+|o+|y+e+|gahahaha|hahaha+|noo+)(?:([.!?,"])|\s|$)',
+    re.IGNORECASE
+)
+
+# Guard: text.startswith('-')
+LEADING_HYPHEN = re.compile(r'^-\s+(?=["„A-ZÄÖÜ])')
+
+LIST_MARKER = re.compile(r'^\s*\d+\s*[.\)]\s*')
+
+@lru_cache(maxsize=None)
+def min_words_pattern(n: int) -> re.Pattern:
+    """Matches iff the text has at least n r'\b\w+\b' words; stops at the n-th (n=3: r'\w+\W+\w+\W+\w')."""
+    return re.compile(r'\w+\W+' * (n - 1) + r'\w')
+
+class DropRuleMatcher:
+    """
+    Compiled form of ExtractionParams.DROP_RULES.
+    All regexes are joined into one plain alternation, scanned once per
+    sentence; only at the (rare) positions where it matches is each regex
+    tried on its own, so every regex found anywhere in the sentence is seen,
+    overlapping matches included. The alternation has no groups, which keeps
+    re's first-character prefilter (wrapping the regexes in groups disables it).
+    """
+    def __init__(self, rules: Sequence[Tuple[str, Sequence[str]]]):
+        regexes = []
+        self.rules = []  # (name, indices of the regexes that must all be hit)
+        for name, rule_regexes in rules:
+            indices = []
+            for regex in rule_regexes:
+                indices.append(len(regexes))
+                regexes.append(regex)
+            self.rules.append((name, frozenset(indices)))
+        self.search = re.compile('|'.join(regexes)).search
+        self.matchers = [re.compile(regex).match for regex in regexes]
+
+    def hits(self, text_lower: str) -> Set[int]:
+        """Indices of the regexes found in a lowercased sentence."""
+        hits = set()
+        m = self.search(text_lower)
+        while m is not None:
+            pos = m.start()
+            for i, match in enumerate(self.matchers):
+                if i not in hits and match(text_lower, pos):
+                    hits.add(i)
+            m = self.search(text_lower, pos + 1)
+        return hits
+
+    def first_rule(self, hits: Set[int]) -> Optional[str]:
+        """Name of the first rule whose regexes were all hit (in src or tgt), else None."""
+        if hits:
+            for name, indices in self.rules:
+                if indices <= hits:
+                    return name
+        return None
+
+@lru_cache(maxsize=None)
+def drop_rule_matcher(rules: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> DropRuleMatcher:
+    """DropRuleMatcher of a rule table, compiled once per process."""
+    return DropRuleMatcher(rules)
@@ -0,0 +1,79 @@
+"""
+Token alignment of a src/tgt sentence pair for the NORM writer.
+The common tokens come from a shortest edit script (Myers, "An O(ND)
+Difference Algorithm and Its Variations", 1986), which costs O((N + M) D)
+for N + M tokens and D edits, so near-identical pairs are cheap. The
+tokens between two common ones are paired in order (substitutions), and
+the rest of the longer side gets empty cells (insertions and deletions).
+"""
+from typing import List, Sequence, Tuple
+
+def diff_matches(a: Sequence[str], b: Sequence[str]) -> List[Tuple[int, int]]:
+    """(i, j) with a[i] == b[j] of a shortest edit script from a to b, in order."""
+    n, m = len(a), len(b)
+    offset = n + m + 1  # v[k + offset] = furthest x on diagonal k = x - y
+    v = [0] * (2 * offset + 1)
+    trace = []  # v before each round d, for the backtrack
+    for d in range(n + m + 1):
+        trace.append(v[offset - d:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]  # Down: insertion of b[y]
+            else:
+                x = v[offset + k - 1] + 1  # Right: deletion of a[x]
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m)
+    return []  # Not reached: d = n + m always ends the script
+
+def _backtrack(trace: List[List[int]], n: int, m: int) -> List[Tuple[int, int]]:
+    """Diagonal moves (matches) of the path found by diff_matches."""
+    matches = []
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        prev_v = trace[d]  # Slice of v for diagonals -d .. d + 1, at index k + d
+        k = x - y
+        if k == -d or (k != d and prev_v[k - 1 + d] < prev_v[k + 1 + d]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = prev_v[prev_k + d]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            matches.append((x, y))
+        x, y = prev_x, prev_y
+    matches.reverse()
+    return matches
+
+def align_tokens(src: List[str], tgt: List[str]) -> List[Tuple[str, str]]:
+    """(src token, tgt token) rows of a sentence pair, "" where one side has no token."""
+    if src == tgt:
+        return list(zip(src, tgt))
+
+    # Common prefix and suffix need no diff
+    start = 0
+    while start < len(src) and start < len(tgt) and src[start] == tgt[start]:
+        start += 1
+    end_src, end_tgt = len(src), len(tgt)
+    while end_src > start and end_tgt > start and src[end_src - 1] == tgt[end_tgt - 1]:
+        end_src -= 1
+        end_tgt -= 1
+
+    rows = list(zip(src[:start], tgt[:start]))
+    i, j = start, start
+    matches = diff_matches(src[start:end_src], tgt[start:end_tgt])
+    for mi, mj in [(start + mi, start + mj) for mi, mj in matches] + [(end_src, end_tgt)]:
+        deleted, inserted = src[i:mi], tgt[j:mj]
+        for h in range(max(len(deleted), len(inserted))):
+            rows.append((deleted[h] if h < len(deleted) else "", inserted[h] if h < len(inserted) else ""))
+        if mi < end_src:
+            rows.append((src[mi], tgt[mj]))
+        i, j = mi + 1, mj + 1
+    rows.extend(zip(src[end_src:], tgt[end_tgt:]))
+    return rows
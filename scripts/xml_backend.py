@@ -0,0 +1,106 @@
+"""
+XML parser backends of the tree engine.
+Contains:
+1. EtreeBackend: xml.etree.ElementTree, always available
+2. LxmlBackend: lxml, with compiled XPath for the paragraph/body/exercise lookups
+3. get_backend(), which picks one from ExtractionParams.XML_BACKEND
+Both parse the whole document (str, or bytes / a memory map of the file
+decoded as its XML declaration says) and expose the same lookups, and the
+extractors only use what both element types share (tag, text, tail,
+attributes, iteration), so the extracted pairs are identical either way.
+lxml is optional and imported on first use.
+"""
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Union
+
+from configs import ExtractionParams
+
+BACKENDS = ("auto", "etree", "lxml")  # "auto" = lxml when installed, else etree
+
+class EtreeBackend:
+    """xml.etree.ElementTree; lookups are ElementPath expressions, e.g. './/{ns}body'."""
+    name = "etree"
+    ParseError = ET.ParseError
+
+    def fromstring(self, xml_content: Union[str, bytes]):
+        return ET.fromstring(xml_content)
+
+    def findall(self, elem, path: str) -> List:
+        return elem.findall(path)
+
+    def find(self, elem, path: str):
+        return elem.find(path)
+
+class LxmlBackend:
+    """
+    lxml; the same ElementPath lookups run as XPath expressions compiled once
+    per path. Comments and processing instructions are dropped while parsing,
+    as ElementTree does, so they never show up as children.
+    """
+    name = "lxml"
+
+    def __init__(self):
+        from lxml import etree
+        self.etree = etree
+        self.ParseError = etree.XMLSyntaxError
+        # A str document is passed as UTF-8 bytes (lxml rejects str with an
+        # encoding declaration), so encoding= overrides whatever it declares;
+        # a bytes document is decoded as it declares, as ElementTree does
+        self.text_parser = etree.XMLParser(encoding="utf-8", remove_comments=True, remove_pis=True)
+        self.parser = etree.XMLParser(remove_comments=True, remove_pis=True)
+        self.xpaths: Dict[str, "etree.XPath"] = {}
+
+    def fromstring(self, xml_content: Union[str, bytes]):
+        if isinstance(xml_content, str):
+            return self.etree.fromstring(xml_content.encode("utf-8"), self.text_parser)
+        return self.etree.fromstring(xml_content, self.parser)
+
+    def xpath(self, path: str):
+        """Compiled XPath of an ElementPath './/{ns}tag' expression."""
+        compiled = self.xpaths.get(path)
+        if compiled is None:
+            namespaces = {}
+            def prefix(match):
+                name = f"ns{len(namespaces)}"
+                namespaces[name] = match.group(1)
+                return f"{name}:"
+            compiled = self.etree.XPath(re.sub(r"\{([^}]*)\}", prefix, path), namespaces=namespaces)
+            self.xpaths[path] = compiled
+        return compiled
+
+    def findall(self, elem, path: str) -> List:
+        return self.xpath(path)(elem)
+
+    def find(self, elem, path: str):
+        found = self.xpath(path)(elem)
+        return found[0] if found else None
+
+def lxml_available() -> bool:
+    try:
+        import lxml.etree  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+_backends = {}
+
+def get_backend(name: Optional[str] = None):
+    """The backend called name (default: ExtractionParams.XML_BACKEND), built once per process."""
+    if name is None:
+        name = ExtractionParams.XML_BACKEND
+    if name == "auto":
+        name = "lxml" if lxml_available() else "etree"
+    backend = _backends.get(name)
+    if backend is None:
+        if name == "etree":
+            backend = EtreeBackend()
+        elif name == "lxml":
+            try:
+                backend = LxmlBackend()
+            except ImportError as e:
+                raise ImportError("The lxml XML backend needs lxml (pip install lxml)") from e
+        else:
+            raise ValueError(f"Unknown XML backend {name!r}, expected one of {BACKENDS}")
+        _backends[name] = backend
+    return backend
@@ -1,16 +1,55 @@
-import re
 import os
-import spacy
+import mmap
+import codecs
+import csv
+import time
+import hashlib
+import logging
+import cProfile
 import argparse
-import pandas as pd
 from configs import Paths, ExtractionParams
-from spacy.lang.de import German
+from extraction_cache import ExtractionCache
+from dedup_index import GlobalDeduplicator
+from corpus_manifest import corpus_manifest, detect_text_type
+from shard_output import SHARD_FORMATS, shard_names, reset_shard_dir, write_shard_manifest, merge_shards
+from instrumentation import METRICS, write_report, profile_stats, write_profile
+from pair_table import PAIR_COLUMNS, ParquetPairWriter
+from file_prefetch import FilePrefetcher
+from sentence_aligner import align_sentences
+from token_diff import align_tokens
+from xml_backend import BACKENDS, get_backend
+import text_patterns as tp
 import xml.etree.ElementTree as ET
-from typing import List, Tuple, Dict, Optional
-from dataclasses import dataclass
-
-nlp = German()
-nlp.add_pipe("sentencizer", config={"punct_chars": [".", "?", "!"]})
+from typing import List, Tuple, Dict, Optional, Iterator, Union, Callable, TYPE_CHECKING
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from functools import lru_cache, partial
+from contextlib import contextmanager, nullcontext
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger("xml_extraction")
+
+def configure_logging():
+    """Log to stderr at ExtractionParams.LOG_LEVEL (debug output such as the presplit chunks)."""
+    logging.basicConfig(level=ExtractionParams.LOG_LEVEL, format="%(levelname)s %(message)s")
+    logger.setLevel(ExtractionParams.LOG_LEVEL)
+
+# spaCy, pandas and sentence_splitter (~100 ms of regex compilation) are imported
+# on first use, so that --help, argument errors and library imports of this module
+# do not pay for them
+_nlp = None
+
+def get_nlp():
+    """German() + sentencizer, built once per process on first use."""
+    global _nlp
+    if _nlp is None:
+        from spacy.lang.de import German
+        _nlp = German()
+        _nlp.add_pipe("sentencizer", config={"punct_chars": [".", "?", "!"]})
+    return _nlp
 
 # ============================================================================
 # SHARED UTILITIES
@@ -18,11 +57,20 @@ nlp.add_pipe("sentencizer", config={"punct_chars": [".", "?", "!"]})
 
 @dataclass
 class SentencePair:
-    """Represents a source-target sentence pair with metadata."""
+    """
+    Represents a source-target sentence pair with metadata.
+    Slotted, and tgt shares the src string object when the two are equal
+    (every uncorrected pair), so a run keeps one copy of those sentences.
+    """
+    __slots__ = ("src", "tgt", "has_correction", "has_foreign")
     src: str
     tgt: str
     has_correction: bool
     has_foreign: bool
+
+    def __post_init__(self):
+        if self.tgt == self.src:
+            self.tgt = self.src
     
     def to_tuple(self):
         return (self.src, self.tgt, self.has_correction, self.has_foreign)
@@ -35,6 +83,10 @@ class TextBuilder:
     """
     def __init__(self):
         self.parts = []
+        # Last non-whitespace character of ''.join(parts), kept up to date on every
+        # append. get_text() only collapses/moves whitespace, so this is also the
+        # last non-whitespace character of get_text().
+        self.last_char = ''
     
     def add_text(self, text: str, merge: bool = False):
         """
@@ -48,13 +100,13 @@ class TextBuilder:
             return
         
         # Filter out "unreadable" literals
-        text = re.sub(r'\bunreadable\b', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'unreadable', '', text, flags=re.IGNORECASE)
-        text = text.strip()
+        text = tp.UNREADABLE.sub('', text).strip()
         
         if not text:
             return
         
+        self.last_char = text[-1]
+
         if not self.parts:
             self.parts.append(text)
             return
@@ -76,14 +128,19 @@ class TextBuilder:
     def add_marker(self, marker: str):
         """Add a marker (like <SENTBREAK> or <FOREIGN>)."""
         self.parts.append(marker)
+        if marker.strip():
+            self.last_char = marker.rstrip()[-1]
+
+    def ends_sentence(self) -> bool:
+        """O(1) equivalent of has_sentence_ending(self.get_text())."""
+        return self.last_char in ('.', '!', '?')
     
     def get_text(self) -> str:
         """Get accumulated text with cleanup."""
         text = ''.join(self.parts)
-        # Clean up multiple spaces but preserve single spaces
-        text = re.sub(r' +', ' ', text)
-        # Remove spaces before punctuation
-        text = re.sub(r'\s+([.:;!?,])', r'\1', text)
+        # Clean up multiple spaces but preserve single spaces,
+        # and remove spaces before punctuation (one pass)
+        text = tp.SPACE_CLEANUP.sub(tp.space_cleanup_repl, text)
         return text.strip()
 
 def has_leading_whitespace(text: Optional[str]) -> bool:
@@ -104,67 +161,89 @@ def has_sentence_ending(text: str) -> bool:
     """Check if text ends with sentence-ending punctuation."""
     if not text:
         return False
-    return bool(re.search(r'[.!?]\s*$', text.strip()))
+    return bool(tp.SENTENCE_ENDING.search(text.strip()))
 
-def spacy_sent(text: str) -> List[str]:
-    """Split German text into sentences using spaCy."""
+def presplit_chunks(text: str) -> List[str]:
+    """
+    Regex pre-splitting stage of spacy_sent.
+    Returns the cleaned chunks that are handed to the spaCy pipeline.
+    """
     if not text or not text.strip():
         return []
 
     # Pre-split on double/triple periods
-    text = re.sub(r'\.{2,}', '.<SPLIT>', text)
+    if '..' in text:
+        text = tp.MULTI_PERIOD.sub('.<SPLIT>', text)
 
-    # SPLIT after colon if it introduces a numbered list (": 1)", ": 2)", etc.)
-    text = re.sub(r':\s*(\d+\s*\))', r': <SPLIT>\1', text)
+    if ')' in text:
+        # SPLIT after colon if it introduces a numbered list (": 1)", ": 2)", etc.)
+        text = tp.LIST_AFTER_COLON.sub(r': <SPLIT>\1', text)
 
-    # Split before any numbered list marker with or without space before ) , matches both "1)" and "1 )"
-    text = re.sub(r'(\d+\s*\))', r'.<SPLIT>\1', text)
+        # Split before any numbered list marker with or without space before ) , matches both "1)" and "1 )"
+        text = tp.LIST_NUMBER.sub(r'.<SPLIT>\1', text)
 
-    # First, remove quotes from quoted segments with multiple sentences inside
-    # Match: opening quote + content with sentence-ending punctuation + more content + closing quote
-    # Pattern: ["„] + text + [.!?] + text + [""]
-    text = re.sub(r'([""„])([^"""„]+[.!?]\s+[^"""„]+)(["""])', r'\2', text)
+    if '"' in text:
+        # First, remove quotes from quoted segments with multiple sentences inside
+        # Match: opening quote + content with sentence-ending punctuation + more content + closing quote
+        # Pattern: ["„] + text + [.!?] + text + [""]
+        text = tp.QUOTED_MULTI_SENTENCE.sub(r'\2', text)
 
-    # Now handle quoted segments that should be standalone sentences
-    # Match quotes around text starting with uppercase and having 3+ words
-    # English quotes: "Word word word"
-    text = re.sub(r'"([A-ZÄÖÜ][^"]{10,})"', r'<SPLIT>\1<SPLIT>', text)
+        # Now handle quoted segments that should be standalone sentences
+        # Match quotes around text starting with uppercase and having 3+ words
+        # English quotes: "Word word word"
+        text = tp.QUOTED_SENTENCE_EN.sub(r'<SPLIT>\1<SPLIT>', text)
 
-    # German quotes: „Word word word"
-    text = re.sub(r'„([A-ZÄÖÜ][^"]{10,})"', r'<SPLIT>\1<SPLIT>', text)
+        # German quotes: „Word word word"
+        text = tp.QUOTED_SENTENCE_DE.sub(r'<SPLIT>\1<SPLIT>', text)
 
     # FINAL safeguard:
     # Force split after sentence-ending punctuation + space + uppercase
     # (e.g. "geshaut. Danach")
-    text = re.sub(r'([.!?])\s+([A-ZÄÖÜ])', r'\1<SPLIT>\2', text)
+    text = tp.SENTENCE_BOUNDARY.sub(r'\1<SPLIT>\2', text)
 
     chunks = text.split('<SPLIT>')
-    print("[DEBUG CHUNKS]", chunks)
-    all_sentences = []
+    logger.debug("presplit chunks: %s", chunks)
 
-    
+    cleaned_chunks = []
     for chunk in chunks:
         if not chunk.strip():
             continue
         
         # DO NOT remove markers here - keep them for now
-        clean = re.sub(r"<[^>]+>", " ", chunk)
-        clean = re.sub(r"[ ]+", " ", clean)
-        clean = re.sub(r"\n{2,}", "\n<PAR>\n", clean)
-        clean = clean.strip()
-        
-        doc = nlp(clean)
-        out = []
-        for sent in doc.sents:
-            s = sent.text.strip()
-            if not s or re.fullmatch(r"[\.\?!]+", s):
-                continue
-            s = s.replace("<PAR>", "").strip()
-            if s:
-                out.append(s)
-        
-        all_sentences.extend(out)
-
+        clean = tp.TAG.sub(" ", chunk) if "<" in chunk else chunk
+        if "  " in clean:
+            clean = tp.SPACE_RUN.sub(" ", clean)
+        if "\n\n" in clean:
+            clean = tp.PARAGRAPH_BREAK.sub("\n<PAR>\n", clean)
+        cleaned_chunks.append(clean.strip())
+
+    return cleaned_chunks
+
+def filter_sentences(sentences: List[str]) -> List[str]:
+    """Drop punctuation-only and <PAR> residue from the sentences of one chunk."""
+    out = []
+    for s in sentences:
+        s = s.strip()
+        if not s or tp.PUNCT_ONLY.fullmatch(s):
+            continue
+        s = s.replace("<PAR>", "").strip()
+        if s:
+            out.append(s)
+    return out
+
+def iter_chunk_sentences(chunks: List[str]) -> Iterator[List[str]]:
+    """Raw sentences of each chunk, from the splitter set in ExtractionParams.SENTENCE_SPLITTER."""
+    if ExtractionParams.SENTENCE_SPLITTER == "fast":
+        from sentence_splitter import split_sentences
+        for chunk in chunks:
+            yield split_sentences(chunk)
+        return
+
+    for doc in get_nlp().pipe(chunks, **(ExtractionParams.SENTENCIZER_KWARGS or {})):
+        yield [sent.text for sent in doc.sents]
+
+def merge_sentences(all_sentences: List[str]) -> List[str]:
+    """Merge fragments and strip numbered markers (final stage of spacy_sent)."""
     # Merge fragments
     merged = []
     buffer = ""
@@ -173,7 +252,7 @@ def spacy_sent(text: str) -> List[str]:
         if not s_strip:
             continue
         if buffer:
-            if s_strip[0].islower() or not re.search(r'[.!?]$', buffer):
+            if s_strip[0].islower() or not buffer.endswith(('.', '!', '?')):
                 buffer += " " + s_strip
             else:
                 merged.append(buffer)
@@ -188,530 +267,724 @@ def spacy_sent(text: str) -> List[str]:
     # Handles "1)", "1 )", "1.)", "1 .)"
     cleaned = []
     for sent in merged:
-        sent = re.sub(r'^\s*\d+\s*(?:\.?\s*\))\s*', '', sent).strip()
+        sent = tp.NUMBERED_MARKER.sub('', sent).strip()
         if sent:
             cleaned.append(sent)
     
     return cleaned
 
-# ============================================================================
-# KOLIPSI EXTRACTION
-# ============================================================================
-
-def extract_kolipsi(element) -> Tuple[str, str, bool]:
+def spacy_sent_batch(texts: List[str]) -> List[List[str]]:
     """
-    Extract src and tgt from Kolipsi element.
-    Returns (src_text, tgt_text, has_corrections)
+    Split many texts into sentences with a single nlp.pipe pass.
+    Chunks of all texts are streamed through spaCy in batches of
+    ExtractionParams.SENTENCIZER_KWARGS["batch_size"] and scattered back,
+    so result i equals spacy_sent(texts[i]). With SENTENCE_SPLITTER = "fast"
+    the chunks go through sentence_splitter instead, with the same result.
     """
-    src_builder = TextBuilder()
-    tgt_builder = TextBuilder()
-    has_corrections = False
+    with METRICS.timed("resolve.presplit", calls=len(texts)):
+        chunk_lists = [presplit_chunks(text) for text in texts]
+    flat_chunks = [chunk for chunks in chunk_lists for chunk in chunks]
+    with METRICS.timed("resolve.sentencize", calls=len(flat_chunks)):
+        chunk_sentences = iter(list(iter_chunk_sentences(flat_chunks)))
+
+    results = []
+    with METRICS.timed("resolve.merge", calls=len(texts)):
+        for chunks in chunk_lists:
+            all_sentences = []
+            for _ in chunks:
+                all_sentences.extend(filter_sentences(next(chunk_sentences)))
+            results.append(merge_sentences(all_sentences))
+    return results
+
+def load_splitter():
+    """Build the configured splitter now (spaCy pipeline or sentence_splitter's regexes), not on first use."""
+    list(iter_chunk_sentences(["."]))
+
+def spacy_sent(text: str) -> List[str]:
+    """Split German text into sentences using spaCy."""
+    return spacy_sent_batch([text])[0]
 
-    def get_element_text(elem):
-        """Get all text from element and descendants."""
-        if elem is None:
-            return ""
-        return ''.join(elem.itertext()).strip()
+@dataclass
+class SplitJob:
+    """A src/tgt text pair still waiting for sentence splitting and pairing."""
+    __slots__ = ("src", "tgt", "has_foreign")
+    src: str
+    tgt: str
+    has_foreign: bool
 
-    def get_original_form_text(elem):
-        """Extract text from originalForm, handling nested structures."""
-        if elem is None:
-            return ""
+# Output of the extractors before sentencization: ready pairs and pending split jobs
+PlanItem = Union[SentencePair, SplitJob]
 
-        parts = []
+def pair_sentences(src_sents: List[str], tgt_sents: List[str], has_foreign: bool) -> List[SentencePair]:
+    """
+    Pair split src/tgt sentences by index. If their counts differ, they are
+    first aligned by length (sentence_aligner.py, merging 1-2 and 2-1); if
+    that fails (align.fallback), the shorter side is padded with empty strings.
+    """
+    if len(src_sents) != len(tgt_sents):
+        aligned = align_sentences(src_sents, tgt_sents, ExtractionParams.ALIGN_BAND)
+        if aligned is None:
+            METRICS.count("align.fallback")
+        else:
+            METRICS.count("align.aligned")
+            src_sents, tgt_sents = aligned
+    max_len = max(len(src_sents), len(tgt_sents))
+    pairs = []
+    
+    for i in range(max_len):
+        src_sent = src_sents[i] if i < len(src_sents) else ""
+        tgt_sent = tgt_sents[i] if i < len(tgt_sents) else ""
+        
+        has_correction = (src_sent.strip() != tgt_sent.strip())
+        
+        if src_sent or tgt_sent:
+            pairs.append(SentencePair(
+                src=src_sent,
+                tgt=tgt_sent,
+                has_correction=has_correction,
+                has_foreign=has_foreign
+            ))
 
-        def recurse_original(node):
-            tag = strip_namespace(node.tag).lower()
+    return pairs
 
-            if node.text and node.text.strip():
-                parts.append(node.text.strip())
-
-            if tag == "overwrite":
-                over = None
-                for child in node:
-                    if strip_namespace(child.tag).lower() == "over":
-                        over = child
-                        break
-                if over is not None and over.text:
-                    parts.append(over.text.strip())
-                if node.tail and node.tail.strip():
-                    parts.append(node.tail.strip())
-                return
-
-            if tag == "palimpsest":
-                palimpsest_text = ''.join(node.itertext()).strip()
-                if palimpsest_text:
-                    parts.append(palimpsest_text)
-                if node.tail and node.tail.strip():
-                    if has_leading_whitespace(node.tail):
-                        parts.append(' ')
-                    parts.append(node.tail.strip())
-                return
+def resolve_plans(plans: List[List[PlanItem]]) -> List[List[SentencePair]]:
+    """
+    Turn extraction plans (one per unit, file, ...) into sentence pairs.
+    All split jobs of all plans go through one spacy_sent_batch call.
+    """
+    texts = []
+    for plan in plans:
+        for item in plan:
+            if isinstance(item, SplitJob):
+                texts.append(item.src)
+                texts.append(item.tgt)
+
+    split_iter = iter(spacy_sent_batch(texts))
+
+    resolved = []
+    with METRICS.timed("resolve.pair", calls=len(texts) // 2):
+        for plan in plans:
+            pairs = []
+            for item in plan:
+                if isinstance(item, SplitJob):
+                    src_sents = next(split_iter)
+                    tgt_sents = next(split_iter)
+                    pairs.extend(pair_sentences(src_sents, tgt_sents, item.has_foreign))
+                else:
+                    pairs.append(item)
+            resolved.append(pairs)
+    return resolved
 
-            for child in node:
-                recurse_original(child)
+# ============================================================================
+# INTER-TAG SPACES
+# ============================================================================
 
-            if node.tail and node.tail.strip():
-                parts.append(node.tail.strip())
+def split_trailing_space(segment: str) -> Tuple[str, bool]:
+    """
+    Decide whether the spaces ending a text segment (text or tail, always
+    followed by a tag) are a meaningful space between tags.
+    Returns (kept_text, space) - space means the trailing spaces/tabs were
+    cut off kept_text and stand for one space after it.
+    """
+    if '\n' in segment:
+        return segment, False  # Layout whitespace
+    kept = segment.rstrip(' \t')
+    if kept == segment:
+        return segment, False
+    if not kept:
+        return "", True        # Whitespace-only segment
+    if kept.isspace():
+        return segment, False
+    return kept, True          # Text followed by spaces
+
+# Tag of the stand-in child SpaceTable.children yields for a recorded space
+# ('#' cannot start an XML name, so no real tag collides with it)
+SPACE_TAG = "#space"
+
+class RecordedSpace:
+    """Stand-in child for a recorded space, dispatched by tag like an element."""
+    __slots__ = ()
+    tag = SPACE_TAG
+    text = None
+    tail = None
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+SPACE = RecordedSpace()
+
+class SpaceTable:
+    """
+    Meaningful spaces between tags of a parsed document, kept beside the tree.
+    A text or tail ending in spaces/tabs (and no newline) before the next tag
+    loses them (None if nothing is left), and its element goes into
+    after_text (a space follows elem.text, before its first child) or
+    after_tail (a space follows elem.tail, before the next sibling).
+    parents holds the elements whose child sequence has a space in it.
+    """
+    __slots__ = ("after_text", "after_tail", "parents")
 
-        recurse_original(elem)
+    def __init__(self):
+        self.after_text = set()
+        self.after_tail = set()
+        self.parents = set()
+
+    def children(self, node) -> Iterator:
+        """Children of node, with SPACE at each recorded space between them."""
+        if node not in self.parents:
+            return iter(node)
+        return self._spaced_children(node)
+
+    def _spaced_children(self, node) -> Iterator:
+        if node in self.after_text:
+            yield SPACE
+        after_tail = self.after_tail
+        for child in node:
+            yield child
+            if child in after_tail:
+                yield SPACE
+
+    def joined_text(self, elem) -> str:
+        """''.join(elem.itertext()), with ' ' at each recorded space inside elem."""
+        if not self.parents:
+            return ''.join(elem.itertext())
+        after_text, after_tail = self.after_text, self.after_tail
+        parts = []
+        stack = [elem]  # Elements and strings, popped in document order
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                parts.append(item)
+                continue
+            if item.text:
+                parts.append(item.text)
+            if item in after_text:
+                parts.append(' ')
+            for child in reversed(item):
+                if child in after_tail:
+                    stack.append(' ')
+                if child.tail:
+                    stack.append(child.tail)
+                stack.append(child)
         return ''.join(parts)
 
-    def recurse(node, src: TextBuilder, tgt: TextBuilder):
-        nonlocal has_corrections
-        tag = strip_namespace(node.tag).lower()
+    def discard(self, elem):
+        """Forget the spaces of elem and its descendants (stream engine, once a unit is done)."""
+        for node in elem.iter():
+            self.after_text.discard(node)
+            self.after_tail.discard(node)
+            self.parents.discard(node)
 
-        # ERROR / OVER_CAPITALISATION / E
-        if tag in ("error", "over_capitalisation", "e"):
-            has_corrections = True
-            original = None
-            target = None
+# Table of a tree without recorded spaces (default of the extractors; never filled)
+NO_SPACES = SpaceTable()
 
-            for child in node:
-                child_tag = strip_namespace(child.tag).lower()
-                if child_tag == "originalform":
-                    original = child
-                elif child_tag == "targetform":
-                    target = child
-
-            orig_text = get_original_form_text(original) if original is not None else ""
-            tgt_text = get_element_text(target) if target is not None else ""
-
-            # Check for sentence break
-            prev_src = src.get_text()
-            if (orig_text and tgt_text
-                and len(orig_text) > 0 and len(tgt_text) > 0
-                and orig_text[0].islower() != tgt_text[0].islower()
-                and has_sentence_ending(prev_src)):
-                src.add_marker(" <SENTBREAK> ")
-                tgt.add_marker(" <SENTBREAK> ")
-
-            if orig_text:
-                src.add_text(orig_text)
-            if tgt_text:
-                tgt.add_text(tgt_text)
-
-            # Handle tail with proper spacing
-            if node.tail:
-                if has_leading_whitespace(node.tail):
-                    src.add_space()
-                    tgt.add_space()
-                tail_text = node.tail.strip()
-                if tail_text:
-                    src.add_text(tail_text, merge=True)
-                    tgt.add_text(tail_text, merge=True)
-            return
+def record_spaces(root) -> SpaceTable:
+    """
+    Record the meaningful spaces of a freshly parsed tree, cutting them off
+    its texts and tails. Runs once per tree: a second pass finds nothing.
+    """
+    spaces = SpaceTable()
+    after_text, after_tail, parents = spaces.after_text, spaces.after_tail, spaces.parents
+    for parent in root.iter():
+        text = parent.text
+        if text and text[-1] in ' \t':
+            kept, space = split_trailing_space(text)
+            if space:
+                parent.text = kept or None
+                after_text.add(parent)
+                parents.add(parent)
+        for child in parent:
+            tail = child.tail
+            if tail and tail[-1] in ' \t':
+                kept, space = split_trailing_space(tail)
+                if space:
+                    child.tail = kept or None
+                    after_tail.add(child)
+                    parents.add(parent)
+    return spaces
 
-        # PALIMPSEST
-        elif tag == "palimpsest":
-            has_errors = any(
-                strip_namespace(child.tag).lower() in ("error", "over_capitalisation", "e")
-                for child in node
-            )
-
-            has_strikeover = any(
-                strip_namespace(child.tag).lower() == "strikeover"
-                for child in node
-            )
-
-            # Strikeover case
-            if has_strikeover:
-                if node.text and node.text.strip():
-                    src.add_text(node.text.strip())
-                    tgt.add_text(node.text.strip())
-
-                for child in node:
-                    child_tag = strip_namespace(child.tag).lower()
-                    if child_tag == "strikeover":
-                        expansion_parts = []
-                        for grandchild in child:
-                            if strip_namespace(grandchild.tag).lower() == "expansion" and grandchild.text:
-                                expansion_parts.append(grandchild.text)
-
-                        if expansion_parts:
-                            merged = ''.join(expansion_parts)
-                            src.add_text(merged, merge=True)
-                            tgt.add_text(merged, merge=True)
-
-                        if child.tail:
-                            if has_leading_whitespace(child.tail):
-                                src.add_space()
-                                tgt.add_space()
-                            if child.tail.strip():
-                                src.add_text(child.tail.strip(), merge=True)
-                                tgt.add_text(child.tail.strip(), merge=True)
-                    else:
-                        recurse(child, src, tgt)
-
-                if node.tail:
-                    if has_leading_whitespace(node.tail):
-                        src.add_space()
-                        tgt.add_space()
-                    if node.tail.strip():
-                        src.add_text(node.tail.strip(), merge=True)
-                        tgt.add_text(node.tail.strip(), merge=True)
-                return
-
-            # No errors case - check XML spacing
-            if not has_errors:
-                if node.text and node.text.strip():
-                    # Check if this is mid-word by looking at surrounding whitespace
-                    merge_before = src.parts and src.parts[-1] and not src.parts[-1].endswith(' ')
-                    src.add_text(node.text.strip(), merge=merge_before)
-                    tgt.add_text(node.text.strip(), merge=merge_before)
-
-                for child in node:
-                    recurse(child, src, tgt)
-
-                if node.tail:
-                    if has_leading_whitespace(node.tail):
-                        src.add_space()
-                        tgt.add_space()
-                    if node.tail.strip():
-                        # Check if tail should merge (no leading space in XML)
-                        merge_tail = not has_leading_whitespace(node.tail)
-                        src.add_text(node.tail.strip(), merge=merge_tail)
-                        tgt.add_text(node.tail.strip(), merge=merge_tail)
-                return
-
-            # Has errors case
-            if node.text and node.text.strip():
-                src.add_text(node.text.strip())
-                tgt.add_text(node.text.strip())
+# ============================================================================
+# TREE WALKING
+# ============================================================================
 
-            for child in node:
-                child_tag = strip_namespace(child.tag).lower()
-
-                if child_tag in ("error", "over_capitalisation", "e"):
-                    has_corrections = True
-                    original = None
-                    target = None
-
-                    for grandchild in child:
-                        grandchild_tag = strip_namespace(grandchild.tag).lower()
-                        if grandchild_tag == "originalform":
-                            original = grandchild
-                        elif grandchild_tag == "targetform":
-                            target = grandchild
-
-                    orig_text = get_original_form_text(original)
-                    if orig_text:
-                        src.add_text(orig_text)
-
-                    tgt_text = get_element_text(target)
-                    if tgt_text:
-                        tgt.add_text(tgt_text)
-
-                    if child.tail:
-                        if has_leading_whitespace(child.tail):
-                            src.add_space()
-                            tgt.add_space()
-                        if child.tail.strip():
-                            merge_tail = not has_leading_whitespace(child.tail)
-                            src.add_text(child.tail.strip(), merge=merge_tail)
-                            tgt.add_text(child.tail.strip(), merge=merge_tail)
+@lru_cache(maxsize=None)
+def local_name(tag: str) -> str:
+    """strip_namespace(tag).lower(), computed once per distinct raw tag."""
+    return strip_namespace(tag).lower()
+
+def element_text(elem, spaces: SpaceTable = NO_SPACES) -> str:
+    """All text of an element and its descendants, stripped ("" for None)."""
+    if elem is None:
+        return ""
+    return spaces.joined_text(elem).strip()
+
+class HandlerTable(dict):
+    """Raw tag -> handler, filled on first sight of each tag by resolve(tag)."""
+    def __init__(self, resolve: Callable[[str], Callable]):
+        super().__init__()
+        self.resolve = resolve
+
+    def __missing__(self, tag: str) -> Callable:
+        handler = self[tag] = self.resolve(tag)
+        return handler
+
+# A frame of TreeWalker.walk: (children, child_fn, post, node). The children
+# iterator is visited with child_fn (None = the handler of the child's tag),
+# then post(node) runs (if not None)
+Frame = Tuple[Iterator, Optional[Callable], Optional[Callable], object]
+
+class TreeWalker:
+    """
+    Base of the LEONIDE and Kolipsi extractors: builds src and tgt text from an
+    element tree (and the SpaceTable recorded when it was parsed), walked with
+    an explicit stack instead of recursion.
+    Each child goes to handlers[child.tag], a memoized raw tag -> handler
+    table (HandlerTable). A handler either deals with the child completely and returns None,
+    or returns the Frame to descend into.
+    """
+    handlers: HandlerTable
+
+    def __init__(self, spaces: SpaceTable = NO_SPACES):
+        self.src = TextBuilder()
+        self.tgt = TextBuilder()
+        self.has_corrections = False
+        self.spaces = spaces
+
+    def walk(self, frame: Frame):
+        handlers = self.handlers
+        stack = [frame]
+        while stack:
+            children, child_fn, post, node = stack[-1]
+            for child in children:
+                if child_fn is None:
+                    frame = handlers[child.tag](self, child)
                 else:
-                    recurse(child, src, tgt)
-
-            if node.tail:
-                if has_leading_whitespace(node.tail):
-                    src.add_space()
-                    tgt.add_space()
-                if node.tail.strip():
-                    merge_tail = not has_leading_whitespace(node.tail)
-                    src.add_text(node.tail.strip(), merge=merge_tail)
-                    tgt.add_text(node.tail.strip(), merge=merge_tail)
+                    frame = child_fn(child)
+                if frame is not None:
+                    stack.append(frame)
+                    break
+            else:
+                stack.pop()
+                if post is not None:
+                    post(node)
+
+    def dispatch(self, child) -> Optional[Frame]:
+        return self.handlers[child.tag](self, child)
+
+    def result(self) -> Tuple[str, str, bool]:
+        return self.src.get_text(), self.tgt.get_text(), self.has_corrections
+
+    # Text helpers (same operation on src and tgt)
+    def add_both(self, text: str, merge: bool = False):
+        self.src.add_text(text, merge=merge)
+        self.tgt.add_text(text, merge=merge)
+
+    def space_both(self):
+        self.src.add_space()
+        self.tgt.add_space()
+
+    def marker_both(self, marker: str):
+        self.src.add_marker(marker)
+        self.tgt.add_marker(marker)
+
+    # The helpers below run for most nodes, so they call the builders directly
+    def add_stripped(self, text: Optional[str]):
+        """Add text.strip() as a new part, if there is any."""
+        if text and not text.isspace():
+            text = text.strip()
+            self.src.add_text(text)
+            self.tgt.add_text(text)
+
+    def _tail(self, node, merge: bool, attached: bool):
+        tail = node.tail
+        if not tail:
             return
+        src, tgt = self.src, self.tgt
+        if tail[0].isspace():
+            src.add_space()
+            tgt.add_space()
+            if attached:
+                merge = False
+        tail = tail.strip()
+        if tail:
+            src.add_text(tail, merge=merge)
+            tgt.add_text(tail, merge=merge)
+
+    def add_tail(self, node):
+        """Tail as a new part (space first if it starts with whitespace)."""
+        tail = node.tail
+        if tail:
+            if tail[0].isspace():
+                self.src.add_space()
+                self.tgt.add_space()
+            tail = tail.strip()
+            if tail:
+                self.src.add_text(tail)
+                self.tgt.add_text(tail)
+
+    def add_tail_merged(self, node):
+        """Tail merged onto the previous part (space first if it starts with whitespace)."""
+        self._tail(node, True, False)
+
+    def add_tail_attached(self, node):
+        """Tail merged onto the previous part only if it directly follows the element."""
+        self._tail(node, True, True)
 
-        # CORRECTION
-        elif tag == "correction":
-            deletion_text = ""
-            insertion_text = ""
-            
-            for child in node:
-                child_tag = strip_namespace(child.tag).lower()
-                
-                if child_tag == "deletion":
-                    if child.text and child.text.strip():
-                        deletion_text = child.text.strip()
-                
-                elif child_tag == "insertion":
-                    if child.text and child.text.strip():
-                        insertion_text = child.text.strip()
-                    for grandchild in child:
-                        recurse(grandchild, src, tgt)
-            
-            if deletion_text and insertion_text:
-                src.add_text(insertion_text, merge=True)
-                tgt.add_text(insertion_text, merge=True)
-            elif insertion_text and not deletion_text:
-                needs_space_before = False
-                if src.parts:
-                    last_part = src.parts[-1]
-                    if last_part and last_part[-1].islower():
-                        words = last_part.split()
-                        if words and len(words[-1]) > 2:
-                            needs_space_before = True
-                
-                if needs_space_before:
-                    src.add_space()
-                    tgt.add_space()
-                
-                src.add_text(insertion_text, merge=True)
-                tgt.add_text(insertion_text, merge=True)
-            
-            if node.tail:
-                if has_leading_whitespace(node.tail):
-                    src.add_space()
-                    tgt.add_space()
-                if node.tail.strip():
-                    src.add_text(node.tail.strip(), merge=True)
-                    tgt.add_text(node.tail.strip(), merge=True)
-            return
+# ============================================================================
+# KOLIPSI EXTRACTION
+# ============================================================================
 
-        # REDUCTION
-        elif tag == "reduction":
-            unfolded = None
-            for child in node:
-                child_tag = strip_namespace(child.tag).lower()
-                if child_tag == "unfoldedform":
-                    unfolded = child
-                    break
-            
-            if unfolded is not None and unfolded.text:
-                unfolded_text = unfolded.text.strip()
-                needs_space = False
-                if src.parts:
-                    last_part = src.parts[-1]
-                    if last_part and last_part[-1].isalpha():
-                        words = last_part.split()
-                        if words and len(words[-1]) > 2:
-                            needs_space = True
-                
-                if needs_space:
-                    src.add_space()
-                    tgt.add_space()
-                
-                src.add_text(unfolded_text)
-                tgt.add_text(unfolded_text)
-            
-            if node.tail:
-                if has_leading_whitespace(node.tail):
-                    src.add_space()
-                    tgt.add_space()
-                if node.tail.strip():
-                    merge_tail = not has_leading_whitespace(node.tail)
-                    src.add_text(node.tail.strip(), merge=merge_tail)
-                    tgt.add_text(node.tail.strip(), merge=merge_tail)
-            return
+KOLIPSI_ERROR_TAGS = ("error", "over_capitalisation", "e")
 
-        # AMBIGUOUS
-        elif tag == "ambiguous":
-            first_alternative = None
-            for child in node:
-                child_tag = strip_namespace(child.tag).lower()
-                if child_tag == "alternative":
-                    first_alternative = child
-                    break
-            
-            if first_alternative is not None and first_alternative.text:
-                alt_text = first_alternative.text.strip()
-                needs_space = False
-                if src.parts:
-                    last_part = src.parts[-1]
-                    if last_part and last_part[-1].isalpha():
-                        words = last_part.split()
-                        if words and len(words[-1]) > 2:
-                            needs_space = True
-                
-                if needs_space:
-                    src.add_space()
-                    tgt.add_space()
-                
-                src.add_text(alt_text)
-                tgt.add_text(alt_text)
-            
-            if node.tail:
-                if has_leading_whitespace(node.tail):
-                    src.add_space()
-                    tgt.add_space()
-                if node.tail.strip():
-                    merge_tail = not has_leading_whitespace(node.tail)
-                    src.add_text(node.tail.strip(), merge=merge_tail)
-                    tgt.add_text(node.tail.strip(), merge=merge_tail)
-            return
+def original_form_text(elem, spaces: SpaceTable = NO_SPACES) -> str:
+    """Extract text from originalForm, handling nested structures ("" for None)."""
+    if elem is None:
+        return ""
 
-        # STRIKEOVER
-        elif tag == "strikeover":
-            expansions = [child.text for child in node
-                          if strip_namespace(child.tag).lower() == "expansion" and child.text]
-        
-            merged = "".join(expansions)
-        
-            should_merge = (
-                src.parts
-                and src.parts[-1]
-                and not src.parts[-1].endswith((" ", "\n"))
-            )
-        
-            if should_merge:
-                src.add_text(merged, merge=True)
-                tgt.add_text(merged, merge=True)
-            else:
-                src.add_text(merged)
-                tgt.add_text(merged)
-        
-            if node.tail:
-                if has_leading_whitespace(node.tail):
-                    src.add_space()
-                    tgt.add_space()
-                if node.tail.strip():
-                    merge_tail = not has_leading_whitespace(node.tail)
-                    src.add_text(node.tail.strip(), merge=merge_tail)
-                    tgt.add_text(node.tail.strip(), merge=merge_tail)
-            return
+    parts = []
+    stack = [(elem, False)]  # (node, children done)
+    while stack:
+        node, done = stack.pop()
+        if done:
+            if node.tail and node.tail.strip():
+                parts.append(node.tail.strip())
+            continue
+
+        tag = local_name(node.tag)
+
+        if node.text and node.text.strip():
+            parts.append(node.text.strip())
 
-        # OVERWRITE
-        elif tag == "overwrite":
+        if tag == "overwrite":
             over = None
             for child in node:
-                child_tag = strip_namespace(child.tag).lower()
-                if child_tag == "over":
+                if local_name(child.tag) == "over":
                     over = child
                     break
+            if over is not None and over.text:
+                parts.append(over.text.strip())
+            if node.tail and node.tail.strip():
+                parts.append(node.tail.strip())
+            continue
 
-            over_text = over.text if over is not None and over.text else ""
-
-            if over_text:
-                src.add_text(over_text, merge=True)
-                tgt.add_text(over_text, merge=True)
-
-            if node.tail:
+        if tag == "palimpsest":
+            palimpsest_text = spaces.joined_text(node).strip()
+            if palimpsest_text:
+                parts.append(palimpsest_text)
+            if node.tail and node.tail.strip():
                 if has_leading_whitespace(node.tail):
-                    src.add_space()
-                    tgt.add_space()
-                if node.tail.strip():
-                    src.add_text(node.tail.strip(), merge=True)
-                    tgt.add_text(node.tail.strip(), merge=True)
-            return
+                    parts.append(' ')
+                parts.append(node.tail.strip())
+            continue
 
-        # FOREIGN_WORD
-        elif tag == "foreign_word":
-            foreign_text = node.text.strip() if node.text and node.text.strip() else ""
-            
-            if foreign_text:
-                marked_word = f'FOREIGNWORDSTART{foreign_text}FOREIGNWORDEND'
-                src.add_text(marked_word)
-                tgt.add_text(marked_word)
-            
-            for child in node:
-                recurse(child, src, tgt)
-            
-            if node.tail:
-                if has_leading_whitespace(node.tail):
-                    src.add_space()
-                    tgt.add_space()
-                if node.tail.strip():
-                    merge_tail = not has_leading_whitespace(node.tail)
-                    src.add_text(node.tail.strip(), merge=merge_tail)
-                    tgt.add_text(node.tail.strip(), merge=merge_tail)
-            return
+        stack.append((node, True))
+        stack.extend((child, False) for child in reversed(node))
 
-        # IGNORE
-        elif tag in ("symbol", "emoticon", "unreadable"):
-            if node.tail:
-                if has_leading_whitespace(node.tail):
-                    src.add_space()
-                    tgt.add_space()
-                if node.tail.strip():
-                    merge_tail = not has_leading_whitespace(node.tail)
-                    src.add_text(node.tail.strip(), merge=merge_tail)
-                    tgt.add_text(node.tail.strip(), merge=merge_tail)
-            return
+    return ''.join(parts)
 
-        # PAR
-        elif tag == "par":
-            src.add_marker(" <SENTBREAK> ")
-            tgt.add_marker(" <SENTBREAK> ")
-            
-            if node.tail:
-                if has_leading_whitespace(node.tail):
-                    src.add_space()
-                    tgt.add_space()
-                if node.tail.strip():
-                    src.add_text(node.tail.strip())
-                    tgt.add_text(node.tail.strip())
-            return
+class KolipsiWalker(TreeWalker):
+    """
+    Handlers of the Kolipsi tags; each one also consumes its element's tail.
+    Where children are dispatched, they come from spaces.children, so a
+    recorded space is handled in its place between them (SPACE_TAG).
+    """
 
-        # SPACEWRAPPER
-        elif tag == "spacewrapper":
-            src.add_space()
-            tgt.add_space()
-            
-            if node.tail:
-                if has_leading_whitespace(node.tail):
-                    src.add_space()
-                    tgt.add_space()
-                if node.tail.strip():
-                    merge_tail = not has_leading_whitespace(node.tail)
-                    src.add_text(node.tail.strip(), merge=merge_tail)
-                    tgt.add_text(node.tail.strip(), merge=merge_tail)
-            return
+    # ERROR / OVER_CAPITALISATION / E
+    def error(self, node):
+        self.has_corrections = True
+        original = None
+        target = None
 
-        # GREETING / CLOSING / ENTITY
-        elif tag in ("greeting", "closing", "entity"):
+        for child in node:
+            child_tag = local_name(child.tag)
+            if child_tag == "originalform":
+                original = child
+            elif child_tag == "targetform":
+                target = child
+
+        orig_text = original_form_text(original, self.spaces)
+        tgt_text = element_text(target, self.spaces)
+        src, tgt = self.src, self.tgt
+
+        # Check for sentence break
+        if (orig_text and tgt_text
+            and orig_text[0].islower() != tgt_text[0].islower()
+            and src.ends_sentence()):
+            self.marker_both(" <SENTBREAK> ")
+
+        if orig_text:
+            src.add_text(orig_text)
+        if tgt_text:
+            tgt.add_text(tgt_text)
+
+        self.add_tail_merged(node)
+
+    # PALIMPSEST
+    def palimpsest(self, node):
+        child_tags = [local_name(child.tag) for child in node]
+
+        # Strikeover case
+        if "strikeover" in child_tags:
+            self.add_stripped(node.text)
+            return self.spaces.children(node), self.palimpsest_strikeover_child, self.add_tail_merged, node
+
+        # No errors case - check XML spacing
+        if not any(tag in KOLIPSI_ERROR_TAGS for tag in child_tags):
             if node.text and node.text.strip():
-                src.add_text(node.text.strip())
-                tgt.add_text(node.text.strip())
-        
-            for child in node:
-                recurse(child, src, tgt)
-        
-            if node.tail:
-                if has_leading_whitespace(node.tail):
-                    src.add_space()
-                    tgt.add_space()
-                if node.tail.strip():
-                    src.add_text(node.tail.strip())
-                    tgt.add_text(node.tail.strip())
-            else:
-                # No tail means next sibling comes directly after
-                src.add_space()
-                tgt.add_space()
-            return
+                # Check if this is mid-word by looking at surrounding whitespace
+                src = self.src
+                merge_before = src.parts and src.parts[-1] and not src.parts[-1].endswith(' ')
+                self.add_both(node.text.strip(), merge=merge_before)
+            return self.spaces.children(node), None, self.add_tail_attached, node
+
+        # Has errors case
+        self.add_stripped(node.text)
+        return self.spaces.children(node), self.palimpsest_error_child, self.add_tail_attached, node
+
+    def palimpsest_strikeover_child(self, child):
+        if local_name(child.tag) != "strikeover":
+            return self.dispatch(child)
+
+        expansion_parts = [grandchild.text for grandchild in child
+                           if local_name(grandchild.tag) == "expansion" and grandchild.text]
+        if expansion_parts:
+            self.add_both(''.join(expansion_parts), merge=True)
+        self.add_tail_merged(child)
+
+    def palimpsest_error_child(self, child):
+        if local_name(child.tag) not in KOLIPSI_ERROR_TAGS:
+            return self.dispatch(child)
+
+        self.has_corrections = True
+        original = None
+        target = None
+
+        for grandchild in child:
+            grandchild_tag = local_name(grandchild.tag)
+            if grandchild_tag == "originalform":
+                original = grandchild
+            elif grandchild_tag == "targetform":
+                target = grandchild
+
+        orig_text = original_form_text(original, self.spaces)
+        if orig_text:
+            self.src.add_text(orig_text)
+
+        tgt_text = element_text(target, self.spaces)
+        if tgt_text:
+            self.tgt.add_text(tgt_text)
+
+        self.add_tail_attached(child)
+
+    # CORRECTION
+    def correction(self, node):
+        deletion_text = ""
+        insertion_text = ""
+        insertions = []
+
+        for child in node:
+            child_tag = local_name(child.tag)
+
+            if child_tag == "deletion":
+                if child.text and child.text.strip():
+                    deletion_text = child.text.strip()
+
+            elif child_tag == "insertion":
+                if child.text and child.text.strip():
+                    insertion_text = child.text.strip()
+                insertions.append(child)
+
+        # The children of the insertions come first, then the insertion text itself
+        return (chain.from_iterable(map(self.spaces.children, insertions)), None,
+                partial(self.end_correction, deletion_text, insertion_text), node)
+
+    def end_correction(self, deletion_text: str, insertion_text: str, node):
+        src = self.src
+        if deletion_text and insertion_text:
+            self.add_both(insertion_text, merge=True)
+        elif insertion_text and not deletion_text:
+            needs_space_before = False
+            if src.parts:
+                last_part = src.parts[-1]
+                if last_part and last_part[-1].islower():
+                    words = last_part.split()
+                    if words and len(words[-1]) > 2:
+                        needs_space_before = True
+
+            if needs_space_before:
+                self.space_both()
+
+            self.add_both(insertion_text, merge=True)
+
+        self.add_tail_merged(node)
+
+    def _add_unfolded(self, text: str):
+        """Reduction / ambiguous text: spaced off a preceding (3+ letter) word."""
+        src = self.src
+        needs_space = False
+        if src.parts:
+            last_part = src.parts[-1]
+            if last_part and last_part[-1].isalpha():
+                words = last_part.split()
+                if words and len(words[-1]) > 2:
+                    needs_space = True
+
+        if needs_space:
+            self.space_both()
+
+        self.add_both(text)
+
+    # REDUCTION
+    def reduction(self, node):
+        unfolded = None
+        for child in node:
+            if local_name(child.tag) == "unfoldedform":
+                unfolded = child
+                break
 
-        # OTHER (default handler)
+        if unfolded is not None and unfolded.text:
+            self._add_unfolded(unfolded.text.strip())
+
+        self.add_tail_attached(node)
+
+    # AMBIGUOUS
+    def ambiguous(self, node):
+        first_alternative = None
+        for child in node:
+            if local_name(child.tag) == "alternative":
+                first_alternative = child
+                break
+
+        if first_alternative is not None and first_alternative.text:
+            self._add_unfolded(first_alternative.text.strip())
+
+        self.add_tail_attached(node)
+
+    # STRIKEOVER
+    def strikeover(self, node):
+        expansions = [child.text for child in node
+                      if local_name(child.tag) == "expansion" and child.text]
+
+        merged = "".join(expansions)
+
+        src = self.src
+        should_merge = (
+            src.parts
+            and src.parts[-1]
+            and not src.parts[-1].endswith((" ", "\n"))
+        )
+
+        if should_merge:
+            self.add_both(merged, merge=True)
         else:
-            if node.text:
-                text_stripped = node.text.strip()
-                has_trailing = has_trailing_whitespace(node.text)
-                
-                if text_stripped:
-                    src.add_text(text_stripped)
-                    tgt.add_text(text_stripped)
-                
-                if has_trailing:
-                    src.add_space()
-                    tgt.add_space()
+            self.add_both(merged)
 
-            for child in node:
-                recurse(child, src, tgt)
+        self.add_tail_attached(node)
 
-            if node.tail:
-                if has_leading_whitespace(node.tail):
-                    src.add_space()
-                    tgt.add_space()
-                if node.tail.strip():
-                    merge_tail = not has_leading_whitespace(node.tail)
-                    src.add_text(node.tail.strip(), merge=merge_tail)
-                    tgt.add_text(node.tail.strip(), merge=merge_tail)
+    # OVERWRITE
+    def overwrite(self, node):
+        over = None
+        for child in node:
+            if local_name(child.tag) == "over":
+                over = child
+                break
 
-    recurse(element, src_builder, tgt_builder)
-    return src_builder.get_text(), tgt_builder.get_text(), has_corrections
+        over_text = over.text if over is not None and over.text else ""
 
-def extract_kolipsi_sentences(element) -> List[SentencePair]:
-    """Extract sentence pairs from Kolipsi element."""
-    src_full, tgt_full, _ = extract_kolipsi(element)
+        if over_text:
+            self.add_both(over_text, merge=True)
+
+        self.add_tail_merged(node)
+
+    # FOREIGN_WORD
+    def foreign_word(self, node):
+        foreign_text = node.text.strip() if node.text and node.text.strip() else ""
+
+        if foreign_text:
+            self.add_both(f'FOREIGNWORDSTART{foreign_text}FOREIGNWORDEND')
+
+        return self.spaces.children(node), None, self.add_tail_attached, node
+
+    # IGNORE
+    def ignore(self, node):
+        self.add_tail_attached(node)
+
+    # PAR
+    def par(self, node):
+        self.marker_both(" <SENTBREAK> ")
+        self.add_tail(node)
+
+    # RECORDED SPACE (between tags)
+    def space(self, node):
+        self.space_both()
+
+    # GREETING / CLOSING / ENTITY
+    def greeting(self, node):
+        self.add_stripped(node.text)
+        return self.spaces.children(node), None, self.end_greeting, node
+
+    def end_greeting(self, node):
+        if node.tail:
+            self.add_tail(node)
+        else:
+            # No tail means next sibling comes directly after
+            self.space_both()
+
+    # OTHER (default handler)
+    def other(self, node):
+        if node.text:
+            text_stripped = node.text.strip()
+
+            if text_stripped:
+                self.add_both(text_stripped)
+
+            if has_trailing_whitespace(node.text):
+                self.space_both()
+
+        return self.spaces.children(node), None, self.add_tail_attached, node
+
+KOLIPSI_HANDLERS = {
+    "error": KolipsiWalker.error,
+    "over_capitalisation": KolipsiWalker.error,
+    "e": KolipsiWalker.error,
+    "palimpsest": KolipsiWalker.palimpsest,
+    "correction": KolipsiWalker.correction,
+    "reduction": KolipsiWalker.reduction,
+    "ambiguous": KolipsiWalker.ambiguous,
+    "strikeover": KolipsiWalker.strikeover,
+    "overwrite": KolipsiWalker.overwrite,
+    "foreign_word": KolipsiWalker.foreign_word,
+    "symbol": KolipsiWalker.ignore,
+    "emoticon": KolipsiWalker.ignore,
+    "unreadable": KolipsiWalker.ignore,
+    "par": KolipsiWalker.par,
+    SPACE_TAG: KolipsiWalker.space,
+    "greeting": KolipsiWalker.greeting,
+    "closing": KolipsiWalker.greeting,
+    "entity": KolipsiWalker.greeting,
+}
+
+def kolipsi_handler(tag: str) -> Callable:
+    """KolipsiWalker handler of a raw (namespaced) tag."""
+    return KOLIPSI_HANDLERS.get(local_name(tag), KolipsiWalker.other)
+
+KolipsiWalker.handlers = HandlerTable(kolipsi_handler)
+
+def extract_kolipsi(element, spaces: SpaceTable = NO_SPACES) -> Tuple[str, str, bool]:
+    """
+    Extract src and tgt from Kolipsi element.
+    Returns (src_text, tgt_text, has_corrections)
+    """
+    walker = KolipsiWalker(spaces)
+    walker.walk((iter((element,)), None, None, None))
+    return walker.result()
+
+def plan_kolipsi_sentences(element, spaces: SpaceTable = NO_SPACES) -> List[PlanItem]:
+    """Extract the per-chunk split jobs of a Kolipsi element (sentencization deferred)."""
+    src_full, tgt_full, _ = extract_kolipsi(element, spaces)
 
     if not src_full and not tgt_full:
         return []
@@ -733,7 +1006,7 @@ def extract_kolipsi_sentences(element) -> List[SentencePair]:
         src_chunks.extend([''] * (max_chunks - len(src_chunks)))
         tgt_chunks.extend([''] * (max_chunks - len(tgt_chunks)))
 
-    pairs = []
+    plan = []
     for src_chunk, tgt_chunk in zip(src_chunks, tgt_chunks):
         if not src_chunk and not tgt_chunk:
             continue
@@ -742,251 +1015,195 @@ def extract_kolipsi_sentences(element) -> List[SentencePair]:
         has_foreign_in_chunk = ('FOREIGNWORDSTART' in src_chunk or 
                                'FOREIGNWORDSTART' in tgt_chunk)
         
-        src_chunk = re.sub(r'FOREIGNWORDSTART(.*?)FOREIGNWORDEND', r'\1', src_chunk)
-        tgt_chunk = re.sub(r'FOREIGNWORDSTART(.*?)FOREIGNWORDEND', r'\1', tgt_chunk)
+        src_chunk = tp.FOREIGN_WORD.sub(r'\1', src_chunk)
+        tgt_chunk = tp.FOREIGN_WORD.sub(r'\1', tgt_chunk)
         
-        src_chunk = re.sub(r'\s+', ' ', src_chunk).strip()
-        tgt_chunk = re.sub(r'\s+', ' ', tgt_chunk).strip()
-
-        src_sents = spacy_sent(src_chunk) if src_chunk else []
-        tgt_sents = spacy_sent(tgt_chunk) if tgt_chunk else []
+        src_chunk = tp.collapse_whitespace(src_chunk)
+        tgt_chunk = tp.collapse_whitespace(tgt_chunk)
 
-        if not src_sents and not tgt_sents:
-            continue
+        plan.append(SplitJob(src_chunk, tgt_chunk, has_foreign_in_chunk))
 
-        max_len = max(len(src_sents), len(tgt_sents))
-        for i in range(max_len):
-            src_sent = src_sents[i] if i < len(src_sents) else ""
-            tgt_sent = tgt_sents[i] if i < len(tgt_sents) else ""
-            
-            has_correction = (src_sent.strip() != tgt_sent.strip())
-            
-            if src_sent or tgt_sent:
-                pairs.append(SentencePair(
-                    src=src_sent,
-                    tgt=tgt_sent,
-                    has_correction=has_correction,
-                    has_foreign=has_foreign_in_chunk
-                ))
+    return plan
 
-    return pairs
+def extract_kolipsi_sentences(element, spaces: SpaceTable = NO_SPACES) -> List[SentencePair]:
+    """Extract sentence pairs from Kolipsi element."""
+    return resolve_plans([plan_kolipsi_sentences(element, spaces)])[0]
 
 
 # ============================================================================
 # LEONIDE EXTRACTION
 # ============================================================================
 
-def extract_leonide(paragraph) -> Tuple[str, str, bool]:
-    """Extract text from LEONIDE paragraph."""
-    src_builder = TextBuilder()
-    tgt_builder = TextBuilder()
-    has_corrections = False
-
-    def process_node(node, src: TextBuilder, tgt: TextBuilder):
-        nonlocal has_corrections
-        
-        if node.text and node.text.strip():
-            src.add_text(node.text.strip())
-            tgt.add_text(node.text.strip())
-
-        for child in node:
-            tag = child.tag.lower()
-
-            # FOREIGN WORD
-            if 'tran_foreign_word' in tag:
-                # Mark ALL content inside foreign_word, including nested orth_errors
-                # Get ALL text from inside this foreign word element
-                all_foreign_text = ''.join(child.itertext()).strip()
-                
-                if all_foreign_text:
-                    marked_word = f'FOREIGNWORDSTART{all_foreign_text}FOREIGNWORDEND'
-                    src.add_text(marked_word)
-                    tgt.add_text(marked_word)
-                
-                # Don't process children - we've already captured everything
-                # This prevents nested orth_error from being processed separately
-                
-                if child.tail:
-                    if has_leading_whitespace(child.tail):
-                        src.add_space()
-                        tgt.add_space()
-                    if child.tail.strip():
-                        src.add_text(child.tail.strip())
-                        tgt.add_text(child.tail.strip())
-                continue
-
-            # SYMBOL / EMOTICON
-            if 'tran_symbol' in tag or 'tran_emoticon' in tag:
-                if child.tail:
-                    if has_leading_whitespace(child.tail):
-                        src.add_space()
-                        tgt.add_space()
-                    if child.tail.strip():
-                        src.add_text(child.tail.strip())
-                        tgt.add_text(child.tail.strip())
-                continue
-
-            # DIV
-            if tag == 'div':
-                # DIV elements often signal paragraph/sentence breaks
-                prev_text = src.get_text()
-                if prev_text and has_sentence_ending(prev_text):
-                    src.add_marker(" <SENTBREAK> ")
-                    tgt.add_marker(" <SENTBREAK> ")
-                else:
-                    src.add_space()
-                    tgt.add_space()
-
-                process_node(child, src, tgt)
-
-                if child.tail and child.tail.strip():
-                    src.add_space()
-                    tgt.add_space()
-                    src.add_text(child.tail.strip())
-                    tgt.add_text(child.tail.strip())
-                else:
-                    src.add_space()
-                    tgt.add_space()
-                continue
+class LeonideWalker(TreeWalker):
+    """
+    Handlers of the LEONIDE tags; the element text comes first, each handler takes care of the tail.
+    A space between tags adds nothing here (whitespace-only text is skipped),
+    so children are plain iter(node); only foreign_word's joined text has them.
+    """
 
-            # WORD CORRECTION / AMBIGUOUS
-            if 'tran_word_correction' in tag or 'tran_ambiguous' in tag:
-                src.add_space()
-                tgt.add_space()
-                
-                if child.text and child.text.strip():
-                    src.add_text(child.text.strip())
-                    tgt.add_text(child.text.strip())
-                    
-                for grandchild in child:
-                    process_node(grandchild, src, tgt)
-                    
-                if child.tail:
-                    if has_leading_whitespace(child.tail):
-                        src.add_space()
-                        tgt.add_space()
-                    if child.tail.strip():
-                        src.add_text(child.tail.strip())
-                        tgt.add_text(child.tail.strip())
-                continue
+    def process_node(self, node):
+        """Text of node, then its children (but not its tail)."""
+        self.add_stripped(node.text)
+        if len(node):
+            return iter(node), None, None, node
+
+    # FOREIGN WORD
+    def foreign_word(self, child):
+        # Mark ALL content inside foreign_word, including nested orth_errors
+        # Get ALL text from inside this foreign word element
+        all_foreign_text = self.spaces.joined_text(child).strip()
+
+        if all_foreign_text:
+            self.add_both(f'FOREIGNWORDSTART{all_foreign_text}FOREIGNWORDEND')
+
+        # Don't process children - we've already captured everything
+        # This prevents nested orth_error from being processed separately
+        self.add_tail(child)
+
+    # SYMBOL / EMOTICON / WORD DELETION
+    def skip(self, child):
+        self.add_tail(child)
+
+    # DIV
+    def div(self, child):
+        # DIV elements often signal paragraph/sentence breaks
+        src, tgt = self.src, self.tgt
+        if src.ends_sentence():
+            src.add_marker(" <SENTBREAK> ")
+            tgt.add_marker(" <SENTBREAK> ")
+        else:
+            src.add_space()
+            tgt.add_space()
 
-            # WORD DELETION
-            if 'tran_word_deletion' in tag:
-                if child.tail:
-                    if has_leading_whitespace(child.tail):
-                        src.add_space()
-                        tgt.add_space()
-                    if child.tail.strip():
-                        src.add_text(child.tail.strip())
-                        tgt.add_text(child.tail.strip())
-                continue
+        self.add_stripped(child.text)
+        return iter(child), None, self.end_div, child
+
+    def end_div(self, child):
+        src, tgt = self.src, self.tgt
+        src.add_space()
+        tgt.add_space()
+        if child.tail and child.tail.strip():
+            src.add_text(child.tail.strip())
+            tgt.add_text(child.tail.strip())
+
+    # WORD CORRECTION / AMBIGUOUS
+    def word_correction(self, child):
+        self.space_both()
+        self.add_stripped(child.text)
+        # Grandchildren are processed as plain containers (text and children, no tail)
+        return iter(child), self.process_node, self.add_tail, child
+
+    # ORTH ERROR
+    def orth_error(self, child):
+        self.has_corrections = True
+        src, tgt = self.src, self.tgt
+        src.add_space()
+        tgt.add_space()
+
+        target_attr = child.get('orth_error_target')
+
+        # Get ONLY the direct text of orth_error element (not nested foreign_word text)
+        original_text = (child.text or "").strip()
+
+        if not original_text:
+            for sub in child:
+                sub_tag = sub.tag.lower()
+                if 'tran_word_correction' in sub_tag:
+                    original_text = (sub.text or "").strip()
+                    break
 
-            # ORTH ERROR
-            if 'orth_error' in tag:
-                has_corrections = True
-                src.add_space()
-                tgt.add_space()
-                
-                target_attr = child.get('orth_error_target')
-                
-                # Get ONLY the direct text of orth_error element (not nested foreign_word text)
-                original_text = (child.text or "").strip()
-
-                if not original_text:
-                    for sub in child:
-                        sub_tag = sub.tag.lower()
-                        if 'tran_word_correction' in sub_tag:
-                            original_text = (sub.text or "").strip()
-                            break
-
-                # Check for sentence break BEFORE adding text
-                prev_src = src.get_text()
-                if target_attr and original_text:
-                    # Case 1: Capitalization change (lowercase → uppercase) signals new sentence
-                    if (len(original_text) > 0 and len(target_attr) > 0
-                        and original_text[0].islower() and target_attr[0].isupper()
-                        and has_sentence_ending(prev_src)):
-                        src.add_marker(" <SENTBREAK> ")
-                        tgt.add_marker(" <SENTBREAK> ")
-                    # Case 2: Both uppercase after sentence-ending punctuation (natural boundary)
-                    elif (len(original_text) > 0 and len(target_attr) > 0
-                        and original_text[0].isupper() and target_attr[0].isupper()
-                        and has_sentence_ending(prev_src)):
-                        src.add_marker(" <SENTBREAK> ")
-                        tgt.add_marker(" <SENTBREAK> ")
-                    elif (prev_src and prev_src.rstrip().endswith('.')
-                        and len(original_text) > 0 and original_text[0].isupper()
-                        and len(target_attr) > 0 and target_attr[0].isupper()):
-                        src.add_marker(" <SENTBREAK> ")
-                        tgt.add_marker(" <SENTBREAK> ")
-                
-                # Handle deletion case (no target or empty target)
-                if not target_attr or not target_attr.strip():
-                    # This is a deletion - source has word, target should be empty
-                    # BUT: to maintain alignment, we use a special marker
-                    if original_text:
-                        src.add_text(original_text)
-                        tgt.add_text("<DEL>")  # Placeholder for deletion
-                else:
-                    # Normal correction case
-                    # Check for duplicates
-                    should_add_target = True
-                    if tgt.parts:
-                        recent_text = ' '.join(tgt.parts[-3:]) if len(tgt.parts) >= 3 else ' '.join(tgt.parts)
-                        if target_attr in recent_text:
-                            should_add_target = False
-                    
-                    if original_text:
-                        src.add_text(original_text)
-                    if should_add_target:
-                        tgt.add_text(target_attr)
-                
-                # Handle tail with proper spacing
-                if child.tail:
-                    if has_leading_whitespace(child.tail):
-                        src.add_space()
-                        tgt.add_space()
-                    if child.tail.strip():
-                        src.add_text(child.tail.strip())
-                        tgt.add_text(child.tail.strip())
-                continue
-                            
-            # CAPITALISATION
-            if 'tran_capitalisation' in tag:
-                original_attr = child.text
-                target_attr = child.get('tran_capitalisation_target')
-                if original_attr:
-                    src.add_text(original_attr)
-                if target_attr:
-                    tgt.add_text(target_attr)
-                    
-                if child.tail:
-                    if has_leading_whitespace(child.tail):
-                        src.add_space()
-                        tgt.add_space()
-                    if child.tail.strip():
-                        src.add_text(child.tail.strip())
-                        tgt.add_text(child.tail.strip())
-                continue
+        # Check for sentence break BEFORE adding text
+        if target_attr and original_text:
+            # Case 1: Capitalization change (lowercase → uppercase) signals new sentence
+            if (original_text[0].islower() and target_attr[0].isupper()
+                and src.ends_sentence()):
+                self.marker_both(" <SENTBREAK> ")
+            # Case 2: Both uppercase after sentence-ending punctuation (natural boundary)
+            elif (original_text[0].isupper() and target_attr[0].isupper()
+                and src.ends_sentence()):
+                self.marker_both(" <SENTBREAK> ")
+            elif (src.last_char == '.'
+                and original_text[0].isupper() and target_attr[0].isupper()):
+                self.marker_both(" <SENTBREAK> ")
+
+        # Handle deletion case (no target or empty target)
+        if not target_attr or not target_attr.strip():
+            # This is a deletion - source has word, target should be empty
+            # BUT: to maintain alignment, we use a special marker
+            if original_text:
+                src.add_text(original_text)
+                tgt.add_text("<DEL>")  # Placeholder for deletion
+        else:
+            # Normal correction case
+            # Check for duplicates
+            should_add_target = True
+            if tgt.parts:
+                recent_text = ' '.join(tgt.parts[-3:]) if len(tgt.parts) >= 3 else ' '.join(tgt.parts)
+                if target_attr in recent_text:
+                    should_add_target = False
+
+            if original_text:
+                src.add_text(original_text)
+            if should_add_target:
+                tgt.add_text(target_attr)
+
+        # Handle tail with proper spacing
+        self.add_tail(child)
+
+    # CAPITALISATION
+    def capitalisation(self, child):
+        original_attr = child.text
+        target_attr = child.get('tran_capitalisation_target')
+        if original_attr:
+            self.src.add_text(original_attr)
+        if target_attr:
+            self.tgt.add_text(target_attr)
+
+        self.add_tail(child)
+
+    # Recurse for other tags
+    def other(self, child):
+        text = child.text
+        if text and not text.isspace():
+            self.add_both(text.strip())
+        if len(child):
+            return iter(child), None, self.add_tail, child
+        # Leaf: no frame needed
+        if child.tail:
+            self.add_tail(child)
+
+def leonide_handler(tag: str) -> Callable:
+    """LeonideWalker handler of a raw tag (tags carry annotation ids, e.g. orth_error_id12)."""
+    tag = tag.lower()
+    if 'tran_foreign_word' in tag:
+        return LeonideWalker.foreign_word
+    if 'tran_symbol' in tag or 'tran_emoticon' in tag:
+        return LeonideWalker.skip
+    if tag == 'div':
+        return LeonideWalker.div
+    if 'tran_word_correction' in tag or 'tran_ambiguous' in tag:
+        return LeonideWalker.word_correction
+    if 'tran_word_deletion' in tag:
+        return LeonideWalker.skip
+    if 'orth_error' in tag:
+        return LeonideWalker.orth_error
+    if 'tran_capitalisation' in tag:
+        return LeonideWalker.capitalisation
+    return LeonideWalker.other
+
+LeonideWalker.handlers = HandlerTable(leonide_handler)
+
+def extract_leonide(paragraph, spaces: SpaceTable = NO_SPACES) -> Tuple[str, str, bool]:
+    """Extract text from LEONIDE paragraph."""
+    walker = LeonideWalker(spaces)
+    frame = walker.process_node(paragraph)
+    if frame is not None:  # None: a paragraph without children, already handled
+        walker.walk(frame)
+    return walker.result()
 
-            # Recurse for other tags
-            process_node(child, src, tgt)
-            
-            # Handle tail
-            if child.tail:
-                if has_leading_whitespace(child.tail):
-                    src.add_space()
-                    tgt.add_space()
-                if child.tail.strip():
-                    src.add_text(child.tail.strip())
-                    tgt.add_text(child.tail.strip())
-
-    process_node(paragraph, src_builder, tgt_builder)
-    return src_builder.get_text(), tgt_builder.get_text(), has_corrections
-
-def extract_leonide_sentences(paragraph) -> List[SentencePair]:
-    """Extract sentence pairs from LEONIDE paragraph."""
-    src, tgt, _ = extract_leonide(paragraph)
+def plan_leonide_sentences(paragraph, spaces: SpaceTable = NO_SPACES) -> List[PlanItem]:
+    """Extract the pairs (explicit breaks) or split job (spaCy fallback) of a LEONIDE paragraph."""
+    src, tgt, _ = extract_leonide(paragraph, spaces)
 
     if not src and not tgt:
         return []
@@ -1012,8 +1229,8 @@ def extract_leonide_sentences(paragraph) -> List[SentencePair]:
     
     if use_explicit_breaks:
         # Clean foreign word markers
-        src_chunks = [re.sub(r'FOREIGNWORDSTART(.*?)FOREIGNWORDEND', r'\1', chunk) for chunk in src_chunks]
-        tgt_chunks = [re.sub(r'FOREIGNWORDSTART(.*?)FOREIGNWORDEND', r'\1', chunk) for chunk in tgt_chunks]
+        src_chunks = [tp.FOREIGN_WORD.sub(r'\1', chunk) for chunk in src_chunks]
+        tgt_chunks = [tp.FOREIGN_WORD.sub(r'\1', chunk) for chunk in tgt_chunks]
         
         pairs = []
         for i in range(len(src_chunks)):
@@ -1034,96 +1251,66 @@ def extract_leonide_sentences(paragraph) -> List[SentencePair]:
     
     else:
         # Remove any SENTBREAK markers since we're not using them
-        src = re.sub(r'<SENTBREAK>', ' ', src)
-        tgt = re.sub(r'<SENTBREAK>', ' ', tgt)
+        src = src.replace('<SENTBREAK>', ' ')
+        tgt = tgt.replace('<SENTBREAK>', ' ')
         
         # Clean foreign word markers
-        src = re.sub(r'FOREIGNWORDSTART(.*?)FOREIGNWORDEND', r'\1', src)
-        tgt = re.sub(r'FOREIGNWORDSTART(.*?)FOREIGNWORDEND', r'\1', tgt)
+        src = tp.FOREIGN_WORD.sub(r'\1', src)
+        tgt = tp.FOREIGN_WORD.sub(r'\1', tgt)
         
         # Clean up multiple spaces
-        src = re.sub(r'\s+', ' ', src).strip()
-        tgt = re.sub(r'\s+', ' ', tgt).strip()
+        src = tp.collapse_whitespace(src)
+        tgt = tp.collapse_whitespace(tgt)
         
-        src_sents = spacy_sent(src)
-        tgt_sents = spacy_sent(tgt)
+        return [SplitJob(src, tgt, has_foreign)]
 
-        max_len = max(len(src_sents), len(tgt_sents))
-        pairs = []
-        
-        for i in range(max_len):
-            src_sent = src_sents[i] if i < len(src_sents) else ""
-            tgt_sent = tgt_sents[i] if i < len(tgt_sents) else ""
-            
-            has_correction = (src_sent.strip() != tgt_sent.strip())
-            
-            if src_sent or tgt_sent:
-                pairs.append(SentencePair(
-                    src=src_sent,
-                    tgt=tgt_sent,
-                    has_correction=has_correction,
-                    has_foreign=has_foreign
-                ))
-
-        return pairs
+def extract_leonide_sentences(paragraph, spaces: SpaceTable = NO_SPACES) -> List[SentencePair]:
+    """Extract sentence pairs from LEONIDE paragraph."""
+    return resolve_plans([plan_leonide_sentences(paragraph, spaces)])[0]
 
 # ============================================================================
 # MAIN EXTRACTION PIPELINE
 # ============================================================================
 
-def inject_spaces_between_tags(xml_string: str) -> str:
-    """Inject explicit SPACEWRAPPER nodes for meaningful spaces in XML."""
-    injected_count = 0
-    
-    def replacer_text_space_tag(match):
-        nonlocal injected_count
-        before_gt = match.group(1)
-        text = match.group(2)
-        spaces = match.group(3)
-        after_lt = match.group(4)
-        
-        if '\n' in spaces or not text.strip():
-            return match.group(0)
-        
-        injected_count += 1
-        return f'{before_gt}{text}<SPACEWRAPPER> </SPACEWRAPPER>{after_lt}'
-    
-    result = re.sub(r'(>)([^<\n]*?\S[^<\n]*?)([ \t]+)(<)', replacer_text_space_tag, xml_string)
-    
-    def replacer_tag_space_tag(match):
-        nonlocal injected_count
-        before = match.group(1)
-        space = match.group(2)
-        after = match.group(3)
-        
-        if '\n' in space:
-            return match.group(0)
-        
-        injected_count += 1
-        return f'{before}<SPACEWRAPPER> </SPACEWRAPPER>{after}'
-    
-    result = re.sub(r'(>)([ \t]+)(<)', replacer_tag_space_tag, result)
-    
-    return result
-
-def extract_from_xml(xml_content: str, corpus_type: str) -> List[SentencePair]:
-    """Main extraction function."""
-    # Inject space wrappers
-    xml_content = inject_spaces_between_tags(xml_content)
-
+def plan_from_xml(xml_content: "XmlDocument", corpus_type: str, timings: Optional[Dict[str, float]] = None) -> List[PlanItem]:
+    """
+    Extract the plan (pairs and pending split jobs) of a whole document
+    (str, or the raw bytes of the file, see load_xml_bytes).
+    The sub-stage times are also added to timings, if given (per-file timings).
+    """
+    backend = get_backend()
     try:
-        root = ET.fromstring(xml_content)
-    except ET.ParseError as e:
+        with METRICS.timed("plan.parse", into=timings):
+            root = backend.fromstring(xml_content)
+    except backend.ParseError as e:
+        if not isinstance(xml_content, str):
+            # Undecodable bytes (or a syntax error, reported by the retry):
+            # parse the text without them, as the text loader would have read it
+            return plan_from_xml(decode_xml(xml_content), corpus_type, timings)
         print(f"[ERROR] XML Parse Error: {e}")
         return []
 
+    with METRICS.timed("plan.spaces", into=timings):
+        spaces = record_spaces(root)
+
+    with METRICS.timed("plan.extract", into=timings):
+        return plan_from_root(root, corpus_type, spaces, backend)
+
+def plan_from_root(root, corpus_type: str, spaces: SpaceTable, backend=None) -> List[PlanItem]:
+    """
+    Walk a parsed document and extract its plan (second half of plan_from_xml).
+    spaces is record_spaces(root); backend is the xml_backend that parsed root
+    (default: the configured one).
+    """
+    if backend is None:
+        backend = get_backend()
     if corpus_type == "LEONIDE":
-        paras = root.findall('.//{http://www.eurac.edu/transcanno}paragraph') or root.findall('.//paragraph')
-        all_pairs = []
+        paras = (backend.findall(root, './/{http://www.eurac.edu/transcanno}paragraph')
+                 or backend.findall(root, './/paragraph'))
+        plan = []
         for para in paras:
-            pairs = extract_leonide_sentences(para)
-            all_pairs.extend(pairs)
-        return all_pairs
+            plan.extend(plan_leonide_sentences(para, spaces))
+        return plan
 
     else:  # Kolipsi
         if "Kolipsi_1" in corpus_type or "Kolipsi-1" in corpus_type:
@@ -1131,262 +1318,1025 @@ def extract_from_xml(xml_content: str, corpus_type: str) -> List[SentencePair]:
         else:
             ns_body = '{http://www.eurac.edu/kolipsi_II}body'
     
-        body = root.find(f'.//{ns_body}')
+        body = backend.find(root, f'.//{ns_body}')
         if body is None:
-            body = root.find('.//body')
+            body = backend.find(root, './/body')
     
         if body is None:
             print(f"[ERROR] No body element found")
             return []
         
-        exercises = body.findall('.//exercise')
+        exercises = backend.findall(body, './/exercise')
         if not exercises:
             exercises = [body]
 
-        all_pairs = []
+        plan = []
         for ex in exercises:
             if ex is None:
                 continue
-            pairs = extract_kolipsi_sentences(ex)
-            all_pairs.extend(pairs)
+            plan.extend(plan_kolipsi_sentences(ex, spaces))
+
+        return plan
+
+def extract_from_xml(xml_content: str, corpus_type: str) -> List[SentencePair]:
+    """Main extraction function."""
+    return resolve_plans([plan_from_xml(xml_content, corpus_type)])[0]
+
+# ============================================================================
+# STREAMING XML ENGINE
+# ============================================================================
 
-        return all_pairs
+STREAM_CHUNK_SIZE = 64 * 1024
+
+class StreamingUnitTarget:
+    """
+    XMLParser target that builds the tree like ET.TreeBuilder while parsing.
+
+    - Sees the character data between tags as events and records the
+      meaningful spaces in a SpaceTable while parsing (as record_spaces
+      does for a whole tree).
+    - Collects each extraction unit (LEONIDE paragraph, Kolipsi exercise or
+      body) once it is complete, including its tail, so the caller can
+      process it and drop it while the rest of the file is still unparsed.
+    """
+    def __init__(self, corpus_type: str):
+        self.builder = ET.TreeBuilder()
+        self.stack = []          # Open elements (for detaching finished units)
+        self.data_parts = []
+        self.spaces = SpaceTable()
+        self.last = None         # Element of the last start/end event
+        self.last_closed = False # Data goes to last.tail (after end) or last.text (after start)
+        self.pending = None      # Closed unit waiting for its tail
+        self.ready = []          # Complete units: (element, parent)
+        self.unit_depth = 0      # > 0 while inside a unit
+
+        if corpus_type == "LEONIDE":
+            self.unit_tags = {'{http://www.eurac.edu/transcanno}paragraph', 'paragraph'}
+            self.container_tags = None
+        else:
+            if "Kolipsi_1" in corpus_type or "Kolipsi-1" in corpus_type:
+                ns_body = '{http://www.eurac.edu/kolipsi}body'
+            else:
+                ns_body = '{http://www.eurac.edu/kolipsi_II}body'
+            self.unit_tags = {'exercise'}
+            self.container_tags = {ns_body, 'body'}
+        self.container = None    # Kolipsi body, once found
+        self.container_open = False
+        self.units_in_container = 0
+
+    def _flush(self):
+        if not self.data_parts:
+            return
+        segment = ''.join(self.data_parts)
+        self.data_parts = []
+        if not self.stack:
+            return  # Prolog / epilog whitespace is not part of the tree
+        kept, space = split_trailing_space(segment)
+        if kept:
+            self.builder.data(kept)
+        if space:
+            # Either way the segment lies inside the innermost open element
+            self.spaces.parents.add(self.stack[-1])
+            if self.last_closed:
+                self.spaces.after_tail.add(self.last)
+            else:
+                self.spaces.after_text.add(self.last)
+
+    def _release_pending(self):
+        # Called right after the builder has seen the next tag, i.e. once the
+        # pending unit's tail has been assigned
+        if self.pending is not None:
+            self.ready.append(self.pending)
+            self.pending = None
+
+    def data(self, text: str):
+        self.data_parts.append(text)
+
+    def start(self, tag: str, attrib: Dict[str, str]):
+        self._flush()
+        elem = self.builder.start(tag, attrib)
+        self._release_pending()
+        self.last, self.last_closed = elem, False
+
+        if self.container_tags is not None and self.container is None and tag in self.container_tags:
+            self.container = elem
+            self.container_open = True
+        elif tag in self.unit_tags and (self.container_tags is None or self.container_open):
+            self.unit_depth += 1
+        self.stack.append(elem)
+        return elem
+
+    def end(self, tag: str):
+        self._flush()
+        elem = self.builder.end(tag)
+        self._release_pending()
+        self.last, self.last_closed = elem, True
+        self.stack.pop()
+        parent = self.stack[-1] if self.stack else None
+
+        if elem is self.container:
+            self.container_open = False
+            if self.units_in_container == 0:
+                self.pending = (elem, parent)  # No exercises: the body is the unit
+        elif tag in self.unit_tags and (self.container_tags is None or self.container_open):
+            self.unit_depth -= 1
+            if self.unit_depth == 0:  # Outermost unit only
+                self.units_in_container += 1
+                self.pending = (elem, parent)
+        return elem
+
+    def close(self):
+        self._flush()
+        self._release_pending()
+        return self.builder.close()
+
+    def drain(self) -> Iterator[ET.Element]:
+        """Yield complete units, then free them once the caller has processed them."""
+        while self.ready:
+            elem, parent = self.ready.pop(0)
+            yield elem
+            self.spaces.discard(elem)
+            elem.clear()
+            if parent is not None:
+                parent.remove(elem)
+
+def iter_source_chunks(source, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """Yield text chunks from a file object (or a whole string)."""
+    if isinstance(source, str):
+        yield source
+        return
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+def plan_from_xml_streaming(source, corpus_type: str) -> List[PlanItem]:
+    """
+    Streaming variant of plan_from_xml.
+
+    Parses incrementally from a file object (or string) and extracts each
+    LEONIDE paragraph / Kolipsi exercise as soon as it is complete, so the
+    parsed tree never holds more than one unit. Produces the same plan as
+    plan_from_xml; namespaced and plain unit tags are both accepted.
+    """
+    target = StreamingUnitTarget(corpus_type)
+    parser = ET.XMLParser(target=target)
+    plan_unit = plan_leonide_sentences if corpus_type == "LEONIDE" else plan_kolipsi_sentences
+
+    plan = []
+    try:
+        for chunk in iter_source_chunks(source):
+            parser.feed(chunk)
+            for unit in target.drain():
+                plan.extend(plan_unit(unit, target.spaces))
+        parser.close()
+        for unit in target.drain():
+            plan.extend(plan_unit(unit, target.spaces))
+    except ET.ParseError as e:
+        print(f"[ERROR] XML Parse Error: {e}")
+        return []
+
+    if target.container_tags is not None and target.container is None:
+        print(f"[ERROR] No body element found")
+        return []
+
+    return plan
+
+def extract_from_xml_streaming(source, corpus_type: str) -> List[SentencePair]:
+    """Streaming variant of extract_from_xml (see plan_from_xml_streaming)."""
+    return resolve_plans([plan_from_xml_streaming(source, corpus_type)])[0]
 
 def clean_sentence_pairs(pairs: List[SentencePair]) -> List[SentencePair]:
-    """Clean and deduplicate sentence pairs."""
+    """
+    Clean and deduplicate sentence pairs (dropped pairs are counted per rule in METRICS).
+    The text drop rules come from ExtractionParams.DROP_RULES and MIN_WORDS.
+    """
+    count = METRICS.count
+    drop_rules = tp.drop_rule_matcher(ExtractionParams.DROP_RULES)
+    min_words = tp.min_words_pattern(ExtractionParams.MIN_WORDS)
     cleaned = []
     seen_pairs = set()
-    empty_regex = r"^\s*[\.\?!]*\s*$"
 
     for pair in pairs:
         # Skip foreign words
         if pair.has_foreign:
+            count("dropped.foreign")
             continue
         
-        src = re.sub(r"\s*\n\s*", " ", pair.src).strip()
-        tgt = re.sub(r"\s*\n\s*", " ", pair.tgt).strip()
+        src, tgt = pair.src, pair.tgt
+        if "\n" in src:
+            src = tp.NEWLINE_RUN.sub(" ", src)
+        if "\n" in tgt:
+            tgt = tp.NEWLINE_RUN.sub(" ", tgt)
+        src, tgt = src.strip(), tgt.strip()
 
         # === NEW: Remove interjections and laughs (standalone words only) ===
         # Pattern matches word boundaries to avoid removing parts of real words
         # Also matches interjections followed by punctuation like Ha". or ee!
-        interjection_pattern = r'\b(h[aeo]+|e+|o+|y+e+|gahahaha|hahaha+|noo+)(?:[.!?,"\s]|$)'
-        
         # Remove interjections but keep any trailing punctuation
-        src = re.sub(interjection_pattern, lambda m: m.group(0)[-1] if m.group(0)[-1] in '.!?,"' else '', src, flags=re.IGNORECASE)
-        tgt = re.sub(interjection_pattern, lambda m: m.group(0)[-1] if m.group(0)[-1] in '.!?,"' else '', tgt, flags=re.IGNORECASE)
+        src = tp.INTERJECTION.sub(r'\1', src)
+        tgt = tp.INTERJECTION.sub(r'\1', tgt)
         
         # Clean up extra spaces left by removals
-        src = re.sub(r'\s+', ' ', src).strip()
-        tgt = re.sub(r'\s+', ' ', tgt).strip()
+        src = tp.collapse_whitespace(src)
+        tgt = tp.collapse_whitespace(tgt)
         # === END INTERJECTION REMOVAL ===
 
         # === NEW: Remove leading hyphens before quotes or uppercase ===
         # Matches: start of string + hyphen + space + (quote or uppercase letter)
-        src = re.sub(r'^-\s+(?=[""„A-ZÄÖÜ])', '', src)
-        tgt = re.sub(r'^-\s+(?=[""„A-ZÄÖÜ])', '', tgt)
+        if src.startswith('-'):
+            src = tp.LEADING_HYPHEN.sub('', src)
+        if tgt.startswith('-'):
+            tgt = tp.LEADING_HYPHEN.sub('', tgt)
 
         # === END HYPHEN REMOVAL ===
-        # Skip asterisks (censored content)
-        if '*' in src or '*' in tgt:
-            continue
-
-        # CRITICAL FIX: Check EACH sentence separately (not combined)
-        src_lower = src.lower()
-        tgt_lower = tgt.lower()
 
-        # Check for @ symbol in either sentence
-        if '@' in src or '@' in tgt:
-            continue
-
-        # Check for "Fortsetzung der Aufgabe 2 fehlt"
-        if 'fortsetzung der aufgabe 2 fehlt' in src_lower or 'fortsetzung der aufgabe 2 fehlt' in tgt_lower:
-            continue
-
-        # Check for "Text nicht beendet"
-        if 'text nicht beendet' in src_lower or 'text nicht beendet' in tgt_lower:
-            continue
-
-        # Check for "der Text abgebrochen"
-        if 'der text abgebrochen' in src_lower or 'der text abgebrochen' in tgt_lower:
-            continue
-
-        # Check for "die Aufgabe abgebrochen" (with or without number)
-        if re.search(r'die aufgabe\s*\d?\s*abgebrochen', src_lower) or re.search(r'die aufgabe\s*\d?\s*abgebrochen', tgt_lower):
+        # Remove any remaining numbered list markers (handles "1)", "1 )", "1.)", etc.)
+        # A leading marker holds no letters, '*' or '@', so the drop rules below
+        # see the same matches as on the unstripped sentences
+        src = tp.LIST_MARKER.sub("", src).strip()
+        tgt = tp.LIST_MARKER.sub("", tgt).strip()
+
+        # Drop rules (asterisks, @, annotator abort notes, ...): one scan per sentence,
+        # then a rule applies when all its regexes were found in src or tgt
+        rule = drop_rules.first_rule(drop_rules.hits(src.lower()) | drop_rules.hits(tgt.lower()))
+        if rule is not None:
+            count(f"dropped.{rule}")
             continue
 
-        # Check for any other "abgebrochen" pattern with "Text" or "Aufgabe"
-        if 'abgebrochen' in src_lower or 'abgebrochen' in tgt_lower:
-            if 'text' in src_lower or 'text' in tgt_lower or 'aufgabe' in src_lower or 'aufgabe' in tgt_lower:
-                continue
-                if re.fullmatch(empty_regex, src) or re.fullmatch(empty_regex, tgt):
-                    continue
-
-        # Remove any remaining numbered list markers
-        # Remove any remaining numbered list markers (handles "1)", "1 )", "1.)", etc.)
-        src = re.sub(r"^\s*\d+\s*[.\)]\s*", "", src).strip()
-        tgt = re.sub(r"^\s*\d+\s*[.\)]\s*", "", tgt).strip()
         if not src or not tgt:
+            count("dropped.empty")
             continue
         
         # THIS IS THE FILTER FOR SINGLE-WORD SENTENCES
-        src_words = re.findall(r'\b\w+\b', src)
-        tgt_words = re.findall(r'\b\w+\b', tgt)
-        
-        if len(src_words) <= 2 or len(tgt_words) <= 2:
+        if not min_words.search(src) or not min_words.search(tgt):
+            count("dropped.too_few_words")
             continue
         # END OF FILTER
         
         pair_key = (src.lower(), tgt.lower())
         if pair_key in seen_pairs:
+            count("dropped.duplicate")
             continue
         
         seen_pairs.add(pair_key)
         cleaned.append(SentencePair(src, tgt, pair.has_correction, pair.has_foreign))
 
+    count("pairs.in", len(pairs))
+    count("pairs.kept", len(cleaned))
     return cleaned
 
+# ============================================================================
+# FILE LOADING AND PROCESSING
+# ============================================================================
+
+LOADERS = ("bytes", "text")
+
+# A document as the tree engine parses it: decoded text, or the file's bytes
+XmlDocument = Union[str, bytes, mmap.mmap]
+
+UNDECODABLE = "count_undecodable"  # Codec error handler, used instead of errors="ignore"
+
+def count_undecodable(error: UnicodeDecodeError) -> Tuple[str, int]:
+    """Skip the bytes that are not UTF-8, like errors="ignore", but count them (load.undecodable_bytes)."""
+    METRICS.count("load.undecodable_bytes", error.end - error.start)
+    return "", error.end
+
+codecs.register_error(UNDECODABLE, count_undecodable)
+
+def decode_xml(raw: Union[bytes, mmap.mmap]) -> str:
+    """Decode raw file bytes exactly like open(..., encoding="utf-8", errors=UNDECODABLE).read()."""
+    text = str(raw, "utf-8", UNDECODABLE)
+    if "\r" in text:
+        # Universal newline translation done by text-mode reads
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+def parses_bytes() -> bool:
+    """Whether documents reach the parser as raw bytes (tree engine with the "bytes" loader)."""
+    return ExtractionParams.XML_ENGINE == "tree" and ExtractionParams.XML_LOADER == "bytes"
+
+def read_xml_bytes(path: str) -> Union[bytes, mmap.mmap]:
+    """
+    The raw bytes of a file. Files of at least ExtractionParams.MMAP_MIN_BYTES
+    are memory-mapped read-only, so the parser reads their pages in place
+    instead of a copy (the kernel is asked to read them ahead); smaller ones
+    are cheaper to read (mapping costs more than it saves on few-KB files).
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        raise FileNotFoundError(f"{path} not found") from None
+    with f:
+        if os.fstat(f.fileno()).st_size < max(ExtractionParams.MMAP_MIN_BYTES, 1):
+            return f.read()  # Also empty files, which cannot be mapped
+        raw = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(raw, "madvise") and hasattr(mmap, "MADV_WILLNEED"):
+        raw.madvise(mmap.MADV_WILLNEED)
+    return raw
+
+def release_xml_bytes(raw: Union[bytes, mmap.mmap]):
+    """Close raw if it is a memory map."""
+    if isinstance(raw, mmap.mmap):
+        raw.close()
+
+@contextmanager
+def load_xml_bytes(
+    path: str,
+    timings: Optional[Dict[str, float]] = None,
+    prefetcher: Optional[FilePrefetcher] = None
+) -> Iterator[Union[bytes, mmap.mmap]]:
+    """
+    read_xml_bytes(path), timed as the "read" stage; with a prefetcher, the
+    file was read by its thread and only the wait for it (if any) is timed.
+    """
+    with METRICS.timed("read", into=timings):
+        raw = prefetcher.get(path) if prefetcher is not None else read_xml_bytes(path)
+    try:
+        yield raw
+    finally:
+        release_xml_bytes(raw)
+
+def prefetch_xml_files(xml_paths: List[str]) -> Optional[FilePrefetcher]:
+    """A reader thread for xml_paths (None when ExtractionParams.PREFETCH_DEPTH is 0)."""
+    if ExtractionParams.PREFETCH_DEPTH <= 0:
+        return None
+    return FilePrefetcher(xml_paths, read_xml_bytes, ExtractionParams.PREFETCH_DEPTH, release_xml_bytes)
+
+def open_xml_text(path: str):
+    """The file as text, read like the original errors="ignore" loading (but counting what is dropped)."""
+    return open(path, "r", encoding="utf-8", errors=UNDECODABLE)
+
+def plan_xml_source(source, corpus_type: str, timings: Optional[Dict[str, float]] = None) -> List[PlanItem]:
+    """
+    Plan one document with the configured engine: a str, raw bytes (tree
+    engine) or a text file object (read whole by the tree engine).
+    """
+    if ExtractionParams.XML_ENGINE == "stream":
+        # Parsing and extraction are interleaved here, so there are no sub-stages
+        with METRICS.timed("plan.stream", into=timings):
+            return plan_from_xml_streaming(source, corpus_type)
+    if not isinstance(source, (str, bytes, mmap.mmap)):
+        source = source.read()
+    return plan_from_xml(source, corpus_type, timings)
+
+def process_xml_content(xml_content: str, corpus_type: str) -> List[SentencePair]:
+    """Extract and clean the pairs of one XML document."""
+    # CRITICAL: Each file is a fresh extraction
+    pairs = resolve_plans([plan_xml_source(xml_content, corpus_type)])[0]
+    
+    # Clean pairs for THIS file only
+    return clean_sentence_pairs(pairs)
+
 def process_file(xml_path: str, corpus_type: str) -> List[SentencePair]:
     """Process a single XML file."""
     if not os.path.exists(xml_path):
         raise FileNotFoundError(f"{xml_path} not found")
 
-    with open(xml_path, "r", encoding="utf-8", errors="ignore") as f:
-        xml_content = f.read()
+    if parses_bytes():
+        with load_xml_bytes(xml_path) as raw:
+            plan = plan_xml_source(raw, corpus_type)
+    else:
+        with open_xml_text(xml_path) as f:
+            # The stream engine parses straight from the file
+            plan = plan_xml_source(f, corpus_type)
+
+    return clean_sentence_pairs(resolve_plans([plan])[0])
+
+# ExtractionParams fields and source files that change what process_file returns.
+# Both feed into the cache version stamp (with spaCy's version), so editing
+# either invalidates old entries.
+CACHE_KEY_PARAMS = ("SENTENCIZER_KWARGS", "SENTENCE_SPLITTER", "DROP_RULES", "MIN_WORDS", "ALIGN_BAND")
+CACHE_KEY_SOURCES = (
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "sentence_splitter.py"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "sentence_aligner.py"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "text_patterns.py"),
+)
+
+def spacy_version() -> str:
+    """Installed spaCy version, read from its package metadata (spaCy itself is not imported)."""
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        return version("spacy")
+    except PackageNotFoundError:
+        return "none"
+
+def extraction_version() -> str:
+    """Version stamp of the extraction code and parameters, used in cache keys."""
+    h = hashlib.sha256()
+    for path in CACHE_KEY_SOURCES:
+        with open(path, "rb") as f:
+            h.update(f.read())
+    for name in CACHE_KEY_PARAMS:
+        h.update(f"{name}={getattr(ExtractionParams, name)!r}".encode("utf-8"))
+    h.update(f"spacy={spacy_version()}".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+def open_cache(rebuild: bool = False) -> ExtractionCache:
+    """Open the default extraction cache for the current code version."""
+    return ExtractionCache(Paths.EXTRACT_CACHE, extraction_version(), rebuild=rebuild)
 
-    # CRITICAL: Each file is a fresh extraction
-    pairs = extract_from_xml(xml_content, corpus_type)
-    
-    # Clean pairs for THIS file only
-    cleaned = clean_sentence_pairs(pairs)
-    
-    return cleaned
+@dataclass
+class FileResult:
+    """Outcome of processing one XML file (picklable, so it can leave a worker process)."""
+    path: str
+    pairs: List[SentencePair] = field(default_factory=list)
+    error: Optional[str] = None
+    cache_hit: Optional[bool] = None  # None = cache not used
+    # Seconds of the per-file stages (read, cache.load, plan and its plan.* sub-stages,
+    # clean, cache.store; with the text loader, no cache and no prefetching, plan includes
+    # reading the file; with prefetching, read is only the wait for the reader thread).
+    # Sentencization runs once per batch and only shows in the stage totals, except
+    # with ExtractionParams.PROFILE, where each file gets its own pass (resolve)
+    timings: Dict[str, float] = field(default_factory=dict)
+    shard_rows: Optional[int] = None  # Pairs already written to a shard (pairs is then emptied)
+
+def process_file_batch(
+    xml_paths: List[str],
+    corpus_type: str,
+    cache: Optional[ExtractionCache] = None,
+    prefetcher: Optional[FilePrefetcher] = None
+) -> List[FileResult]:
+    """
+    Process several XML files, sentencizing all of them in one batched pass.
+
+    Files found in the cache are not parsed at all; the split jobs of the
+    others are pushed through spacy_sent_batch together and scattered back.
+    Failures are reported per file instead of being raised.
+    The files are read by prefetcher (whose next paths must be xml_paths),
+    else by a reader thread of the batch (see prefetch_xml_files).
+    """
+    results = [FileResult(xml_path) for xml_path in xml_paths]
+    todo = []  # (result, plan, cache_key)
+
+    own_prefetcher = None
+    if prefetcher is None and len(xml_paths) > 1:
+        prefetcher = own_prefetcher = prefetch_xml_files(xml_paths)
+    try:
+        for result in results:
+            try:
+                if prefetcher is None and cache is None and not parses_bytes():
+                    if not os.path.exists(result.path):
+                        raise FileNotFoundError(f"{result.path} not found")
+                    with open_xml_text(result.path) as f:
+                        with METRICS.timed("plan", into=result.timings):
+                            todo.append((result, plan_xml_source(f, corpus_type, result.timings), None))
+                    continue
+
+                with load_xml_bytes(result.path, result.timings, prefetcher) as raw:
+                    key = None
+                    if cache is not None:
+                        with METRICS.timed("cache.load", into=result.timings):
+                            key = cache.key(raw, corpus_type)
+                            cached = cache.load(key)
+                        if cached is not None:
+                            result.pairs = [SentencePair(*t) for t in cached]
+                            result.cache_hit = True
+                            continue
+                    with METRICS.timed("plan", into=result.timings):
+                        source = raw if parses_bytes() else decode_xml(raw)
+                        todo.append((result, plan_xml_source(source, corpus_type, result.timings), key))
+            except Exception as e:
+                result.error = str(e)
+    finally:
+        if own_prefetcher is not None:
+            own_prefetcher.close()
+
+    resolved = None
+    if not ExtractionParams.PROFILE:
+        try:
+            with METRICS.timed("resolve", calls=len(todo)):
+                resolved = resolve_plans([plan for _, plan, _ in todo])
+        except Exception:
+            # Retried file by file below, so only the files that fail again are lost
+            resolved = None
+
+    for index, (result, plan, key) in enumerate(todo):
+        try:
+            if resolved is not None:
+                pairs = resolved[index]
+            else:
+                # One sentencization pass per file: with PROFILE, so its cost can be
+                # attributed to the file; after a failed batch, to isolate the failure
+                with METRICS.timed("resolve", into=result.timings):
+                    pairs = resolve_plans([plan])[0]
+            with METRICS.timed("clean", into=result.timings):
+                result.pairs = clean_sentence_pairs(pairs)
+            if cache is not None:
+                with METRICS.timed("cache.store", into=result.timings):
+                    cache.store(key, [pair.to_tuple() for pair in result.pairs])
+                result.cache_hit = False
+        except Exception as e:
+            result.pairs = []
+            result.error = str(e)
+
+    return results
+
+def process_file_batch_sharded(
+    xml_paths: List[str],
+    corpus_type: str,
+    cache: Optional[ExtractionCache],
+    shard_writer: Optional["ShardWriter"],
+    index: int,
+    prefetcher: Optional[FilePrefetcher] = None
+) -> List[FileResult]:
+    """process_file_batch, writing the batch to shard `index` right away if shard_writer is given."""
+    results = process_file_batch(xml_paths, corpus_type, cache, prefetcher)
+    if shard_writer is not None:
+        shard_writer.write_batch(index, results)
+    return results
+
+def process_file_batch_metered(
+    xml_paths: List[str],
+    corpus_type: str,
+    cache: Optional[ExtractionCache] = None,
+    shard_writer: Optional["ShardWriter"] = None,
+    index: int = 0
+) -> Tuple[List[FileResult], Dict]:
+    """
+    process_file_batch_sharded in a worker process, plus the METRICS snapshot of
+    the batch (with ExtractionParams.PROFILE, including the batch's cProfile stats).
+    """
+    METRICS.reset()
+    args = (xml_paths, corpus_type, cache, shard_writer, index)
+    if not ExtractionParams.PROFILE:
+        results = process_file_batch_sharded(*args)
+        return results, METRICS.snapshot()
+
+    profiler = cProfile.Profile()
+    results = profiler.runcall(process_file_batch_sharded, *args)
+    snapshot = METRICS.snapshot()
+    snapshot["profile"] = profile_stats(profiler)
+    return results, snapshot
+
+def extraction_params_snapshot() -> Dict:
+    """Current ExtractionParams settings (including CLI overrides)."""
+    return {k: v for k, v in vars(ExtractionParams).items() if k.isupper()}
+
+def init_worker(params: Dict):
+    """Pool initializer: apply the parent's ExtractionParams in a worker process."""
+    for name, value in params.items():
+        setattr(ExtractionParams, name, value)
+    configure_logging()
+    if ExtractionParams.PROFILE:
+        load_splitter()
+
+def iter_file_results(
+    xml_paths: List[str],
+    corpus_type: str,
+    pool: Optional[ProcessPoolExecutor] = None,
+    cache: Optional[ExtractionCache] = None,
+    shard_writer: Optional["ShardWriter"] = None
+) -> Iterator[FileResult]:
+    """
+    Yield one FileResult per path, always in the order of xml_paths.
+
+    Files are processed in batches of ExtractionParams.FILES_PER_BATCH (one
+    sentencization pass each). Without a pool the batches run lazily in this
+    process; with a pool they are spread across the workers and collected
+    back in input order, so the output is identical to a serial run.
+    With a shard_writer, each batch is written to its own shard where it was
+    processed, and the results come back without their pairs.
+    Files are read ahead by a thread (ExtractionParams.PREFETCH_DEPTH): here
+    one for all of xml_paths, in the workers one per batch.
+    """
+    batch_size = max(1, ExtractionParams.FILES_PER_BATCH)
+    batches = [xml_paths[i:i + batch_size] for i in range(0, len(xml_paths), batch_size)]
+
+    if pool is None:
+        with prefetch_xml_files(xml_paths) or nullcontext() as prefetcher:
+            for index, batch in enumerate(batches):
+                batch_results = process_file_batch_sharded(batch, corpus_type, cache, shard_writer, index, prefetcher)
+                if shard_writer is not None:
+                    shard_writer.record(index, batch_results)
+                yield from batch_results
+        return
+
+    tasks = pool.map(process_file_batch_metered, batches, repeat(corpus_type), repeat(cache),
+                     repeat(shard_writer), range(len(batches)))
+    for index, (batch_results, snapshot) in enumerate(tasks):
+        METRICS.merge(snapshot)
+        if shard_writer is not None:
+            shard_writer.record(index, batch_results)
+        yield from batch_results
 
 def process_corpora(
     corpus_configs: Dict[str, Dict],
     output_dir: str = Paths.EXTRACT_OUT,
     max_files_per_corpus: Optional[int] = None,
-    output_format: str = "norm"  # "txt", "csv", "norm", or "both"
-) -> pd.DataFrame:
-    """Process multiple corpora."""
+    output_format: str = "norm",  # "csv", "norm", "both" or "parquet"
+    workers: int = ExtractionParams.WORKERS,
+    use_cache: bool = ExtractionParams.USE_CACHE,
+    rebuild_cache: bool = False,
+    report_file: Optional[str] = ExtractionParams.REPORT_FILE,
+    return_df: bool = False,
+    global_dedup: bool = ExtractionParams.GLOBAL_DEDUP,
+    profile: bool = ExtractionParams.PROFILE,
+    shards: bool = ExtractionParams.SHARDS
+) -> Optional["pd.DataFrame"]:
+    """
+    Process multiple corpora.
+
+    CSV rows and NORM blocks are written as each file finishes, so memory
+    stays flat however large the corpora are. The rows are only kept (and
+    returned as a DataFrame) with return_df.
+    With workers > 1 the files are extracted in a process pool; rows and
+    sent_num numbering stay identical to a serial run.
+    With use_cache, unchanged files are loaded from Paths.EXTRACT_CACHE;
+    rebuild_cache re-extracts every file and overwrites its entry.
+    With global_dedup, a pair already written by an earlier file (of any
+    corpus in the run) is dropped; only its first occurrence is kept.
+    Stage timings, drop counts per clean_sentence_pairs rule and per-file
+    timings are written as JSON to report_file in output_dir (None = no report).
+    With profile, the run (workers included) is profiled with cProfile into
+    ExtractionParams.PROFILE_FILE, and the per-file parse, extraction and
+    sentencization times go to ExtractionParams.PROFILE_TABLE, slowest first.
+    With shards (csv/norm/both only), every batch of files is written to its
+    own shard files by the process that extracted it, and the shards are then
+    merged into the usual files (shard_output.py); the result is identical.
+    """
+    shard_writer = None
+    if shards:
+        if output_format not in SHARD_FORMATS:
+            raise ValueError(f"Shards support the {', '.join(SHARD_FORMATS)} formats, not {output_format!r}")
+        if global_dedup or return_df:
+            raise ValueError("global_dedup and return_df need every pair in this process; they cannot be used with shards")
+        shard_writer = ShardWriter(os.path.join(output_dir, ExtractionParams.SHARD_DIR), output_format)
+
     os.makedirs(output_dir, exist_ok=True)
+    run_start = time.perf_counter()
+    METRICS.reset()
+    # Read by process_file_batch, in this process and (through the snapshot) in the workers
+    ExtractionParams.PROFILE = profile
+    profiler = None
+    if profile:
+        load_splitter()
+        profiler = cProfile.Profile()
     
-    all_data = []
-    
-    for corpus_name, cfg in corpus_configs.items():
-        print(f"\n--- Processing {corpus_name} ---")
-
-        base_dir = cfg["base_dir"]
-        lang_prof = cfg.get("lang_prof", "L2")
+    # With shards the workers write the files; output only counts the rows
+    output = StreamingOutput(output_dir, None if shards else output_format, keep_rows=return_df)
+    file_reports = []
+    cache_stats = {"hits": 0, "misses": 0}
+    dedup = GlobalDeduplicator() if global_dedup else None
+    cache = open_cache(rebuild=rebuild_cache) if use_cache else None
+    pool = None
+    if workers and workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                   initargs=(extraction_params_snapshot(),))
 
-        if not os.path.isdir(base_dir):
-            print(f"  ERROR: Base directory not found: {base_dir}")
+    try:
+        if profiler is not None:
+            profiler.enable()
+        for corpus_name, cfg in corpus_configs.items():
+            _process_corpus(corpus_name, cfg, max_files_per_corpus,
+                            output, pool, cache, cache_stats, file_reports, dedup, shard_writer)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        if pool is not None:
+            pool.shutdown()
+        output.close()
+
+    if shard_writer is not None:
+        write_shard_manifest(shard_writer.shard_dir, output_format, shard_writer.corpora)
+        print(f"\n=== Merging {sum(map(len, shard_writer.corpora.values()))} shards from {shard_writer.shard_dir} ===")
+        with METRICS.timed("merge"):
+            merge_shards(shard_writer.shard_dir, output_dir)
+
+    if cache is not None:
+        print(f"\n=== Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses ===")
+
+    if output.csv_path is not None:
+        print(f"\n=== Wrote {output.n_rows} rows to {output.csv_path} ===")
+    if output.parquet_path is not None:
+        print(f"\n=== Wrote {output.n_rows} rows to {output.parquet_path} ===")
+
+    if report_file:
+        report_path = os.path.join(output_dir, report_file)
+        report = {
+            "run": {
+                "corpora": list(corpus_configs),
+                "workers": workers,
+                "xml_engine": ExtractionParams.XML_ENGINE,
+                "xml_backend": get_backend().name if ExtractionParams.XML_ENGINE == "tree" else "etree",
+                "xml_loader": ExtractionParams.XML_LOADER if ExtractionParams.XML_ENGINE == "tree" else "text",
+                "prefetch_depth": ExtractionParams.PREFETCH_DEPTH,
+                "sentence_splitter": ExtractionParams.SENTENCE_SPLITTER,
+                "cache": cache_stats if cache is not None else None,
+                "global_dedup_removed": dedup.removed if dedup is not None else None,
+                "rows": output.n_rows,
+                "wall_seconds": round(time.perf_counter() - run_start, 6),
+            },
+            **METRICS.report(),
+            "files": file_reports,
+        }
+        write_report(report_path, report)
+        print(f"\n=== Wrote extraction report to {report_path} ===")
+
+    if output.n_rows:
+        print("\n=== SUMMARY ===")
+        print(f"Total rows: {output.n_rows}")
+        print("\nCorpus breakdown:")
+        for (corpus_name, lang_prof), n in sorted(output.row_counts.items()):
+            print(f"  {corpus_name:<14} {lang_prof:<4} {n}")
+
+    if dedup is not None:
+        print("\nGlobal dedup (duplicates removed):")
+        for corpus_name, n in dedup.removed.items():
+            print(f"  {corpus_name:<14} {n}")
+        print(f"  {'TOTAL':<14} {sum(dedup.removed.values())}")
+
+    if profiler is not None:
+        profile_path = os.path.join(output_dir, ExtractionParams.PROFILE_FILE)
+        write_profile(profile_path, profiler, METRICS.profiles)
+        table_path = os.path.join(output_dir, ExtractionParams.PROFILE_TABLE)
+        write_file_profile(table_path, file_reports, ExtractionParams.PROFILE_TOP)
+        print(f"\n=== Wrote cProfile dump to {profile_path} (python -m pstats {profile_path}) ===")
+        print(f"=== Wrote per-file profile to {table_path} ===")
+
+    if not return_df:
+        return None
+    import pandas as pd
+    return pd.DataFrame(output.rows, columns=PAIR_COLUMNS)
+
+# Columns of the per-file profile: (column, timings keys summed into it)
+FILE_PROFILE_STAGES = (
+    ("parse", ("plan.parse", "plan.spaces")),
+    ("extract", ("plan.extract", "plan.stream")),  # The stream engine parses and extracts in one step
+    ("sentencize", ("resolve",)),
+    ("clean", ("clean",)),
+)
+
+def write_file_profile(path: str, file_reports: List[Dict], top: int):
+    """Write the per-file cost table (slowest first) as CSV and print its top rows."""
+    rows = []
+    for report in file_reports:
+        seconds = report["seconds"]
+        stage_times = [sum(seconds.get(k, 0.0) for k in keys) for _, keys in FILE_PROFILE_STAGES]
+        # plan.* sub-stages are already included in plan
+        total = sum(v for k, v in seconds.items() if not k.startswith("plan."))
+        rows.append((report["corpus"], os.path.basename(report["file"]), report["bytes"],
+                     report["pairs"], *stage_times, total))
+    rows.sort(key=lambda row: -row[-1])
+
+    header = ["corpus", "file", "bytes", "pairs", *(name for name, _ in FILE_PROFILE_STAGES), "total"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow([*row[:4], *(f"{v:.6f}" for v in row[4:])])
+
+    print(f"\n=== Slowest files (ms) ===")
+    print(f"  {'corpus':<14} {'file':<32} {'bytes':>8} {'pairs':>6}"
+          + "".join(f" {name:>10}" for name in header[4:]))
+    for row in rows[:top]:
+        print(f"  {row[0]:<14} {row[1]:<32} {row[2]:>8} {row[3]:>6}"
+              + "".join(f" {v * 1000:>10.1f}" for v in row[4:]))
+
+def _process_corpus(
+    corpus_name: str,
+    cfg: Dict,
+    max_files_per_corpus: Optional[int],
+    output: "StreamingOutput",
+    pool: Optional[ProcessPoolExecutor],
+    cache: Optional[ExtractionCache],
+    cache_stats: Dict[str, int],
+    file_reports: List[Dict],
+    dedup: Optional[GlobalDeduplicator] = None,
+    shard_writer: Optional["ShardWriter"] = None
+):
+    """Extract one corpus, streaming its rows and NORM blocks to output (or to shards) file by file."""
+    print(f"\n--- Processing {corpus_name} ---")
+
+    base_dir = cfg["base_dir"]
+    lang_prof = cfg.get("lang_prof", "L2")
+
+    if not os.path.isdir(base_dir):
+        print(f"  ERROR: Base directory not found: {base_dir}")
+        return
+
+    xml_members = corpus_manifest(corpus_name, base_dir)
+
+    print(f"  Found {len(xml_members)} XML files")
+
+    if max_files_per_corpus:
+        xml_members = xml_members[:max_files_per_corpus]
+
+    to_process = [m.path for m in xml_members if not m.excluded]
+    if shard_writer is not None:
+        shard_writer.begin_corpus(corpus_name, lang_prof)
+    results = iter_file_results(to_process, corpus_name, pool, cache, shard_writer)
+
+    output.begin_corpus(corpus_name)
+    for idx, entry in enumerate(xml_members):
+        member = entry.path
+
+        # Skip excluded files
+        if entry.excluded:
+            print(f"   [{idx + 1}/{len(xml_members)}] {member} [SKIPPED - excluded]")
             continue
+        
+        print(f"   [{idx + 1}/{len(xml_members)}] {member}")
+
+        result = next(results)
+        file_reports.append({
+            "corpus": corpus_name,
+            "file": member,
+            "bytes": entry.size,
+            "pairs": len(result.pairs) if result.shard_rows is None else result.shard_rows,
+            "cache_hit": result.cache_hit,
+            "error": result.error,
+            "seconds": {k: round(v, 6) for k, v in result.timings.items()},
+        })
+        if result.error is not None:
+            print(f"     ERROR: {result.error}")
+            continue
+        pairs = result.pairs
+        if result.cache_hit is not None:
+            cache_stats["hits" if result.cache_hit else "misses"] += 1
+        if result.shard_rows is not None:
+            output.count_rows(corpus_name, lang_prof, result.shard_rows)
+            continue
+        if dedup is not None:
+            with METRICS.timed("dedup"):
+                pairs = dedup.filter(corpus_name, pairs)
+        output.write_file(corpus_name, lang_prof, entry.name, entry.text_type, pairs)
 
-        xml_members = []
-        for root_dir, dirs, files in os.walk(base_dir):
-            dirs[:] = [d for d in dirs if d != '.ipynb_checkpoints' and not d.startswith('.')]
-            files.sort()
-            for f in files:
-                if f.lower().endswith(".xml") and not f.lower().endswith(".xml.pretty"):
-                    xml_members.append(os.path.join(root_dir, f))
-
-        xml_members.sort()  # Sort full paths to ensure consistent order
-
-        print(f"  Found {len(xml_members)} XML files")
+    results.close()  # Stops the corpus's reader thread now, which adds its prefetch.* metrics
+    output.end_corpus()
 
-        if max_files_per_corpus:
-            xml_members = xml_members[:max_files_per_corpus]
+# ============================================================================
+# OUTPUT WRITERS
+# ============================================================================
 
-        corpus_pairs_with_files = []  # Changed from corpus_pairs
-        for idx, member in enumerate(xml_members):
-            xml_filename = os.path.basename(member)
-            
-            # Skip excluded files
-            if xml_filename in ExtractionParams.EXCLUDE:
-                print(f"   [{idx + 1}/{len(xml_members)}] {member} [SKIPPED - excluded]")
-                continue
-            
-            print(f"   [{idx + 1}/{len(xml_members)}] {member}")
+def write_norm_pairs(fh, pairs: List[SentencePair]):
+    """
+    Write pairs in the verticalized word-by-word NORM format (src<TAB>tgt per word).
+    Words are aligned by a token diff (token_diff.py), so an inserted or deleted
+    word gets an empty cell instead of shifting the rest of the sentence.
+    """
+    for pair in pairs:
+        for src_word, tgt_word in align_tokens(pair.src.split(), pair.tgt.split()):
+            if tgt_word == "<DEL>":
+                tgt_word = ""
 
-            try:
-                pairs = process_file(member, corpus_name)
-            except Exception as e:
-                print(f"     ERROR: {e}")
+            if not src_word and not tgt_word:
                 continue
-            
-            xml_filename = os.path.basename(member)
-
-            # Detect text type from filename
-            if corpus_name in ["Kolipsi_1_L1", "Kolipsi_1_L2", "Kolipsi_2"]:
-                # Kolipsi: _1.xml = picture story, _2.xml = opinion
-                if xml_filename.endswith("_1.xml"):
-                    text_type = "picture story"
-                elif xml_filename.endswith("_2.xml"):
-                    text_type = "opinion"
-                else:
-                    text_type = "unknown"
-            else:  # LEONIDE
-                # LEONIDE: "pic" = picture story, "op" = opinion
-                if "_pic_" in xml_filename:
-                    text_type = "picture story"
-                elif "_op_" in xml_filename:
-                    text_type = "opinion"
-                else:
-                    text_type = "unknown"
-            for sent_num, pair in enumerate(pairs, start=1):
-                all_data.append({
-                    'corpus': corpus_name,
-                    'lang_prof': lang_prof,
-                    'xml_file': xml_filename,
-                    'sent_num': sent_num,
-                    'src': pair.src,
-                    'tgt': pair.tgt,
-                    'corrected': pair.has_correction,
-                    'text_type': text_type
-                })
-            
-            corpus_pairs_with_files.append((xml_filename, pairs))
-
-        # Write NORM output if requested (verticalized word-by-word format)
-        if output_format in ["norm", "both"]:
-            out_path = os.path.join(output_dir, f"{corpus_name}_full.norm")
-            with open(out_path, "w", encoding="utf-8") as fh:
-                # Write file-by-file in processing order
-                for xml_filename, pairs in corpus_pairs_with_files:
-                    for pair in pairs:
-                        src_words = pair.src.split()
-                        tgt_words = pair.tgt.split()
-
-                        max_len = max(len(src_words), len(tgt_words))
 
-                        for i in range(max_len):
-                            src_word = src_words[i] if i < len(src_words) else ""
-                            tgt_word = tgt_words[i] if i < len(tgt_words) else ""
+            fh.write(f"{src_word}\t{tgt_word}\n")
 
-                            if tgt_word == "<DEL>":
-                                tgt_word = ""
+        # EXACTLY ONE blank line after EACH sentence pair
+        fh.write("\n")
 
-                            if not src_word and not tgt_word:
-                                continue
+def pair_rows(corpus_name: str, lang_prof: str, xml_filename: str,
+              text_type: str, pairs: List[SentencePair]) -> List[tuple]:
+    """CSV / Parquet rows (PAIR_COLUMNS order) of one extracted file."""
+    return [
+        (corpus_name, lang_prof, xml_filename, sent_num, pair.src, pair.tgt, pair.has_correction, text_type)
+        for sent_num, pair in enumerate(pairs, start=1)
+    ]
 
-                            fh.write(f"{src_word}\t{tgt_word}\n")
-
-                        # EXACTLY ONE blank line after EACH sentence pair
-                        fh.write("\n")
-
-
-            total_pairs = sum(len(pairs) for _, pairs in corpus_pairs_with_files)
-            print(f"  Wrote {total_pairs} pairs to {out_path}")
-
-    df = pd.DataFrame(all_data)
-    
-    # Write CSV output
-    if output_format in ["csv", "both"]:
-        csv_path = os.path.join(output_dir, "all_corpora.csv")
-        df.to_csv(csv_path, index=False, encoding="utf-8")
-        print(f"\n=== Wrote {len(df)} rows to {csv_path} ===")
-    
-    return df
+class StreamingOutput:
+    """
+    Writes all_corpora.csv / all_corpora.parquet and the per-corpus NORM
+    files incrementally. Produces the same bytes as DataFrame.to_csv(index=False)
+    and the buffered NORM writer, one file's pairs at a time.
+    output_format None writes nothing and only counts the rows (sharded runs).
+    """
+    def __init__(self, output_dir: str, output_format: str, keep_rows: bool = False):
+        self.output_dir = output_dir
+        self.write_norm = output_format in ["norm", "both"]
+        self.rows = [] if keep_rows else None  # Only kept when a DataFrame is requested
+        self.n_rows = 0
+        self.row_counts: Dict[Tuple[str, str], int] = {}  # (corpus, lang_prof) -> rows
+        self.norm_fh = None
+        self.norm_path = None
+        self.norm_pairs = 0
+
+        self.csv_path = None
+        self.csv_fh = None
+        if output_format in ["csv", "both"]:
+            self.csv_path = os.path.join(output_dir, "all_corpora.csv")
+            self.csv_fh = open(self.csv_path, "w", encoding="utf-8", newline="")
+            self.csv_writer = csv.writer(self.csv_fh, lineterminator="\n")
+            self.csv_writer.writerow(PAIR_COLUMNS)
+
+        self.parquet_path = None
+        self.parquet_writer = None
+        if output_format == "parquet":
+            self.parquet_path = os.path.join(output_dir, "all_corpora.parquet")
+            self.parquet_writer = ParquetPairWriter(self.parquet_path)
+
+    def begin_corpus(self, corpus_name: str):
+        if self.write_norm:
+            self.norm_path = os.path.join(self.output_dir, f"{corpus_name}_full.norm")
+            self.norm_fh = open(self.norm_path, "w", encoding="utf-8")
+            self.norm_pairs = 0
+
+    def write_file(self, corpus_name: str, lang_prof: str, xml_filename: str,
+                   text_type: str, pairs: List[SentencePair]):
+        """Write the rows and NORM blocks of one extracted file."""
+        rows = pair_rows(corpus_name, lang_prof, xml_filename, text_type, pairs)
+        self.count_rows(corpus_name, lang_prof, len(rows))
+        if self.rows is not None:
+            self.rows.extend(rows)
+        if self.csv_fh is not None:
+            with METRICS.timed("write.csv"):
+                self.csv_writer.writerows(rows)
+        if self.parquet_writer is not None:
+            with METRICS.timed("write.parquet"):
+                self.parquet_writer.write_rows(rows)
+        if self.norm_fh is not None:
+            with METRICS.timed("write.norm"):
+                write_norm_pairs(self.norm_fh, pairs)
+            self.norm_pairs += len(pairs)
+
+    def count_rows(self, corpus_name: str, lang_prof: str, n: int):
+        self.n_rows += n
+        key = (corpus_name, lang_prof)
+        self.row_counts[key] = self.row_counts.get(key, 0) + n
+
+    def end_corpus(self):
+        if self.norm_fh is not None:
+            self.norm_fh.close()
+            self.norm_fh = None
+            print(f"  Wrote {self.norm_pairs} pairs to {self.norm_path}")
+
+    def close(self):
+        if self.norm_fh is not None:
+            self.norm_fh.close()
+            self.norm_fh = None
+        if self.csv_fh is not None:
+            self.csv_fh.close()
+            self.csv_fh = None
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+            self.parquet_writer = None
+
+class ShardWriter:
+    """
+    Writes each batch of files to its own shard files (see shard_output.py)
+    in the process that extracted the batch, so workers share no file handle.
+    Sent to the workers with every batch; the parent's copy records the
+    written shards per corpus for the shard manifest.
+    """
+    def __init__(self, shard_dir: str, output_format: str):
+        self.shard_dir = shard_dir
+        self.output_format = output_format
+        self.corpus_name = None
+        self.lang_prof = None
+        self.corpora: Dict[str, List[Dict]] = {}  # corpus -> shard records (parent only)
+        reset_shard_dir(shard_dir)
+
+    def __getstate__(self):
+        # The shard records stay in the parent
+        return {**self.__dict__, "corpora": {}}
+
+    def begin_corpus(self, corpus_name: str, lang_prof: str):
+        self.corpus_name = corpus_name
+        self.lang_prof = lang_prof
+        self.corpora[corpus_name] = []
+        os.makedirs(os.path.join(self.shard_dir, corpus_name), exist_ok=True)
+
+    def write_batch(self, index: int, results: List[FileResult]):
+        """Write the pairs of a batch to shard `index`, then drop them from the results."""
+        names = shard_names(self.corpus_name, index, self.output_format)
+        csv_fh = norm_fh = None
+        try:
+            if names["csv"] is not None:
+                csv_fh = open(os.path.join(self.shard_dir, names["csv"]), "w", encoding="utf-8", newline="")
+                csv_writer = csv.writer(csv_fh, lineterminator="\n")
+            if names["norm"] is not None:
+                norm_fh = open(os.path.join(self.shard_dir, names["norm"]), "w", encoding="utf-8")
+            for result in results:
+                if result.error is not None:
+                    continue
+                if csv_fh is not None:
+                    xml_filename = os.path.basename(result.path)
+                    rows = pair_rows(self.corpus_name, self.lang_prof, xml_filename,
+                                     detect_text_type(self.corpus_name, xml_filename), result.pairs)
+                    with METRICS.timed("write.csv"):
+                        csv_writer.writerows(rows)
+                if norm_fh is not None:
+                    with METRICS.timed("write.norm"):
+                        write_norm_pairs(norm_fh, result.pairs)
+                result.shard_rows = len(result.pairs)
+                result.pairs = []
+        finally:
+            for fh in (csv_fh, norm_fh):
+                if fh is not None:
+                    fh.close()
+
+    def record(self, index: int, results: List[FileResult]):
+        """Add the manifest record of a written batch (parent side)."""
+        self.corpora[self.corpus_name].append({
+            "index": index,
+            "files": [os.path.basename(result.path) for result in results],
+            "rows": sum(result.shard_rows or 0 for result in results),
+            **shard_names(self.corpus_name, index, self.output_format),
+        })
 
 # ============================================================================
 # MAIN EXECUTION
@@ -1400,12 +2350,53 @@ if __name__ == "__main__":
     parser.add_argument('--output-dir', default=Paths.EXTRACT_OUT,
                        help='Output directory')
     parser.add_argument('--format', default=ExtractionParams.OUTPUT_FORMAT,
-                       choices=['csv', 'norm', 'both'],
-                       help='Output format')
+                       choices=['csv', 'norm', 'both', 'parquet'],
+                       help='Output format (both = csv + norm)')
     parser.add_argument('--max-files', type=int, default=None,
                        help='Max files per corpus (for testing)')
+    parser.add_argument('--workers', type=int, default=ExtractionParams.WORKERS,
+                       help='Worker processes for extraction (1 = serial)')
+    parser.add_argument('--engine', default=ExtractionParams.XML_ENGINE,
+                       choices=['tree', 'stream'],
+                       help='XML engine: parse whole documents or stream unit by unit')
+    parser.add_argument('--xml-backend', default=ExtractionParams.XML_BACKEND,
+                       choices=list(BACKENDS),
+                       help='Parser of the tree engine (auto = lxml when installed, else ElementTree)')
+    parser.add_argument('--loader', default=ExtractionParams.XML_LOADER,
+                       choices=list(LOADERS),
+                       help='Tree engine input: raw bytes decoded by the parser, or text decoded first')
+    parser.add_argument('--prefetch', type=int, default=ExtractionParams.PREFETCH_DEPTH,
+                       help='Files read ahead by a background thread (0 = read each file when it is processed)')
+    parser.add_argument('--splitter', default=ExtractionParams.SENTENCE_SPLITTER,
+                       choices=['spacy', 'fast'],
+                       help='Sentence splitter: spaCy sentencizer or its pure-Python equivalent')
+    parser.add_argument('--log-level', default=ExtractionParams.LOG_LEVEL,
+                       choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                       help='Log level (DEBUG shows the presplit chunks)')
+    parser.add_argument('--global-dedup', action='store_true', default=ExtractionParams.GLOBAL_DEDUP,
+                       help='Drop pairs repeated across files and corpora (first occurrence is kept)')
+    parser.add_argument('--shards', action='store_true', default=ExtractionParams.SHARDS,
+                       help='Each worker writes its batches to its own shard files, merged at the end (csv/norm/both)')
+    parser.add_argument('--profile', action='store_true', default=ExtractionParams.PROFILE,
+                       help='cProfile the run and rank files by parse/extract/sentencize time (reads no cache)')
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument('--cache', action='store_true', default=ExtractionParams.USE_CACHE,
+                       help='Load unchanged files from the extraction cache and store new results in it')
+    cache_group.add_argument('--no-cache', action='store_true',
+                       help='Bypass the extraction cache (even if ExtractionParams.USE_CACHE is set)')
+    cache_group.add_argument('--rebuild-cache', action='store_true',
+                       help='Re-extract every file and overwrite its cache entry')
     
     args = parser.parse_args()
+    if args.shards and (args.format not in SHARD_FORMATS or args.global_dedup):
+        parser.error("--shards works with --format csv/norm/both and without --global-dedup")
+    ExtractionParams.XML_ENGINE = args.engine
+    ExtractionParams.XML_BACKEND = args.xml_backend
+    ExtractionParams.XML_LOADER = args.loader
+    ExtractionParams.PREFETCH_DEPTH = args.prefetch
+    ExtractionParams.SENTENCE_SPLITTER = args.splitter
+    ExtractionParams.LOG_LEVEL = args.log_level
+    configure_logging()
     
     # Use command-line args if provided, otherwise use config
     active_corpora = args.corpora if args.corpora else ExtractionParams.ACTIVE_CORPORA
@@ -1416,17 +2407,18 @@ if __name__ == "__main__":
     }
     
     if configs_to_run:
-        df = process_corpora(
+        process_corpora(
             corpus_configs=configs_to_run,
             output_dir=args.output_dir,
             output_format=args.format,
-            max_files_per_corpus=args.max_files
+            max_files_per_corpus=args.max_files,
+            workers=args.workers,
+            # Cached files would not be parsed, so profiling skips the cache (unless it is being rebuilt)
+            use_cache=(args.cache and not args.profile or args.rebuild_cache) and not args.no_cache,
+            rebuild_cache=args.rebuild_cache,
+            global_dedup=args.global_dedup,
+            profile=args.profile,
+            shards=args.shards
         )
-        
-        if not df.empty:
-            print("\n=== SUMMARY ===")
-            print(f"Total rows: {len(df)}")
-            print("\nCorpus breakdown:")
-            print(df.groupby(['corpus', 'lang_prof']).size())
     else:
         print("No corpora selected.")
\ No newline at end of file